@@ -36,6 +36,11 @@ target_metadata = SQLModel.metadata
 def include_object(object, name, type_, reflected, compare_to):
     if name and name.startswith("articles_fts"):
         return False
+    # 搜索索引由 FTSSearch 自行维护（版本记录在 search_index_meta 中）
+    if name == "search_index_meta" or (type_ == "column" and name == "tsv"):
+        return False
+    if type_ == "index" and name in ("idx_article_tsv", "idx_article_title_trgm", "idx_article_content_trgm"):
+        return False
     return True
 
 def run_migrations_offline():
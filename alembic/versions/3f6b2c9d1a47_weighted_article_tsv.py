@@ -0,0 +1,88 @@
+"""
+weighted article tsv
+
+Revision ID: 3f6b2c9d1a47
+Revises: ba82d4a780c1
+Create Date: 2026-10-19 10:12:31.284615
+
+Project   : MyBlog FastAPI System
+Author    : Gold Zheng
+Alembic   : Auto-generated by Alembic Migration System
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.config import settings
+
+
+# Revision identifiers, used by Alembic.
+revision: str = '3f6b2c9d1a47'
+down_revision: Union[str, None] = 'ba82d4a780c1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# 以下 DDL 固定为本版本时的定义，不引用 app.core.search.pg_search_impl：
+# 之后修改应用中的 tsvector 表达式或索引，不会改变这次迁移的行为
+CJK_RANGES = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af"
+FTS_INDEX_VERSION = 4
+
+LEGACY_DDL = [
+    "DROP TRIGGER IF EXISTS article_tsv_update ON article",
+    "DROP FUNCTION IF EXISTS update_article_tsvector",
+]
+
+INDEX_DDL = [
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_article_tsv ON article USING GIN(tsv)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_article_title_trgm ON article USING GIN(title gin_trgm_ops)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_article_content_trgm ON article USING GIN(content gin_trgm_ops)",
+]
+
+
+def _tsv_column_ddl(tokenizer: str) -> str:
+    """加权 tsv 生成列：标题 A、摘要 B、正文 C；cjk 模式下每个中文字符单独成词"""
+    parts = []
+    for column_name, weight in (("title", "A"), ("summary", "B"), ("content", "C")):
+        source = f"coalesce({column_name}, '')"
+        if tokenizer == "cjk":
+            source = f"regexp_replace({source}, '([{CJK_RANGES}])', ' \\1 ', 'g')"
+        parts.append(f"setweight(to_tsvector('simple'::regconfig, {source}), '{weight}')")
+    return f"tsvector GENERATED ALWAYS AS ({' || '.join(parts)}) STORED"
+
+
+def upgrade() -> None:
+    """
+    Upgrade migrations:
+    PostgreSQL 的 tsv 由触发器维护的等权向量改为加权（标题 A、摘要 B、正文 C）存储生成列，
+    GIN 索引在事务外 CONCURRENTLY 创建，不阻塞文章写入。
+    列注释记录索引版本，应用启动时校验通过即不再重建。SQLite 无需迁移。
+    """
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for sql in LEGACY_DDL:
+        op.execute(sql)
+    op.execute("ALTER TABLE article DROP COLUMN IF EXISTS tsv")
+    tokenizer = settings.search_fts_tokenizer
+    op.execute(f"ALTER TABLE article ADD COLUMN tsv {_tsv_column_ddl(tokenizer)}")
+    op.execute(f"COMMENT ON COLUMN article.tsv IS 'postgresql:{FTS_INDEX_VERSION}:{tokenizer}'")
+
+    with op.get_context().autocommit_block():
+        for sql in INDEX_DDL:
+            op.execute(sql)
+
+
+def downgrade() -> None:
+    """
+    Downgrade migrations:
+    删除生成列及其索引；下次启动时 FTSSearch 会按当前代码重新创建。
+    """
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_article_tsv")
+    op.execute("ALTER TABLE article DROP COLUMN IF EXISTS tsv")
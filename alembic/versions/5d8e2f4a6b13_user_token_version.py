@@ -0,0 +1,51 @@
+"""
+user token version
+
+Revision ID: 5d8e2f4a6b13
+Revises: 7c1e4a9b2d58
+Create Date: 2026-10-19 16:40:12.806331
+
+Project   : MyBlog FastAPI System
+Author    : Gold Zheng
+Alembic   : Auto-generated by Alembic Migration System
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# Revision identifiers, used by Alembic.
+revision: str = '5d8e2f4a6b13'
+down_revision: Union[str, None] = '7c1e4a9b2d58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_column() -> bool:
+    columns = sa.inspect(op.get_bind()).get_columns("user")
+    return any(column["name"] == "token_version" for column in columns)
+
+
+def upgrade() -> None:
+    """
+    Upgrade migrations:
+    user 表增加 token_version（令牌版本），递增即可吊销该用户已签发的全部令牌。
+    新库由 create_all 按模型建好该列，这里只补齐已有数据库。
+    """
+    if not _has_column():
+        op.add_column(
+            "user",
+            sa.Column("token_version", sa.Integer(), nullable=False, server_default="0")
+        )
+
+
+def downgrade() -> None:
+    """
+    Downgrade migrations:
+    删除 token_version 列。
+    """
+    if _has_column():
+        with op.batch_alter_table("user") as batch_op:
+            batch_op.drop_column("token_version")
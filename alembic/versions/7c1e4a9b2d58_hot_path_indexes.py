@@ -0,0 +1,112 @@
+"""
+hot path indexes
+
+Revision ID: 7c1e4a9b2d58
+Revises: 3f6b2c9d1a47
+Create Date: 2026-10-19 14:02:47.513920
+
+Project   : MyBlog FastAPI System
+Author    : Gold Zheng
+Alembic   : Auto-generated by Alembic Migration System
+"""
+
+import logging
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# Revision identifiers, used by Alembic.
+revision: str = '7c1e4a9b2d58'
+down_revision: Union[str, None] = '3f6b2c9d1a47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+# (索引名, 表名, 列, 是否唯一)，与模型 __table_args__ 中的声明一致
+INDEXES = [
+    ("ix_comment_article_id_created_at", "comment", ["article_id", "created_at"], False),
+    ("ix_comment_parent_id", "comment", ["parent_id"], False),
+    ("uq_articletag_article_id_tag_id", "articletag", ["article_id", "tag_id"], True),
+    ("ix_articletag_tag_id_article_id", "articletag", ["tag_id", "article_id"], False),
+    ("ix_article_status_created_at", "article", ["status", "created_at"], False),
+    ("ix_article_created_at", "article", ["created_at"], False),
+    ("ix_article_author_id", "article", ["author_id"], False),
+    ("ix_donationrecord_payment_status_created_at", "donationrecord", ["payment_status", "created_at"], False),
+    ("ix_donationrecord_user_id_created_at", "donationrecord", ["user_id", "created_at"], False),
+    ("ix_donationrecord_transaction_id", "donationrecord", ["transaction_id"], False),
+    ("ix_mediafile_uploader_id_upload_time", "mediafile", ["uploader_id", "upload_time"], False),
+    ("uq_oauthaccount_provider_provider_user_id", "oauthaccount", ["provider", "provider_user_id"], True),
+    ("ix_oauthaccount_user_id_provider", "oauthaccount", ["user_id", "provider"], False),
+]
+
+# 建唯一索引前需要去重的表：(表名, 唯一索引的列)
+DEDUPE = [
+    ("articletag", ["article_id", "tag_id"]),
+    ("oauthaccount", ["provider", "provider_user_id"]),
+]
+
+
+def _dedupe(bind, table: str, columns: list) -> int:
+    """删除重复行，只保留 id 最小的一条；被删除的 id 写入迁移日志，返回删除的行数"""
+    duplicates = (
+        f"SELECT id FROM {table} WHERE id NOT IN "
+        f"(SELECT min(id) FROM {table} GROUP BY {', '.join(columns)})"
+    )
+    ids = [row[0] for row in bind.execute(sa.text(f"{duplicates} ORDER BY id"))]
+    if ids:
+        logger.warning(
+            f"{table} 中有 {len(ids)} 行 ({', '.join(columns)}) 重复，删除后只保留 id 最小的一条；"
+            f"删除的 id: {ids}"
+        )
+        bind.execute(sa.text(f"DELETE FROM {table} WHERE id IN ({duplicates})"))
+    return len(ids)
+
+
+def upgrade() -> None:
+    """
+    Upgrade migrations:
+    为评论、文章标签、文章列表、捐赠记录、媒体文件和 OAuth 绑定的常用过滤/连接列建立索引。
+    新库由 create_all 按模型建好索引，这里只补齐已有数据库（IF NOT EXISTS），不存在的表跳过。
+    PostgreSQL 在事务外 CONCURRENTLY 创建，不阻塞写入。
+
+    注意：会删除数据。建唯一索引前，articletag 中 (article_id, tag_id) 重复的行、
+    oauthaccount 中 (provider, provider_user_id) 重复的行被删除，每组只保留 id 最小的一条；
+    删除的行数和 id 以 WARNING 写入迁移日志，降级不会恢复。有重要数据时请先备份。
+    """
+    bind = op.get_bind()
+    tables = set(sa.inspect(bind).get_table_names())
+    for table, columns in DEDUPE:
+        if table in tables:
+            _dedupe(bind, table, columns)
+    indexes = [index for index in INDEXES if index[1] in tables]
+
+    if bind.dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            for name, table, columns, unique in indexes:
+                op.create_index(
+                    name, table, columns, unique=unique,
+                    if_not_exists=True, postgresql_concurrently=True
+                )
+    else:
+        for name, table, columns, unique in indexes:
+            op.create_index(name, table, columns, unique=unique, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """
+    Downgrade migrations:
+    删除上述索引（去重删除的行不恢复）。
+    """
+    bind = op.get_bind()
+    tables = set(sa.inspect(bind).get_table_names())
+    indexes = [index for index in reversed(INDEXES) if index[1] in tables]
+    if bind.dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            for name, table, _, _ in indexes:
+                op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
+    else:
+        for name, table, _, _ in indexes:
+            op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,82 @@
+"""
+related article tables
+
+Revision ID: 9a4d7e2c5f18
+Revises: 5d8e2f4a6b13
+Create Date: 2026-10-19 18:05:37.214906
+
+Project   : MyBlog FastAPI System
+Author    : Gold Zheng
+Alembic   : Auto-generated by Alembic Migration System
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# Revision identifiers, used by Alembic.
+revision: str = '9a4d7e2c5f18'
+down_revision: Union[str, None] = '5d8e2f4a6b13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _tables() -> set:
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+
+def upgrade() -> None:
+    """
+    Upgrade migrations:
+    相关文章的三张表：article_term_vector（稀疏词向量）、related_term_stats（IDF 快照）、
+    related_article（每篇文章的 top-k 邻居）。
+    article_term_vector 是派生数据，旧结构（没有 weighted 列）直接重建，启动时由 ensure_built 重新计算。
+    """
+    tables = _tables()
+    if "article_term_vector" in tables:
+        op.drop_table("article_term_vector")
+    op.create_table(
+        "article_term_vector",
+        sa.Column("article_id", sa.Integer(), nullable=False),
+        sa.Column("vector", sa.LargeBinary(), nullable=False),
+        sa.Column("weighted", sa.LargeBinary(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("article_id"),
+    )
+
+    if "related_term_stats" not in tables:
+        op.create_table(
+            "related_term_stats",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("document_count", sa.Integer(), nullable=False),
+            sa.Column("idf", sa.LargeBinary(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint("id"),
+        )
+
+    if "related_article" not in tables:
+        op.create_table(
+            "related_article",
+            sa.Column("article_id", sa.Integer(), nullable=False),
+            sa.Column("rank", sa.Integer(), nullable=False),
+            sa.Column("related_id", sa.Integer(), nullable=False),
+            sa.Column("score", sa.Float(), nullable=False),
+            sa.PrimaryKeyConstraint("article_id", "rank"),
+        )
+        op.create_index(op.f("ix_related_article_related_id"), "related_article", ["related_id"], unique=False)
+
+
+def downgrade() -> None:
+    """
+    Downgrade migrations:
+    删除相关文章的三张表。
+    """
+    tables = _tables()
+    if "related_article" in tables:
+        op.drop_index(op.f("ix_related_article_related_id"), table_name="related_article")
+        op.drop_table("related_article")
+    for table in ("related_term_stats", "article_term_vector"):
+        if table in tables:
+            op.drop_table(table)
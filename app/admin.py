@@ -0,0 +1,316 @@
+"""
+SQLAdmin 管理后台
+视图类在模块导入时定义一次，应用创建后调用 setup_admin 挂载，不在每个进程的 lifespan 中重复声明
+"""
+
+from fastapi import FastAPI, Request
+from sqladmin import Admin, ModelView
+from sqladmin.authentication import AuthenticationBackend
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.database import async_session, session_factory
+from app.core.deletion import deletion_service
+from app.core.search.result_cache import search_result_cache
+from app.core.search.suggest import suggestion_index
+from app.core.search.related import related_articles
+from app.core.security import verify_password
+from app.models.user import User, OAuthAccount, UserRole
+from app.models.article import Article
+from app.models.tag import Tag, ArticleTag
+from app.models.comment import Comment
+from app.models.media import MediaFile
+from app.models.system_notification import SystemNotification
+from app.models.donation import DonationConfig, DonationRecord, DonationGoal
+
+
+class AdminAuth(AuthenticationBackend):
+    async def authenticate(self, request: Request):
+        if request.session.get("user_id"):
+            async with async_session() as session:
+                user = await session.get(User, request.session["user_id"])
+                if user and user.role == UserRole.ADMIN:
+                    return True
+        return False
+
+    async def login(self, request: Request) -> bool:
+        form = await request.form()
+        username = str(form.get("username") or "")
+        password = str(form.get("password") or "")
+        
+        async with async_session() as session:
+            result = await session.execute(select(User).where(User.username == username))
+            user = result.scalar_one_or_none()
+            
+            if (
+                user and user.role == UserRole.ADMIN and user.is_active
+                and user.hashed_password
+                and verify_password(password, user.hashed_password)
+            ):
+                request.session["user_id"] = user.id
+                return True
+        return False
+
+    async def logout(self, request: Request) -> None:
+        request.session.pop("user_id", None)
+
+
+class UserAdmin(ModelView, model=User):
+    column_list = ["id", "username", "email", "role", "is_active", "created_at"]
+    form_columns = ["username", "email", "full_name", "role", "is_active", "oauth_provider", "oauth_id", "oauth_username", "avatar_url"]
+    can_create = True
+    can_edit = True
+    can_delete = True
+    can_view_details = True
+    name = "用户管理"
+    name_plural = "用户"
+    form_include_pk = False
+    form_widget_args = {
+        "hashed_password": {"readonly": True}
+    }
+
+    async def delete_model(self, request: Request, pk) -> bool:
+        """自定义删除方法，防止删除管理员用户；用户的文章、评论等按集合一次删除"""
+        async with async_session() as session:
+            try:
+                # 检查是否要删除管理员用户
+                result = await session.execute(
+                    select(User.username).where(User.id == int(pk), User.role == UserRole.ADMIN)
+                )
+                admin_username = result.scalar_one_or_none()
+                if admin_username:
+                    print(f"不能删除管理员用户: {admin_username}")
+                    return False
+
+                deleted = await deletion_service.delete_users(session, [pk])
+                print(f"删除用户 {pk}: {deleted.counts}")
+                await deletion_service.after_commit(session, deleted)
+                return True
+            except Exception as e:
+                print(f"删除用户失败: {e}")
+                return False
+
+class ArticleAdmin(ModelView, model=Article):
+    column_list = ["id", "title", "author_id", "status", "view_count", "created_at"]
+    form_columns = ["title", "content", "summary", "status", "author_id", "is_featured", "has_latex", "latex_content", "view_count"]
+    can_create = True
+    can_edit = True
+    can_delete = True
+    can_view_details = True
+    name = "文章管理"
+    name_plural = "文章"
+    form_include_pk = False
+
+    async def after_model_change(self, data: dict, model, is_created: bool, request: Request) -> None:
+        """后台新建/编辑文章后使搜索缓存失效，并更新搜索建议"""
+        await search_result_cache.bump_generation()
+        async with async_session() as session:
+            await suggestion_index.refresh_article(session, model.id)
+        await related_articles.refresh_in_background(model.id)
+
+    async def delete_model(self, request: Request, pk) -> bool:
+        """自定义删除方法，允许管理员删除所有文章（连同评论和标签关联）"""
+        async with async_session() as session:
+            try:
+                deleted = await deletion_service.delete_articles(session, [pk])
+                print(f"删除文章 {pk}: {deleted.counts}")
+                await deletion_service.after_commit(session, deleted)
+                return True
+            except Exception as e:
+                print(f"删除文章失败: {e}")
+                return False
+
+class TagAdmin(ModelView, model=Tag):
+    column_list = ["id", "name", "description", "created_at"]
+    form_columns = ["name", "description"]
+    can_create = True
+    can_edit = True
+    can_delete = True
+    can_view_details = True
+    name = "标签管理"
+    name_plural = "标签"
+    form_include_pk = False
+
+    async def after_model_change(self, data: dict, model, is_created: bool, request: Request) -> None:
+        async with async_session() as session:
+            await suggestion_index.refresh_tag(session, model.id)
+
+    async def delete_model(self, request: Request, pk) -> bool:
+        """删除标签及其文章关联"""
+        async with async_session() as session:
+            try:
+                deleted = await deletion_service.delete_tags(session, [pk])
+                print(f"删除标签 {pk}: {deleted.counts}")
+                await deletion_service.after_commit(session, deleted)
+                return True
+            except Exception as e:
+                print(f"删除标签失败: {e}")
+                return False
+
+class ArticleTagAdmin(ModelView, model=ArticleTag):
+    column_list = ["id", "article_id", "tag_id"]
+    can_create = True
+    can_edit = True
+    can_delete = True
+    can_view_details = True
+    name = "文章标签关联"
+    name_plural = "文章标签关联"
+    form_include_pk = False
+    form_excluded_columns = []
+
+    async def on_model_change(self, data: dict, model, is_created: bool, request: Request) -> None:
+        """同一篇文章的同一标签只能关联一次（唯一索引），在表单中提示而不是返回数据库错误"""
+        # 表单中的关联字段是主键字符串，编辑时未提交的字段沿用原值
+        article_id = int(data["article"]) if data.get("article") else model.article_id
+        tag_id = int(data["tag"]) if data.get("tag") else model.tag_id
+        if article_id is None or tag_id is None:
+            return
+        stmt = select(ArticleTag.id).where(ArticleTag.article_id == article_id, ArticleTag.tag_id == tag_id)
+        if model.id is not None:
+            stmt = stmt.where(ArticleTag.id != model.id)
+        async with async_session() as session:
+            if (await session.execute(stmt)).first() is not None:
+                raise ValueError("该文章已关联此标签")
+
+class CommentAdmin(ModelView, model=Comment):
+    column_list = ["id", "article_id", "author_id", "content", "created_at", "is_approved"]
+    form_columns = ["article_id", "author_id", "content", "parent_id", "is_approved"]
+    can_create = True
+    can_edit = True
+    can_delete = True
+    can_view_details = True
+    name = "评论管理"
+    name_plural = "评论"
+    form_include_pk = False
+
+    async def delete_model(self, request: Request, pk) -> bool:
+        """自定义删除方法，删除评论时也删除其下全部回复"""
+        async with async_session() as session:
+            try:
+                deleted = await deletion_service.delete_comments(session, [pk])
+                print(f"删除评论 {pk}: {deleted.counts}")
+                return True
+            except Exception as e:
+                print(f"删除评论失败: {e}")
+                return False
+
+class MediaFileAdmin(ModelView, model=MediaFile):
+    column_list = ["id", "filename", "type", "url", "size", "upload_time", "description", "uploader_id", "uploader"]
+    column_formatters = {
+        "uploader": lambda m, p: m.uploader.username if m.uploader else ""
+    }
+    can_create = True
+    can_edit = True
+    can_delete = True
+    can_view_details = True
+    name = "多媒体文件"
+    name_plural = "多媒体文件"
+
+class OAuthAccountAdmin(ModelView, model=OAuthAccount):
+    column_list = ["id", "user_id", "provider", "provider_user_id", "provider_username", "created_at", "updated_at"]
+    form_columns = ["user_id", "provider", "provider_user_id", "provider_username", "provider_email", "provider_avatar_url"]
+    can_create = True
+    can_edit = True
+    can_delete = True
+    can_view_details = True
+    name = "OAuth账号绑定"
+    name_plural = "OAuth账号绑定"
+    form_include_pk = False
+
+class SystemNotificationAdmin(ModelView, model=SystemNotification):
+    column_list = ["id", "title", "message", "notification_type", "created_at", "is_sent", "admin_id"]
+    form_columns = ["title", "message", "notification_type", "is_sent", "admin_id"]
+    can_create = True
+    can_edit = True
+    can_delete = True
+    can_view_details = True
+    name = "系统通知"
+    name_plural = "系统通知"
+    form_include_pk = False
+
+    async def is_accessible(self, request):
+        # 只有管理员能访问
+        user_id = request.session.get("user_id")
+        if not user_id:
+            return False
+        async with async_session() as session:
+            user = await session.get(User, user_id)
+            return user and user.role == UserRole.ADMIN
+
+    async def insert_model(self, request, data):
+        # 自动填充 admin_id 字段
+        user_id = request.session.get("user_id")
+        if user_id:
+            data["admin_id"] = user_id
+        return await super().insert_model(request, data)
+
+class DonationConfigAdmin(ModelView, model=DonationConfig):
+    column_list = [
+        "id", "is_enabled", "title", "description", "alipay_enabled", "wechat_enabled", "paypal_enabled", "preset_amounts", "created_at", "updated_at"
+    ]
+    form_columns = [
+        "is_enabled", "title", "description", "alipay_enabled", "wechat_enabled", "paypal_enabled", "preset_amounts"
+    ]
+    can_create = True
+    can_edit = True
+    can_delete = True
+    can_view_details = True
+    name = "捐赠配置"
+    name_plural = "捐赠配置"
+    form_include_pk = False
+
+class DonationRecordAdmin(ModelView, model=DonationRecord):
+    column_list = [
+        "id", "donor_name", "donor_email", "donor_message", "is_anonymous", "amount", "currency", "payment_method", "payment_status", "transaction_id", "user_id", "goal_id", "created_at", "updated_at", "paid_at"
+    ]
+    form_columns = [
+        "donor_name", "donor_email", "donor_message", "is_anonymous", "amount", "currency", "payment_method", "payment_status", "transaction_id", "user_id", "goal_id", "paid_at"
+    ]
+    can_create = True
+    can_edit = True
+    can_delete = True
+    can_view_details = True
+    name = "捐赠记录"
+    name_plural = "捐赠记录"
+    form_include_pk = False
+
+class DonationGoalAdmin(ModelView, model=DonationGoal):
+    column_list = ["id", "title", "description", "target_amount", "current_amount", "currency", "start_date", "end_date", "is_active", "is_completed", "created_at", "updated_at"]
+    form_columns = ["title", "description", "target_amount", "current_amount", "currency", "start_date", "end_date", "is_active"]
+    can_create = True
+    can_edit = True
+    can_delete = True
+    can_view_details = True
+    name = "捐赠目标"
+    name_plural = "捐赠目标"
+    form_include_pk = False
+
+
+ADMIN_VIEWS = [
+    UserAdmin,
+    OAuthAccountAdmin,
+    ArticleAdmin,
+    TagAdmin,
+    ArticleTagAdmin,
+    CommentAdmin,
+    MediaFileAdmin,
+    SystemNotificationAdmin,
+    DonationConfigAdmin,
+    DonationRecordAdmin,
+    DonationGoalAdmin,
+]
+
+
+def setup_admin(app: FastAPI, base_url: str) -> Admin:
+    """挂载管理后台（单独的会话工厂，SQLAdmin 会修改其 autoflush 配置）"""
+    admin = Admin(
+        app, 
+        session_maker=session_factory(), 
+        authentication_backend=AdminAuth(secret_key=settings.secret_key), 
+        base_url=base_url,
+        title="博客管理系统",
+        logo_url="https://preview.tabler.io/static/logo-white.svg"
+    )
+    for view in ADMIN_VIEWS:
+        admin.add_view(view)
+    return admin
@@ -2,25 +2,32 @@ import os
 import uuid
 from datetime import datetime
 from typing import List, Optional, Annotated
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, BackgroundTasks, Query
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, BackgroundTasks, Query, Request
 from fastapi.responses import FileResponse, JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update, delete
 from sqlalchemy.orm import selectinload
-import re
 
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
 from app.core.exceptions import NotFoundError, AuthorizationError
 from app.core.security import get_current_user
 from app.core.tasks import add_comment_notification_task
-from app.core.latex import latex_renderer
+from app.core.latex import latex_renderer, latex_render_service
+from app.core.latex_tokenizer import contains_math
+from app.core.article_renderer import article_html_service
+from app.core.search import FTSSearch
+from app.core.search.result_cache import search_result_cache
+from app.core.search.suggest import suggestion_index
+from app.core.search.related import related_articles
+from app.core.deletion import deletion_service
+from app.core.view_counter import view_counter
 from app.models.user import User, UserRole
 from app.models.article import Article, ArticleStatus
 from app.models.comment import Comment
 from app.models.tag import Tag, ArticleTag
 from app.schemas.article import (
     ArticleCreate, ArticleUpdate, ArticleResponse, ArticleListResponse,
-    ArticleDetailResponse, CommentCreate, CommentResponse
+    ArticleDetailResponse, CommentCreate, CommentResponse, LatexPreviewBatchRequest
 )
 from app.core.config import settings
 from app.models.media import MediaFile, MediaType
@@ -122,15 +129,25 @@ async def get_image(filename: str):
     return FileResponse(file_path)
 
 
+@router.get("/latex/stats")
+async def get_latex_render_stats():
+    """LaTeX渲染队列与缓存命中统计"""
+    return latex_render_service.stats()
+
+
 @router.get("/latex/{filename}")
 async def get_latex_image(filename: str):
     """获取LaTeX渲染的图片文件"""
     file_path = get_file_path(filename, LATEX_DIR)
     if not os.path.exists(file_path):
-        raise HTTPException(status_code=404, detail="LaTeX image not found")
+        # 文章内容中保存的图片可能已被缓存淘汰，按公式源码重新渲染
+        restored = await latex_render_service.restore(filename)
+        if restored is None:
+            raise HTTPException(status_code=404, detail="LaTeX image not found")
+        file_path = str(restored)
     
     # 检查文件类型
-    if filename.endswith('.svg'):
+    if file_path.endswith('.svg'):
         return FileResponse(file_path, media_type="image/svg+xml")
     else:
         return FileResponse(file_path)
@@ -138,6 +155,7 @@ async def get_latex_image(filename: str):
 
 @router.post("/latex/preview")
 async def preview_latex(
+    request: Request,
     latex_content: str = Form(...),
     block_type: str = Form(default="block")
 ):
@@ -147,8 +165,8 @@ async def preview_latex(
     if not is_valid:
         raise HTTPException(status_code=400, detail=message)
     
-    # 渲染LaTeX
-    image_url = latex_renderer.render_latex_to_image(latex_content, block_type)
+    # 渲染LaTeX（异步渲染服务，队列满时返回503，客户端断开时取消）
+    image_url = await latex_render_service.render_for_request(request, latex_content, block_type)
     if not image_url:
         raise HTTPException(status_code=500, detail="LaTeX渲染失败")
     
@@ -159,6 +177,57 @@ async def preview_latex(
     }
 
 
+@router.post("/latex/preview/batch")
+async def preview_latex_batch(batch: LatexPreviewBatchRequest):
+    """批量预览LaTeX内容
+    
+    相同的公式只渲染一次，所有公式并发渲染；超出时间预算的公式返回 timeout，
+    其余结果照常返回。结果按请求中的下标索引。
+    """
+    if len(batch.formulas) > settings.latex_batch_max_items:
+        raise HTTPException(
+            status_code=400,
+            detail=f"单次最多预览 {settings.latex_batch_max_items} 个公式"
+        )
+    
+    results = {}
+    unique_formulas = {}  # (latex_content, block_type) -> 请求中的下标列表
+    for index, item in enumerate(batch.formulas):
+        is_valid, message = latex_renderer.validate_latex(item.latex_content)
+        if not is_valid:
+            results[index] = {
+                "status": "invalid",
+                "image_url": None,
+                "message": message,
+                "latex_content": item.latex_content,
+                "block_type": item.block_type
+            }
+            continue
+        unique_formulas.setdefault((item.latex_content, item.block_type), []).append(index)
+    
+    time_budget = min(batch.timeout or settings.latex_batch_timeout, settings.latex_batch_timeout)
+    rendered = await latex_render_service.render_batch(list(unique_formulas), time_budget)
+    
+    for (latex_content, block_type), indices in unique_formulas.items():
+        for index in indices:
+            results[index] = {
+                **rendered[(latex_content, block_type)],
+                "latex_content": latex_content,
+                "block_type": block_type
+            }
+    
+    status_counts = {}
+    for result in results.values():
+        status_counts[result["status"]] = status_counts.get(result["status"], 0) + 1
+    
+    return {
+        "results": dict(sorted(results.items())),
+        "count": len(batch.formulas),
+        "unique_count": len(unique_formulas),
+        "status_counts": status_counts
+    }
+
+
 @router.post("/latex/validate")
 async def validate_latex(latex_content: str = Form(...)):
     """验证LaTeX语法"""
@@ -229,7 +298,7 @@ async def create_comment(
 @router.get("/{article_id}/comments", response_model=List[CommentResponse])
 async def get_article_comments(
     article_id: int,
-    db: Annotated[AsyncSession, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
     skip: int = 0,
     limit: int = 50
 ):
@@ -265,17 +334,17 @@ async def delete_comment(
     if comment.author_id != current_user.id and current_user.role != UserRole.ADMIN:
         raise AuthorizationError("You can only delete your own comments")
     
-    # 删除评论
-    await db.execute(delete(Comment).where(Comment.id == comment_id))
-    await db.commit()
+    # 删除评论及其全部回复
+    deleted = await deletion_service.delete_comments(db, [comment_id])
     
-    return {"message": "Comment deleted successfully"}
+    return {"message": "Comment deleted successfully", "deleted": deleted.counts}
 
 
 @router.post("/", response_model=ArticleResponse)
 async def create_article(
     article_data: ArticleCreate,
     current_user: Annotated[User, Depends(get_current_user)],
+    background_tasks: BackgroundTasks,
     db: Annotated[AsyncSession, Depends(get_db)]
 ):
     """创建文章"""
@@ -283,19 +352,9 @@ async def create_article(
     has_latex = False
     latex_content = None
     
-    # 简单的LaTeX检测
+    # LaTeX检测（与渲染共用同一个单遍分词器）
     if article_data.content:
-        latex_patterns = [
-            r'\$[^$]+\$',  # 行内公式
-            r'\$\$[^$]+\$\$',  # 块级公式
-            r'\\\([^)]+\\\)',  # 行内公式
-            r'\\\[[^\]]+\\\]',  # 块级公式
-        ]
-        
-        for pattern in latex_patterns:
-            if re.search(pattern, article_data.content):
-                has_latex = True
-                break
+        has_latex = contains_math(article_data.content)
     
     # 创建文章（直接使用原始内容，不进行LaTeX处理）
     db_article = Article(
@@ -314,7 +373,8 @@ async def create_article(
     
     # 处理标签
     if article_data.tags:
-        for tag_name in article_data.tags:
+        # 同一标签只关联一次（article_id, tag_id 有唯一索引），保持提交时的顺序
+        for tag_name in dict.fromkeys(article_data.tags):
             # 查找或创建标签
             result = await db.execute(select(Tag).where(Tag.name == tag_name))
             tag = result.scalar_one_or_none()
@@ -331,6 +391,11 @@ async def create_article(
         
         await db.commit()
     
+    # 新文章进入索引，搜索缓存失效，搜索建议增加标题和标签
+    await search_result_cache.bump_generation()
+    await suggestion_index.refresh_article(db, db_article.id)
+    background_tasks.add_task(related_articles.refresh_in_background, db_article.id)
+    
     # 重新加载文章及其标签
     result = await db.execute(
         select(Article)
@@ -342,6 +407,9 @@ async def create_article(
     )
     article_with_relations = result.scalar_one()
     
+    # 预渲染文章HTML（后台执行，不影响保存耗时）
+    background_tasks.add_task(article_html_service.prerender, article_with_relations.content)
+    
     # 组装 ArticleResponse 所需的 author/tags 字段
     from app.schemas.article import UserBasicInfo, TagInfo
     author_info = UserBasicInfo.model_validate(article_with_relations.author)
@@ -362,7 +430,7 @@ async def create_article(
 
 @router.get("/", response_model=List[ArticleListResponse])
 async def list_articles(
-    db: Annotated[AsyncSession, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
     skip: int = 0,
     limit: int = 10,
     status: Optional[ArticleStatus] = None,
@@ -382,10 +450,7 @@ async def list_articles(
         query = query.where(Article.status == status)
     
     if search:
-        query = query.where(
-            Article.title.contains(search) | 
-            Article.content.contains(search)
-        )
+        query = query.where(FTSSearch.substring_filter(search))
     
     if tag:
         query = query.join(ArticleTag).join(Tag).where(Tag.name == tag)
@@ -424,10 +489,24 @@ async def list_articles(
     return article_responses
 
 
+@router.get("/{article_id}/related", response_model=List[ArticleListResponse])
+async def get_related_articles(
+    article_id: int,
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    limit: int = Query(5, ge=1, le=20, description="返回数量")
+):
+    """获取相关文章（预先计算的正文相似度 + 标签重合度 top-k）"""
+    result = await db.execute(select(Article.id).where(Article.id == article_id))
+    if result.scalar_one_or_none() is None:
+        raise NotFoundError("Article not found")
+    return await related_articles.get_related(db, article_id, limit)
+
+
 @router.get("/{article_id}", response_model=ArticleDetailResponse)
 async def get_article(
     article_id: int,
-    db: Annotated[AsyncSession, Depends(get_db)]
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    include_html: bool = Query(False, description="是否返回服务端预渲染的HTML、目录和阅读时长")
 ):
     """获取文章详情"""
     result = await db.execute(
@@ -442,10 +521,8 @@ async def get_article(
     if not article:
         raise NotFoundError("Article not found")
     
-    # 访问时自增view_count
-    article.view_count = (article.view_count or 0) + 1
-    await db.commit()
-    await db.refresh(article)
+    # 浏览量先在内存中累计，由后台定期写入主库；本请求只读，不占用写连接
+    view_count = (article.view_count or 0) + view_counter.hit(article.id)
     
     # 手动构建响应，避免ORM序列化问题
     from app.schemas.article import UserBasicInfo, TagInfo, CommentBasicInfo
@@ -465,6 +542,11 @@ async def get_article(
         )
         comment_infos.append(comment_info)
     
+    # 预渲染HTML（按内容哈希缓存，未命中时现场渲染）
+    rendered = {}
+    if include_html:
+        rendered = await article_html_service.get_or_render(article.content)
+    
     return ArticleDetailResponse(
         id=article.id,
         title=article.title,
@@ -476,7 +558,10 @@ async def get_article(
         comments=comment_infos,
         created_at=article.created_at,
         updated_at=article.updated_at,
-        view_count=getattr(article, 'view_count', 0)
+        view_count=view_count,
+        content_html=rendered.get("content_html"),
+        toc=rendered.get("toc"),
+        reading_time=rendered.get("reading_time")
     )
 
 
@@ -485,6 +570,7 @@ async def update_article(
     article_id: int,
     article_data: ArticleUpdate,
     current_user: Annotated[User, Depends(get_current_user)],
+    background_tasks: BackgroundTasks,
     db: Annotated[AsyncSession, Depends(get_db)]
 ):
     """更新文章"""
@@ -511,7 +597,7 @@ async def update_article(
             has_latex = True
             latex_content = article_data.latex_content
             # 处理LaTeX内容
-            processed_content, latex_blocks = latex_renderer.process_content(article_data.content)
+            processed_content, latex_blocks = await latex_render_service.process_content(article_data.content)
         
         update_data['content'] = processed_content
         update_data['has_latex'] = has_latex
@@ -529,8 +615,8 @@ async def update_article(
         # 删除现有标签关联
         await db.execute(delete(ArticleTag).where(ArticleTag.article_id == article_id))
         
-        # 添加新标签
-        for tag_name in article_data.tags:
+        # 添加新标签（重复的标签名只关联一次）
+        for tag_name in dict.fromkeys(article_data.tags):
             result = await db.execute(select(Tag).where(Tag.name == tag_name))
             tag = result.scalar_one_or_none()
             
@@ -544,6 +630,9 @@ async def update_article(
             db.add(article_tag)
     
     await db.commit()
+    await search_result_cache.bump_generation()
+    await suggestion_index.refresh_article(db, article_id)
+    background_tasks.add_task(related_articles.refresh_in_background, article_id)
     
     # 返回更新后的文章
     result = await db.execute(
@@ -554,6 +643,10 @@ async def update_article(
     )
     updated_article = result.scalar_one()
     
+    # 内容有变化时预渲染新版本的HTML
+    if article_data.content is not None:
+        background_tasks.add_task(article_html_service.prerender, updated_article.content)
+    
     # 手动构建响应，避免ORM序列化问题
     from app.schemas.article import UserBasicInfo, TagInfo
     author_info = UserBasicInfo.model_validate(updated_article.author)
@@ -575,6 +668,7 @@ async def update_article(
 @router.delete("/{article_id}")
 async def delete_article(
     article_id: int,
+    background_tasks: BackgroundTasks,
     current_user: Annotated[User, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)]
 ):
@@ -589,14 +683,11 @@ async def delete_article(
     if article.author_id != current_user.id and current_user.role != UserRole.ADMIN:
         raise AuthorizationError("You can only delete your own articles")
     
-    # 删除文章标签关联
-    await db.execute(delete(ArticleTag).where(ArticleTag.article_id == article_id))
-    
-    # 删除文章
-    await db.execute(delete(Article).where(Article.id == article_id))
-    await db.commit()
+    # 删除文章及其评论、标签关联，提交后同步搜索索引
+    deleted = await deletion_service.delete_articles(db, [article_id])
+    await deletion_service.after_commit(db, deleted, background_tasks)
     
-    return {"message": "Article deleted successfully"}
+    return {"message": "Article deleted successfully", "deleted": deleted.counts}
 
 
 @router.post("/upload-video", response_model=dict)
@@ -720,7 +811,7 @@ async def get_pdf(filename: str):
 
 
 @router.get("/media/list", response_model=List[dict])
-async def list_media_files(uploader_id: int = Query(None), db: Annotated[AsyncSession, Depends(get_db)] = None):
+async def list_media_files(uploader_id: int = Query(None), db: Annotated[AsyncSession, Depends(get_read_db)] = None):
     from app.models.media import MediaFile
     from sqlalchemy import select
     query = select(MediaFile).options(selectinload(MediaFile.uploader))
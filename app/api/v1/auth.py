@@ -1,21 +1,24 @@
 from datetime import timedelta
 from typing import Annotated
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Query
+from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.core.database import get_db
-from app.core.security import verify_password, get_password_hash, create_access_token, create_refresh_token, create_password_reset_token, verify_token
+from app.core.security import verify_password, get_password_hash, create_password_reset_token, verify_token
 from app.core.redis import redis_manager
+from app.core.token_revocation import token_revocation
+from app.core.refresh_sessions import refresh_sessions
 from app.core.exceptions import AuthenticationError, ConflictError
 from app.core.tasks import add_welcome_email_task, add_password_reset_email_task, add_verification_code_email_task
 from app.models.user import User, UserCreate, UserRole
 from app.schemas.auth import Token, LoginRequest, RefreshTokenRequest, LogoutRequest
 from fastapi import Depends
 from app.api.deps import get_current_user
-from app.core.config import settings
+from app.core.config import settings, settings_store
 from app.core.email import email_service
 import random
 import string
+import time
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
@@ -106,15 +109,11 @@ async def get_auth_config():
     """
     获取认证相关配置信息
     """
-    # 重新加载配置以确保获取最新的EMAIL_ENABLED状态
-    from app.core.config import reload_settings
-    reload_settings()
-    from app.core.config import settings
-    
-    return {
+    # 按配置版本缓存，.env 修改后自动更新
+    return settings_store.payload("auth_config", lambda settings: {
         "email_enabled": settings.email_enabled,
         "oauth_enabled": bool(settings.github_client_id or settings.google_client_id)
-    }
+    })
 
 @router.get("/me")
 async def get_me(
@@ -128,8 +127,8 @@ async def get_me(
     try:
         # 从数据库获取完整的用户信息
         user_id = current_user.get("user_id") if isinstance(current_user, dict) else current_user.id
-        result = await db.execute(select(User).where(User.id == user_id))
-        user = result.scalar_one_or_none()
+        # 认证中间件已在本请求的会话中加载该用户，get 直接命中标识映射，不再查询
+        user = await db.get(User, user_id)
         
         if not user:
             raise AuthenticationError("User not found")
@@ -156,6 +155,7 @@ async def get_me(
 
 @router.post("/register", response_model=Token)
 async def register(
+    request: Request,
     user_data: UserCreate,
     db: Annotated[AsyncSession, Depends(get_db)],
     background_tasks: BackgroundTasks
@@ -198,33 +198,18 @@ async def register(
     await db.commit()
     await db.refresh(db_user)
     
-    # Create tokens
-    access_token = create_access_token(
-        data={"sub": db_user.username, "user_id": db_user.id, "role": db_user.role.value}
-    )
-    refresh_token = create_refresh_token(
-        data={"sub": db_user.username, "user_id": db_user.id}
-    )
-    
-    # Store refresh token in Redis
-    await redis_manager.set(
-        f"refresh_token:{db_user.id}:{refresh_token}",
-        "valid",
-        expire=7 * 24 * 60 * 60  # 7 days
-    )
+    # Create tokens（新建会话，刷新令牌记录在用户的会话哈希中）
+    tokens = await refresh_sessions.issue(db_user, request.headers.get("user-agent"))
     
     # Add welcome email task to background tasks
     add_welcome_email_task(background_tasks, db_user.email, db_user.username)
     
-    return Token(
-        access_token=access_token,
-        refresh_token=refresh_token,
-        token_type="bearer"
-    )
+    return Token(**tokens)
 
 
 @router.post("/login", response_model=Token)
 async def login(
+    request: Request,
     login_data: LoginRequest,
     db: Annotated[AsyncSession, Depends(get_db)]
 ):
@@ -239,30 +224,15 @@ async def login(
     if not user.is_active:
         raise AuthenticationError("Inactive user")
     
-    # Create tokens
-    access_token = create_access_token(
-        data={"sub": user.username, "user_id": user.id, "role": user.role.value}
-    )
-    refresh_token = create_refresh_token(
-        data={"sub": user.username, "user_id": user.id}
-    )
-    
-    # Store refresh token in Redis
-    await redis_manager.set(
-        f"refresh_token:{user.id}:{refresh_token}",
-        "valid",
-        expire=7 * 24 * 60 * 60  # 7 days
-    )
+    # Create tokens（新建会话，刷新令牌记录在用户的会话哈希中）
+    tokens = await refresh_sessions.issue(user, request.headers.get("user-agent"))
     
-    return Token(
-        access_token=access_token,
-        refresh_token=refresh_token,
-        token_type="bearer"
-    )
+    return Token(**tokens)
 
 
 @router.post("/refresh", response_model=Token)
 async def refresh_token(
+    request: Request,
     refresh_data: RefreshTokenRequest,
     db: Annotated[AsyncSession, Depends(get_db)]
 ):
@@ -273,49 +243,86 @@ async def refresh_token(
         raise AuthenticationError("Invalid refresh token")
     
     user_id = payload.get("user_id")
-    username = payload.get("sub")
-    # 多端：校验refresh_token:{user_id}:{refresh_token}
-    exists = await redis_manager.exists(f"refresh_token:{user_id}:{refresh_data.refresh_token}")
-    if not exists:
-        raise AuthenticationError("Invalid refresh token")
     # Get user
     result = await db.execute(select(User).where(User.id == user_id))
     user = result.scalar_one_or_none()
     if not user or not user.is_active:
         raise AuthenticationError("User not found or inactive")
-    # Create new tokens
-    access_token = create_access_token(
-        data={"sub": user.username, "user_id": user.id, "role": user.role.value}
-    )
-    new_refresh_token = create_refresh_token(
-        data={"sub": user.username, "user_id": user.id}
-    )
-    # 多端：存储新refresh token，不删除旧的
-    await redis_manager.set(
-        f"refresh_token:{user.id}:{new_refresh_token}",
-        "valid",
-        expire=7 * 24 * 60 * 60
-    )
-    return Token(
-        access_token=access_token,
-        refresh_token=new_refresh_token,
-        token_type="bearer"
+    if not await token_revocation.is_valid(refresh_data.refresh_token, payload, user):
+        raise AuthenticationError("Refresh token has been revoked")
+    # 轮换：旧刷新令牌立即失效；再次提交旧令牌视为重放，整个会话被吊销
+    tokens = await refresh_sessions.rotate(
+        refresh_data.refresh_token, payload, user, request.headers.get("user-agent")
     )
+    return Token(**tokens)
 
 
 @router.post("/logout")
 async def logout(logout_data: LogoutRequest):
-    """Logout user and blacklist token"""
-    # Add access token to blacklist
-    await redis_manager.set(
-        f"blacklist:{logout_data.access_token}",
-        "revoked",
-        expire=30 * 60  # 30 minutes (access token lifetime)
-    )
+    """Logout user and revoke the access token until it expires"""
+    payload = verify_token(logout_data.access_token)
+    if payload and payload.get("jti"):
+        await token_revocation.revoke_token(payload)
+        # 同时结束该令牌所属的会话，对应的刷新令牌不能再使用
+        if payload.get("fid"):
+            await refresh_sessions.revoke(payload["user_id"], payload["fid"])
+    elif payload:
+        # 旧令牌（无 jti）：写入黑名单，保留到令牌过期
+        remaining = int(payload["exp"] - time.time())
+        if remaining > 0:
+            await redis_manager.set(f"blacklist:{logout_data.access_token}", "revoked", expire=remaining)
     
     return {"message": "Successfully logged out"}
 
 
+@router.post("/logout-all")
+async def logout_all(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    current_user: User = Depends(get_current_user)
+):
+    """退出所有设备：该用户已签发的访问令牌和刷新令牌全部失效"""
+    if not current_user:
+        raise AuthenticationError("Not authenticated")
+    await token_revocation.revoke_user(db, current_user.id)
+    await refresh_sessions.revoke_all(current_user.id)
+    return {"message": "Logged out from all devices"}
+
+
+def _current_session_id(request: Request):
+    """当前访问令牌所属的会话（令牌族）ID"""
+    auth_header = request.headers.get("Authorization", "")
+    payload = verify_token(auth_header.split(" ")[-1]) if auth_header.startswith("Bearer ") else None
+    return payload.get("fid") if payload else None
+
+
+@router.get("/sessions")
+async def list_sessions(
+    request: Request,
+    current_user: User = Depends(get_current_user)
+):
+    """当前用户已登录的设备，按最近使用时间倒序"""
+    if not current_user:
+        raise AuthenticationError("Not authenticated")
+    current = _current_session_id(request)
+    sessions = await refresh_sessions.list_sessions(current_user.id)
+    for session in sessions:
+        session["current"] = session["id"] == current
+    return {"sessions": sessions}
+
+
+@router.delete("/sessions/{session_id}")
+async def revoke_session(
+    session_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """退出指定设备：该会话的刷新令牌和最近的访问令牌立即失效"""
+    if not current_user:
+        raise AuthenticationError("Not authenticated")
+    if not await refresh_sessions.revoke(current_user.id, session_id):
+        raise HTTPException(status_code=404, detail="Session not found")
+    return {"message": "Session revoked"}
+
+
 class ForgotPasswordRequest(BaseModel):
     email: str
 
@@ -374,8 +381,7 @@ async def change_password(
     """Change password for logged-in user"""
     # Get user from database
     user_id = current_user["user_id"] if isinstance(current_user, dict) else current_user.id
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
+    user = await db.get(User, user_id)  # 命中请求级会话的标识映射
     
     if not user:
         raise AuthenticationError("User not found")
@@ -457,9 +463,11 @@ async def reset_password(
     if not user or not user.is_active:
         raise AuthenticationError("User not found or inactive")
     
-    # Update password
+    # Update password，并吊销该用户已签发的全部令牌
     user.hashed_password = get_password_hash(reset_data.new_password)
+    user.token_version = (user.token_version or 0) + 1
     await db.commit()
+    await refresh_sessions.revoke_all(user.id)
     
     # Remove reset token from Redis
     await redis_manager.delete(f"password_reset:{user_id}")
@@ -1,5 +1,7 @@
 from fastapi import APIRouter, HTTPException, Depends, Query
-from app.core.config import settings, reload_settings
+from app.core.config import Settings, settings_store
+from app.core.config_sync import config_sync
+from app.core.security import require_admin
 from typing import Dict, Any, Optional
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -14,14 +16,8 @@ from sqlalchemy.future import select
 
 router = APIRouter(prefix="/config", tags=["config"])
 
-@router.get("/")
-async def get_config() -> Dict[str, Any]:
-    """
-    获取所有配置信息（敏感信息会被隐藏）
-    """
-    # 重新加载配置以确保获取最新状态
-    reload_settings()
-    
+def _public_config(settings: Settings) -> Dict[str, Any]:
+    """全部配置信息（敏感信息会被隐藏）"""
     return {
         # 应用设置
         "app_name": settings.app_name,
@@ -72,14 +68,7 @@ async def get_config() -> Dict[str, Any]:
         "enable_notification_push": settings.enable_notification_push,
     }
 
-@router.get("/auth")
-async def get_auth_config() -> Dict[str, Any]:
-    """
-    获取认证相关配置信息（兼容旧版本）
-    """
-    # 重新加载配置以确保获取最新状态
-    reload_settings()
-    
+def _auth_config(settings: Settings) -> Dict[str, Any]:
     return {
         "email_enabled": settings.email_enabled,
         "oauth_enabled": bool(settings.github_client_id or settings.google_client_id),
@@ -87,14 +76,7 @@ async def get_auth_config() -> Dict[str, Any]:
         "google_oauth_enabled": bool(settings.google_client_id and settings.google_client_secret),
     }
 
-@router.get("/oauth")
-async def get_oauth_config() -> Dict[str, Any]:
-    """
-    获取OAuth相关配置信息
-    """
-    # 重新加载配置以确保获取最新状态
-    reload_settings()
-    
+def _oauth_config(settings: Settings) -> Dict[str, Any]:
     return {
         "github_enabled": bool(settings.github_client_id and settings.github_client_secret),
         "google_enabled": bool(settings.google_client_id and settings.google_client_secret),
@@ -102,14 +84,50 @@ async def get_oauth_config() -> Dict[str, Any]:
         "frontend_url": settings.frontend_url,
     }
 
+def _config_health(settings: Settings) -> Dict[str, Any]:
+    return {
+        "status": "healthy",
+        "config_loaded": True,
+        "config_version": settings_store.version,
+        "email_enabled": settings.email_enabled,
+        "oauth_enabled": bool(settings.github_client_id or settings.google_client_id),
+        "database_configured": bool(settings.database_url),
+        "redis_configured": bool(settings.redis_url),
+    }
+
+# 以下接口的响应按配置版本缓存：.env 修改或管理员重新加载后才重新构建
+
+@router.get("/")
+async def get_config() -> Dict[str, Any]:
+    """
+    获取所有配置信息（敏感信息会被隐藏）
+    """
+    return settings_store.payload("config", _public_config)
+
+@router.get("/auth")
+async def get_auth_config() -> Dict[str, Any]:
+    """
+    获取认证相关配置信息（兼容旧版本）
+    """
+    return settings_store.payload("config_auth", _auth_config)
+
+@router.get("/oauth")
+async def get_oauth_config() -> Dict[str, Any]:
+    """
+    获取OAuth相关配置信息
+    """
+    return settings_store.payload("config_oauth", _oauth_config)
+
 @router.post("/reload")
-async def reload_config() -> Dict[str, str]:
+async def reload_config(
+    current_user: User = Depends(require_admin)
+) -> Dict[str, Any]:
     """
-    手动重新加载配置
+    手动重新加载配置（管理员），并通知其他 worker 重新加载
     """
     try:
-        reload_settings()
-        return {"message": "Configuration reloaded successfully"}
+        version = await config_sync.reload_all()
+        return {"message": "Configuration reloaded successfully", "version": version}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to reload configuration: {str(e)}")
 
@@ -118,17 +136,7 @@ async def config_health() -> Dict[str, Any]:
     """
     配置健康检查
     """
-    # 重新加载配置以确保获取最新状态
-    reload_settings()
-    
-    return {
-        "status": "healthy",
-        "config_loaded": True,
-        "email_enabled": settings.email_enabled,
-        "oauth_enabled": bool(settings.github_client_id or settings.google_client_id),
-        "database_configured": bool(settings.database_url),
-        "redis_configured": bool(settings.redis_url),
-    }
+    return settings_store.payload("config_health", _config_health)
 
 @router.get("/statistics")
 async def get_statistics(
@@ -116,7 +116,7 @@ async def github_callback(
         )
         
         # Create JWT tokens
-        tokens = await OAuthService.create_oauth_tokens(user)
+        tokens = await OAuthService.create_oauth_tokens(user, request.headers.get("user-agent"))
         
         # Redirect to frontend with tokens
         frontend_url = settings.frontend_url or "http://localhost:3000"
@@ -169,7 +169,7 @@ async def google_callback(
         )
         
         # Create JWT tokens
-        tokens = await OAuthService.create_oauth_tokens(user)
+        tokens = await OAuthService.create_oauth_tokens(user, request.headers.get("user-agent"))
         
         # Redirect to frontend with tokens
         frontend_url = settings.frontend_url or "http://localhost:3000"
@@ -1,53 +1,129 @@
-from typing import List, Optional, Annotated
-from fastapi import APIRouter, Depends, Query
+from typing import List, Optional, Annotated, Union
+from fastapi import APIRouter, Depends, Query, Request, Response, BackgroundTasks
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import text, select
-from sqlalchemy.orm import selectinload
+from sqlalchemy import text, select, func
 
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import get_db, get_read_db
 from app.core.search import FTSSearch
-from app.schemas.article import ArticleListResponse
-from app.models.article import ArticleStatus
+from app.core.search import index_meta
+from app.core.search.result_cache import search_result_cache
+from app.core.search.analytics import search_analytics
+from app.core.search.suggest import suggestion_index
+from app.core.search.projection import SearchPage, result_columns, load_tags
+from app.core.search.facets import tag_filter, matched_ids, compute_facets
+from app.schemas.article import ArticleSearchResult, ArticleSearchPage, SearchFacets
+from app.models.article import Article, ArticleStatus
+from app.models.user import User
 
 router = APIRouter(prefix="/search", tags=["search"])
 
 
-@router.get("/", response_model=List[ArticleListResponse])
+@router.get("/", response_model=Union[List[ArticleSearchResult], ArticleSearchPage])
 async def search_articles(
-    db: Annotated[AsyncSession, Depends(get_db)],
+    request: Request,
+    response: Response,
+    background_tasks: BackgroundTasks,
+    db: Annotated[AsyncSession, Depends(get_read_db)],
     q: str = Query(..., description="搜索关键词"),
     skip: int = Query(0, ge=0, description="跳过记录数"),
     limit: int = Query(10, ge=1, le=100, description="返回记录数"),
     status: Optional[ArticleStatus] = Query(None, description="文章状态过滤"),
-    author: Optional[str] = Query(None, description="作者用户名过滤")
+    author: Optional[str] = Query(None, description="作者用户名过滤"),
+    tag: Optional[List[str]] = Query(None, description="标签过滤，可重复传入多个（需同时包含）"),
+    facets: bool = Query(False, description="是否返回标签/作者/年份分面统计")
 ):
     """全文搜索文章
     
-    基于 SQLite FTS5 全文索引搜索文章标题和内容
-    如果FTS索引不可用，则使用简单的LIKE搜索作为备选
+    基于全文索引搜索文章标题、摘要和内容，按相关度排序，
+    结果总数通过 X-Total-Count 响应头返回（与分页结果同一次查询得到）
+    如果FTS索引不可用或无结果，则使用子串搜索（三元组索引）作为备选
+    
+    facets=true 时返回 {items, total, facets}，分面基于全部匹配结果在一次分组查询中统计
+    
+    FTS结果按规范化后的查询缓存，子串备选结果按原始查询缓存；
+    空结果同样缓存，文章写入后缓存随索引代数整体失效
     """
+    tags = sorted(set(tag)) if tag else None
+    filters = {
+        "skip": skip,
+        "limit": limit,
+        "status": status.value if status else None,
+        "author": author,
+        "tags": tags,
+        "facets": facets,
+    }
+    fts_key = search_result_cache.make_key(FTSSearch.build_search_query(q).lower(), **filters)
+    # 查询前取代数，结果写回同一代数下：查询期间有文章写入时，旧结果不会混入新代数的缓存
+    generation = await search_result_cache.generation()
+    
     try:
-        # 首先尝试使用FTS搜索
-        results = await FTSSearch.search_articles(
-            db=db,
-            query=q,
-            skip=skip,
-            limit=limit,
-            status=status,
-            author=author
-        )
+        page = await search_result_cache.get(fts_key, generation)
+        if page is None:
+            # 首先尝试使用FTS搜索
+            page = _dump_page(await FTSSearch.search_articles(
+                db=db,
+                query=q,
+                skip=skip,
+                limit=limit,
+                status=status,
+                author=author,
+                tags=tags
+            ))
+            if facets and page["items"]:
+                page["facets"] = await _facets(db, FTSSearch.match_filter(q), status, author, tags)
+            await search_result_cache.set(fts_key, page, generation)
         
         # 如果FTS搜索返回结果，直接返回
-        if results:
-            return results
+        if page["items"]:
+            _record_search(background_tasks, request, q, skip)
+            return _respond(response, page, facets)
             
-        # 如果FTS搜索没有结果，使用简单的LIKE搜索作为备选
-        print(f"FTS搜索无结果，使用LIKE搜索备选方案")
-        return await search_articles_fallback(db, q, skip, limit, status, author)
+        # 如果FTS搜索没有结果，使用子串搜索作为备选
+        print(f"FTS搜索无结果，使用子串搜索备选方案")
         
     except Exception as e:
-        print(f"FTS搜索失败，使用LIKE搜索备选方案: {e}")
-        return await search_articles_fallback(db, q, skip, limit, status, author)
+        print(f"FTS搜索失败，使用子串搜索备选方案: {e}")
+    
+    fallback_key = search_result_cache.make_key(q.strip(), fallback=True, **filters)
+    page = await search_result_cache.get(fallback_key, generation)
+    if page is None:
+        page = _dump_page(await search_articles_fallback(db, q, skip, limit, status, author, tags))
+        if facets:
+            page["facets"] = await _facets(db, FTSSearch.substring_filter(q), status, author, tags)
+        await search_result_cache.set(fallback_key, page, generation)
+    if page["items"]:
+        _record_search(background_tasks, request, q, skip)
+    return _respond(response, page, facets)
+
+
+def _dump_page(page: SearchPage) -> dict:
+    """转为可缓存的 JSON 结构"""
+    return {"items": [item.model_dump(mode="json") for item in page], "total": page.total}
+
+
+async def _facets(db: AsyncSession, match_clause, status, author, tags) -> dict:
+    ids = matched_ids(match_clause, status, author, tags)
+    result = await compute_facets(db, ids, settings.search_facet_limit)
+    return result.model_dump()
+
+
+def _respond(response: Response, page: dict, facets: bool = False):
+    if page.get("total") is not None:
+        response.headers["X-Total-Count"] = str(page["total"])
+    if facets:
+        return {
+            "items": page["items"],
+            "total": page.get("total"),
+            "facets": page.get("facets") or SearchFacets().model_dump(),
+        }
+    return page["items"]
+
+
+def _record_search(background_tasks: BackgroundTasks, request: Request, q: str, skip: int):
+    """只统计有结果的首页搜索，翻页不重复计数"""
+    if skip == 0:
+        background_tasks.add_task(search_analytics.record, q, request)
 
 
 async def search_articles_fallback(
@@ -56,72 +132,46 @@ async def search_articles_fallback(
     skip: int = 0,
     limit: int = 10,
     status: Optional[ArticleStatus] = None,
-    author: Optional[str] = None
-) -> List[ArticleListResponse]:
-    """备选搜索方案：使用简单的LIKE搜索"""
-    from app.models.article import Article
-    from app.models.tag import ArticleTag, Tag
-    from app.models.user import User
-    from app.schemas.article import UserBasicInfo, TagInfo
-    
-    # 构建查询
-    search_query = select(Article).options(
-        selectinload(Article.author),
-        selectinload(Article.tags).selectinload(ArticleTag.tag),
-        selectinload(Article.comments)
-    ).where(
-        (Article.title.contains(query) | Article.content.contains(query)) &
-        (Article.status == ArticleStatus.PUBLISHED)
+    author: Optional[str] = None,
+    tags: Optional[List[str]] = None
+) -> SearchPage:
+    """备选搜索方案：子串匹配（走三元组索引，不再 LIKE 全表扫描），只查询列表需要的列"""
+    search_query = (
+        select(*result_columns(), func.count().over().label("total"))
+        .join(User, User.id == Article.author_id)
+        .where(FTSSearch.substring_filter(query))
+        .where(Article.status == (status or ArticleStatus.PUBLISHED))
+        .where(tag_filter(tags))
     )
-    
-    # 添加作者过滤
     if author:
-        search_query = search_query.join(User).where(User.username == author)
-    
+        search_query = search_query.where(User.username == author)
     search_query = search_query.order_by(Article.created_at.desc()).offset(skip).limit(limit)
-    
+
     result = await db.execute(search_query)
-    articles = result.scalars().all()
-    
-    # 构建响应
-    responses = []
-    for article in articles:
-        author_info = UserBasicInfo.model_validate(article.author)
-        tag_infos = [TagInfo.model_validate(at.tag) for at in article.tags if at.tag is not None]
-        comment_count = len(article.comments) if article.comments else 0
-        
-        response = ArticleListResponse(
-            id=article.id,
-            title=article.title,
-            summary=article.summary,
-            status=article.status,
-            author=author_info,
-            tags=tag_infos,
-            created_at=article.created_at,
-            updated_at=article.updated_at,
-            view_count=0,
-            comment_count=comment_count
-        )
-        responses.append(response)
-    
-    return responses
+    rows = result.all()
+    tags_by_article = await load_tags(db, [row.id for row in rows])
+    return SearchPage.from_rows(rows, skip, tags_by_article)
 
 
 @router.get("/suggestions")
 async def get_search_suggestions(
-    db: Annotated[AsyncSession, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
     q: str = Query(..., description="搜索关键词"),
     limit: int = Query(5, ge=1, le=20, description="建议数量")
 ):
     """获取搜索建议
     
-    基于当前搜索词提供相关建议
+    基于当前搜索词提供相关建议：优先查询进程内的标题/标签前缀索引，
+    索引未就绪时退回到 FTS 前缀查询
     """
-    suggestions = await FTSSearch.get_search_suggestions(
-        db=db,
-        query=q,
-        limit=limit
-    )
+    if suggestion_index.ready:
+        suggestions = suggestion_index.suggest(q, limit)
+    else:
+        suggestions = await FTSSearch.get_search_suggestions(
+            db=db,
+            query=q,
+            limit=limit
+        )
     return {
         "query": q,
         "suggestions": suggestions,
@@ -131,17 +181,19 @@ async def get_search_suggestions(
 
 @router.get("/popular")
 async def get_popular_searches(
-    db: Annotated[AsyncSession, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
     limit: int = Query(10, ge=1, le=50, description="热门搜索词数量")
 ):
     """获取热门搜索词
     
-    基于文章标题中的关键词统计热门搜索词
+    基于用户实际搜索的词（按时间衰减）统计；Redis 不可用时退回到文章标题词频
     """
-    popular_words = await FTSSearch.get_popular_searches(
-        db=db,
-        limit=limit
-    )
+    popular_words = await search_analytics.top(limit)
+    if popular_words is None:
+        popular_words = await FTSSearch.get_popular_searches(
+            db=db,
+            limit=limit
+        )
     return {
         "popular_searches": popular_words,
         "count": len(popular_words)
@@ -152,17 +204,19 @@ async def get_popular_searches(
 async def initialize_search_index(db: Annotated[AsyncSession, Depends(get_db)]):
     """初始化搜索索引
     
-    创建 FTS5 虚拟表和触发器，并填充现有数据
+    在影子表中分批重建索引并替换，重建期间搜索照常可用；
+    其他进程正在重建时直接返回
     """
     try:
-        # 先删除已存在的表和触发器
-        await FTSSearch.drop_fts_table(db)
+        state = await FTSSearch.rebuild_fts_index(db)
+        if state == "skipped":
+            return {
+                "message": "其他进程正在重建搜索索引",
+                "status": "in_progress"
+            }
         
-        # 创建 FTS5 表
-        await FTSSearch.create_fts_table(db)
-        
-        # 填充数据
-        await FTSSearch.populate_fts_table(db)
+        # 索引重建后旧的搜索缓存全部失效
+        await search_result_cache.bump_generation()
         
         return {
             "message": "搜索索引初始化成功",
@@ -176,7 +230,7 @@ async def initialize_search_index(db: Annotated[AsyncSession, Depends(get_db)]):
 
 
 @router.get("/stats")
-async def get_search_stats(db: Annotated[AsyncSession, Depends(get_db)]):
+async def get_search_stats(db: Annotated[AsyncSession, Depends(get_read_db)]):
     """获取搜索统计信息"""
     # 获取 FTS5 表统计信息
     result = await db.execute(text("SELECT COUNT(*) FROM articles_fts"))
@@ -186,8 +240,16 @@ async def get_search_stats(db: Annotated[AsyncSession, Depends(get_db)]):
     result = await db.execute(text("SELECT COUNT(*) FROM article WHERE status = 'PUBLISHED'"))
     article_count = result.scalar()
     
+    # 索引包含全部状态的文章（查询时再按状态过滤）
+    result = await db.execute(text("SELECT COUNT(*) FROM article"))
+    total_count = result.scalar()
+    
     return {
         "fts_indexed_articles": fts_count,
         "total_published_articles": article_count,
-        "index_coverage": fts_count / article_count if article_count > 0 else 0
+        "total_articles": total_count,
+        "index_coverage": fts_count / total_count if total_count > 0 else 0,
+        "index_version": await index_meta.get_meta(db, index_meta.VERSION_KEY),
+        "expected_index_version": FTSSearch.index_version(),
+        "result_cache": search_result_cache.stats()
     } 
\ No newline at end of file
@@ -1,12 +1,14 @@
 from typing import List, Annotated
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, delete
+from sqlalchemy import select, func
 from sqlalchemy.orm import selectinload
 
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
 from app.core.exceptions import NotFoundError, ConflictError
 from app.core.security import get_current_user, require_admin
+from app.core.search.suggest import suggestion_index
+from app.core.deletion import deletion_service
 from app.models.user import User
 from app.models.tag import Tag
 from app.models.tag import ArticleTag
@@ -32,13 +34,14 @@ async def create_tag(
     db.add(db_tag)
     await db.commit()
     await db.refresh(db_tag)
+    await suggestion_index.refresh_tag(db, db_tag.id)
     
     return TagResponse.from_orm(db_tag)
 
 
 @router.get("/", response_model=List[TagWithCountResponse])
 async def list_tags(
-    db: Annotated[AsyncSession, Depends(get_db)]
+    db: Annotated[AsyncSession, Depends(get_read_db)]
 ):
     """获取标签列表（包含文章数量）"""
     # 查询标签及其关联的文章数量
@@ -67,7 +70,7 @@ async def list_tags(
 
 @router.get("/popular", response_model=List[TagWithCountResponse])
 async def get_popular_tags(
-    db: Annotated[AsyncSession, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
     limit: int = 10
 ):
     """获取热门标签"""
@@ -98,7 +101,7 @@ async def get_popular_tags(
 @router.get("/{tag_id}", response_model=TagResponse)
 async def get_tag(
     tag_id: int,
-    db: Annotated[AsyncSession, Depends(get_db)]
+    db: Annotated[AsyncSession, Depends(get_read_db)]
 ):
     """获取标签详情"""
     result = await db.execute(select(Tag).where(Tag.id == tag_id))
@@ -137,6 +140,7 @@ async def update_tag(
     
     await db.commit()
     await db.refresh(tag)
+    await suggestion_index.refresh_tag(db, tag.id)
     
     return TagResponse.from_orm(tag)
 
@@ -154,11 +158,8 @@ async def delete_tag(
     if not tag:
         raise NotFoundError("Tag not found")
     
-    # 删除标签与文章的关联
-    await db.execute(delete(ArticleTag).where(ArticleTag.tag_id == tag_id))
-    
-    # 删除标签
-    await db.execute(delete(Tag).where(Tag.id == tag_id))
-    await db.commit()
+    # 删除标签及其与文章的关联
+    deleted = await deletion_service.delete_tags(db, [tag_id])
+    await deletion_service.after_commit(db, deleted)
     
-    return {"message": "Tag deleted successfully"} 
\ No newline at end of file
+    return {"message": "Tag deleted successfully", "deleted": deleted.counts} 
\ No newline at end of file
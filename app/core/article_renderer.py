@@ -0,0 +1,234 @@
+"""
+文章HTML预渲染服务
+保存文章时在服务端把 Markdown 渲染为经过清洗的 HTML（公式预先渲染），
+连同目录和阅读时长按内容哈希缓存，详情接口可直接返回
+"""
+
+import re
+import html
+import json
+import math
+import time
+import uuid
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from markdown_it import MarkdownIt
+
+from app.core.config import settings
+from app.core.latex import latex_renderer, latex_render_service
+from app.core.latex_tokenizer import tokenize_math, substitute_math
+from app.core.redis import redis_manager
+
+logger = logging.getLogger(__name__)
+
+
+# 渲染版本：修改渲染规则（Markdown 选项、公式输出格式等）时递增，使旧缓存自然失效
+ARTICLE_RENDER_VERSION = 1
+
+# 阅读速度：中文按字、英文按词计算
+CJK_CHARS_PER_MINUTE = 400
+WORDS_PER_MINUTE = 200
+
+_CJK_RE = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]")
+_WORD_RE = re.compile(r"[A-Za-z0-9]+(?:['’][A-Za-z]+)?")
+_SLUG_STRIP_RE = re.compile(r"[^\w\- ]+")
+
+
+class ArticleHtmlRenderer:
+    """文章HTML渲染器"""
+
+    def __init__(self):
+        # 与前端 markdown-it 保持一致的语法，但禁止原始 HTML（输出即为清洗后的 HTML）
+        self.md = MarkdownIt("commonmark", {"html": False, "typographer": True})
+        self.md.enable(["table", "strikethrough"])
+
+    @staticmethod
+    def content_key(content: str) -> str:
+        """文章版本键：渲染版本 + 内容哈希"""
+        payload = f"{ARTICLE_RENDER_VERSION}\0{content}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def reading_time(content: str) -> int:
+        """估算阅读时长（分钟）"""
+        cjk_chars = len(_CJK_RE.findall(content))
+        words = len(_WORD_RE.findall(content))
+        minutes = cjk_chars / CJK_CHARS_PER_MINUTE + words / WORDS_PER_MINUTE
+        return max(1, math.ceil(minutes))
+
+    @staticmethod
+    def _slugify(text: str, used: Dict[str, int]) -> str:
+        slug = _SLUG_STRIP_RE.sub("", text.strip().lower())
+        slug = re.sub(r"\s+", "-", slug) or "section"
+        count = used.get(slug, 0)
+        used[slug] = count + 1
+        return slug if count == 0 else f"{slug}-{count}"
+
+    @staticmethod
+    def _math_html(span, image_url: Optional[str]) -> str:
+        """公式的 HTML：有图片时输出图片，否则保留转义后的 TeX 供前端 KaTeX 渲染"""
+        is_display = span.type != "inline"
+        tag = "div" if is_display else "span"
+        css_class = "math math-display" if is_display else "math math-inline"
+        if image_url:
+            body = f'<img class="latex-image" src="{html.escape(image_url)}" alt="{html.escape(span.content)}">'
+        elif span.type == "environment":
+            body = html.escape(span.content)
+        elif is_display:
+            body = f"\\[{html.escape(span.content)}\\]"
+        else:
+            body = f"\\({html.escape(span.content)}\\)"
+        return f'<{tag} class="{css_class}">{body}</{tag}>'
+
+    async def _render_math(self, spans) -> Dict[int, Optional[str]]:
+        """公式预渲染为图片（仅在系统安装了LaTeX时），返回 start -> image_url"""
+        if not spans or not latex_renderer.has_latex_support:
+            return {}
+        formulas = list({(span.content, span.type) for span in spans})
+        results = await latex_render_service.render_batch(formulas, settings.latex_batch_timeout)
+        return {
+            span.start: results[(span.content, span.type)]["image_url"]
+            for span in spans
+        }
+
+    async def render(self, content: str) -> Dict:
+        """渲染文章，返回 HTML、目录和阅读时长"""
+        spans = tokenize_math(content)
+        image_urls = await self._render_math(spans)
+        # 系统支持LaTeX却没有得到图片的公式（超时、队列已满、渲染失败），以TeX源码输出
+        math_fallbacks = 0
+        if spans and latex_renderer.has_latex_support:
+            math_fallbacks = sum(1 for span in spans if not image_urls.get(span.start))
+
+        # 公式先替换为占位符，避免被 Markdown 解析，渲染完成后再换回
+        nonce = uuid.uuid4().hex[:8]
+        placeholders = {}
+
+        def to_placeholder(span) -> str:
+            placeholder = f"MATH{nonce}N{len(placeholders)}X"
+            placeholders[placeholder] = span
+            return placeholder
+
+        source = substitute_math(content, spans, to_placeholder)
+        tokens = self.md.parse(source)
+
+        # 标题加锚点并生成目录
+        toc = []
+        used_slugs: Dict[str, int] = {}
+        for index, token in enumerate(tokens):
+            if token.type != "heading_open":
+                continue
+            text = tokens[index + 1].content
+            for placeholder, span in placeholders.items():
+                if placeholder in text:
+                    text = text.replace(placeholder, span.original)
+            slug = self._slugify(text, used_slugs)
+            token.attrSet("id", slug)
+            toc.append({"level": int(token.tag[1]), "text": text, "id": slug})
+
+        rendered = self.md.renderer.render(tokens, self.md.options, {})
+
+        for placeholder, span in placeholders.items():
+            math_html = self._math_html(span, image_urls.get(span.start))
+            # 独占一段的公式不再包在 <p> 里
+            rendered = rendered.replace(f"<p>{placeholder}</p>", math_html)
+            rendered = rendered.replace(placeholder, math_html)
+
+        return {
+            "content_html": rendered,
+            "toc": toc,
+            "reading_time": self.reading_time(content),
+            "render_version": ARTICLE_RENDER_VERSION,
+            "math_fallbacks": math_fallbacks,
+        }
+
+
+class ArticleHtmlService:
+    """按内容寻址缓存预渲染结果：进程内 LRU + Redis 两级，未命中时现场渲染
+
+    键由内容哈希和渲染版本组成，内容不变结果就不变，进程内缓存无需跨 worker 失效；
+    未连接 Redis 或 Redis 不可用时仍由进程内缓存命中，不会每次请求都重新渲染。
+    """
+
+    KEY_PREFIX = "article_html:"
+
+    def __init__(self, renderer: ArticleHtmlRenderer, ttl: int, fallback_ttl: int, local_size: int = 256):
+        self.renderer = renderer
+        self.ttl = ttl
+        self.fallback_ttl = fallback_ttl
+        self.local_size = local_size
+        self._local: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (过期时间, 结果)
+
+    def _expire(self, rendered: Dict) -> int:
+        # 含回退公式的结果只短暂缓存，过期后重新渲染，不会把失败结果保留整个缓存周期
+        return self.fallback_ttl if rendered.get("math_fallbacks") else self.ttl
+
+    def _remember(self, key: str, rendered: Dict):
+        self._local[key] = (time.monotonic() + self._expire(rendered), rendered)
+        self._local.move_to_end(key)
+        while len(self._local) > self.local_size:
+            self._local.popitem(last=False)
+
+    async def _load(self, key: str) -> Optional[Dict]:
+        entry = self._local.get(key)
+        if entry is not None:
+            expires_at, rendered = entry
+            if expires_at > time.monotonic():
+                self._local.move_to_end(key)
+                return rendered
+            del self._local[key]
+
+        if not redis_manager.redis:
+            return None
+        try:
+            cached = await redis_manager.get(self.KEY_PREFIX + key)
+        except Exception as e:
+            logger.warning(f"读取文章HTML缓存失败: {e}")
+            return None
+        if not cached:
+            return None
+        rendered = json.loads(cached)
+        self._remember(key, rendered)
+        return rendered
+
+    async def _store(self, key: str, rendered: Dict):
+        self._remember(key, rendered)
+        if not redis_manager.redis:
+            return
+        expire = self._expire(rendered)
+        try:
+            await redis_manager.set(self.KEY_PREFIX + key, json.dumps(rendered, ensure_ascii=False), expire=expire)
+        except Exception as e:
+            logger.warning(f"写入文章HTML缓存失败: {e}")
+
+    async def prerender(self, content: str):
+        """保存文章后调用：渲染并写入缓存（已存在相同版本时跳过）"""
+        try:
+            key = self.renderer.content_key(content)
+            cached = await self._load(key)
+            if cached and not cached.get("math_fallbacks"):
+                return
+            await self._store(key, await self.renderer.render(content))
+        except Exception as e:
+            logger.error(f"文章HTML预渲染失败: {e}")
+
+    async def get_or_render(self, content: str) -> Dict:
+        """读取预渲染结果，未命中时渲染并回填缓存"""
+        key = self.renderer.content_key(content)
+        rendered = await self._load(key)
+        if rendered is None:
+            rendered = await self.renderer.render(content)
+            await self._store(key, rendered)
+        return rendered
+
+
+# 全局文章HTML服务实例
+article_html_service = ArticleHtmlService(
+    ArticleHtmlRenderer(),
+    ttl=settings.article_html_cache_ttl,
+    fallback_ttl=settings.article_html_fallback_ttl,
+    local_size=settings.article_html_local_size
+)
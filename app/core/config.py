@@ -1,7 +1,8 @@
-from typing import List, Optional
+from typing import Any, Callable, Dict, List, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field
 import os
+import time
 from dotenv import load_dotenv
 
 
@@ -11,11 +12,32 @@ class Settings(BaseSettings):
     environment: str = Field(default="development", alias="ENVIRONMENT") # 环境变量，默认为 development，可通过 .env 文件覆盖
     python_io_encoding: str = Field(default="utf-8", alias="PYTHONIOENCODING")  # 确保 Python IO 编码为 UTF-8
     
+    # SQLite Settings
+    sqlite_production_mode: bool = False  # 生产模式：WAL + 单写连接串行写入 + 只读连接池
+    sqlite_busy_timeout: int = 5000  # 数据库被锁定时的等待时间（毫秒）
+    sqlite_mmap_size: int = 268435456  # 内存映射读取的大小（字节）
+    sqlite_cache_size_kb: int = 65536  # 每个连接的页缓存大小（KB）
+    sqlite_read_pool_size: int = 5  # 只读连接数
+    sqlite_write_queue_size: int = 64  # 等待写连接的请求上限，超出直接报错
+    sqlite_write_timeout: int = 30  # 等待写连接的超时时间（秒）
+    
+    # PostgreSQL Settings
+    db_pool_size: int = 10  # 常驻连接数
+    db_max_overflow: int = 20  # 高峰时额外允许的连接数
+    db_pool_timeout: int = 30  # 等待空闲连接的超时时间（秒）
+    db_pool_recycle: int = 1800  # 连接使用超过该秒数后重建，避免被服务端或中间代理断开
+    db_pool_pre_ping: bool = True  # 取出连接前先探测是否可用
+    db_statement_cache_size: int = 500  # 每个连接缓存的预编译语句数（经 PgBouncer 事务池连接时设为 0）
+    database_replica_urls: List[str] = []  # 只读副本地址列表（JSON 数组），为空时读写都走主库
+    db_replica_retry_seconds: int = 30  # 副本出错后暂停使用的时间（秒），期间由后台探活
+    db_read_your_writes_seconds: int = 5  # 写请求之后该客户端的读请求走主库的时间（秒），避免读到复制延迟前的旧数据
+    
     # JWT Settings
     secret_key: str = "your-super-secret-key-change-this-in-production-123456789"
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 1440  # 默认 1 天，可通过 .env 配置覆盖
     refresh_token_expire_days: int = 7
+    max_sessions_per_user: int = 10  # 每个用户同时保留的登录会话数，超出时淘汰最久未使用的会话
     
     # Redis Settings
     redis_url: str = "redis://localhost:6379/0"
@@ -43,10 +65,57 @@ class Settings(BaseSettings):
     # App Settings
     app_name: str = "FastAPI Blog System"
     debug: bool = True
+    schema_startup_mode: str = "create"  # create：每个进程启动时建表并检查搜索索引（开发用）/ verify：只校验迁移版本，建表和迁移由 scripts/init_db.py 预先完成
+    config_check_interval: float = 2.0  # 检查 .env 修改时间的最小间隔（秒），文件变化后自动重新加载配置
+    integration_warmup: bool = False  # 启动后在后台预热 PayPal 令牌、微信支付客户端和 LaTeX 检测（关闭时在首次使用时初始化）
     
     # Scheduler Settings
     timezone: str = "Asia/Shanghai"
     
+    # LaTeX Rendering Settings
+    latex_render_workers: int = 2  # 同时运行的渲染子进程数
+    latex_render_queue_size: int = 16  # 最大排队任务数，超出返回503
+    latex_render_timeout: int = 60  # 单个渲染任务的总超时（秒）
+    latex_command_timeout: int = 30  # 单条 pdflatex/convert 命令的超时（秒）
+    latex_cache_max_mb: int = 512  # uploads/latex 渲染缓存的容量上限，超出后按LRU淘汰
+    latex_batch_max_items: int = 200  # 批量预览单次最多公式数
+    latex_batch_timeout: int = 20  # 批量预览单次请求的时间预算上限（秒）
+    
+    # Article Rendering Settings
+    article_html_cache_ttl: int = 30 * 24 * 3600  # 预渲染HTML在Redis中的保留时间（秒）
+    article_html_fallback_ttl: int = 300  # 有公式渲染失败（回退为TeX源码）时的缓存时间（秒），过期后重新渲染
+    article_html_local_size: int = 256  # 每个进程内LRU缓存的文章HTML条数（未连接Redis时也能命中）
+    view_count_flush_seconds: int = 30  # 文章浏览量在内存中累计，每隔该秒数写入一次数据库
+    
+    # Search Settings
+    search_fts_tokenizer: str = "cjk"  # 全文索引分词：cjk（中文逐字切分+短语匹配）/ trigram（仅SQLite）/ unicode61
+    search_index_batch_size: int = 500  # 重建索引时每批处理的文章数
+    search_index_lock_timeout: int = 600  # 重建锁超过该秒数未续期视为失效
+    search_substring_min_length: int = 3  # 子串搜索的最小长度，更短的查询改用全文索引（三元组至少 3 个字符）
+    search_rank_recency_weight: float = 0.5  # 相关度排序中新近度加成的权重（0 表示只按相关度）
+    search_rank_recency_half_life_days: int = 180  # 新近度加成的半衰期（天）
+    search_facet_limit: int = 10  # 分面统计中每类（标签/作者/年份）返回的最多项数
+    
+    # Popular Search Settings
+    search_popular_half_life_hours: int = 24  # 搜索热度半衰期（小时）
+    search_popular_bucket_hours: int = 24  # 统计时间桶长度（小时）
+    search_popular_buckets: int = 7  # 参与热度计算的时间桶数量
+    search_popular_max_terms: int = 10000  # 每个时间桶保留的搜索词上限
+    search_popular_max_length: int = 50  # 超过该长度的搜索词不计入统计
+    search_popular_dedupe_seconds: int = 300  # 同一客户端重复搜索同一个词的去重窗口（秒）
+    
+    # Search Cache Settings
+    search_cache_ttl: int = 300  # 搜索结果在Redis中的缓存时间（秒）
+    search_cache_local_size: int = 512  # 每个进程内LRU缓存的搜索结果条数
+    search_cache_local_ttl: int = 5  # 未连接Redis时进程内缓存的保留时间（秒），各worker无法互相通知失效
+    
+    # Related Articles Settings
+    related_top_k: int = 10  # 每篇文章预先保存的相关文章数
+    related_vector_dim: int = 4096  # 哈希词向量维度（修改后需全量重建）
+    related_tag_weight: float = 0.3  # 综合得分中标签 Jaccard 重合度的权重，其余为正文余弦相似度
+    related_min_score: float = 0.05  # 低于该得分的文章不作为相关文章
+    related_batch_size: int = 256  # 计算相似度时每批处理的文章数
+    
     # OAuth Settings
     # GitHub OAuth
     github_client_id: str = ""
@@ -138,6 +207,7 @@ class Settings(BaseSettings):
         env_file = os.getenv("ENV_FILE", ".env")
         env_file_encoding = "utf-8"
         case_sensitive = False
+        frozen = True  # 配置快照只读，变更通过重新加载生成新实例
 
     # model_config = SettingsConfigDict(
     #     env_file=f".env.{os.getenv('ENVIRONMENT', 'development')}",
@@ -163,8 +233,66 @@ class Settings(BaseSettings):
 # 创建全局配置实例
 settings = Settings()
 
+
+class SettingsStore:
+    """带版本号的配置快照
+
+    配置只在 .env 修改时间变化（最多每 config_check_interval 秒检查一次）或显式调用 reload()
+    时重新解析；内容有变化时版本号加一，并清空按版本缓存的接口响应。
+    """
+
+    def __init__(self, initial: Settings):
+        self.settings = initial
+        self.version = 1
+        self.env_file = initial.model_config.get("env_file") or ".env"
+        self._mtime = self._env_mtime()
+        self._checked_at = time.monotonic()
+        self._payloads: Dict[str, Any] = {}
+
+    def _env_mtime(self) -> Optional[int]:
+        try:
+            return os.stat(self.env_file).st_mtime_ns
+        except OSError:
+            return None
+
+    def current(self) -> Settings:
+        """当前快照；距上次检查超过间隔且 .env 有修改时先重新加载"""
+        now = time.monotonic()
+        if now - self._checked_at >= self.settings.config_check_interval:
+            self._checked_at = now
+            if self._env_mtime() != self._mtime:
+                self.reload()
+        return self.settings
+
+    def reload(self) -> Settings:
+        """重新解析 .env 和环境变量，生成新快照"""
+        global settings
+        self._mtime = self._env_mtime()
+        self._checked_at = time.monotonic()
+        new_settings = Settings.reload()
+        if new_settings.model_dump() != self.settings.model_dump():
+            self.version += 1
+            self._payloads = {}
+        self.settings = settings = new_settings
+        return new_settings
+
+    def payload(self, name: str, build: Callable[[Settings], Dict[str, Any]]) -> Dict[str, Any]:
+        """按配置版本缓存的接口响应：同一版本内只构建一次"""
+        current = self.current()
+        cached = self._payloads.get(name)
+        if cached is None:
+            cached = self._payloads[name] = build(current)
+        return cached
+
+
+settings_store = SettingsStore(settings)
+
+
+def get_settings() -> Settings:
+    """获取当前配置快照（.env 修改后自动更新）"""
+    return settings_store.current()
+
+
 def reload_settings():
     """重新加载全局配置"""
-    global settings
-    settings = Settings.reload()
-    return settings 
\ No newline at end of file
+    return settings_store.reload() 
\ No newline at end of file
@@ -0,0 +1,67 @@
+"""
+配置重新加载广播
+管理员触发 /config/reload 时，本进程重新加载配置后通过 Redis 发布通知，
+其他 worker 收到后各自重新加载，保证所有进程使用同一份配置。
+（.env 文件修改由每个进程按修改时间自行发现，不依赖广播。）
+"""
+
+import asyncio
+import logging
+import os
+from typing import Optional
+
+from app.core.config import settings_store
+from app.core.redis import redis_manager
+
+logger = logging.getLogger(__name__)
+
+
+class ConfigSync:
+    CHANNEL = "config:reload"
+
+    def __init__(self):
+        self._listener: Optional[asyncio.Task] = None
+        # 区分自己发出的通知，避免重复加载
+        self._origin = f"{os.getpid()}:{id(self)}"
+
+    async def reload_all(self) -> int:
+        """重新加载本进程配置并通知其他 worker，返回新的配置版本号"""
+        settings_store.reload()
+        if redis_manager.redis:
+            try:
+                await redis_manager.redis.publish(self.CHANNEL, self._origin)
+            except Exception as e:
+                logger.warning(f"广播配置重新加载失败: {e}")
+        return settings_store.version
+
+    async def _listen(self):
+        pubsub = redis_manager.redis.pubsub()
+        await pubsub.subscribe(self.CHANNEL)
+        try:
+            async for message in pubsub.listen():
+                if message.get("type") != "message" or message.get("data") == self._origin:
+                    continue
+                try:
+                    settings_store.reload()
+                    logger.info(f"收到配置重新加载通知，当前版本 {settings_store.version}")
+                except Exception as e:
+                    logger.warning(f"重新加载配置失败: {e}")
+        finally:
+            await pubsub.unsubscribe(self.CHANNEL)
+            await pubsub.close()
+
+    def start_listener(self):
+        if redis_manager.redis and self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop_listener(self):
+        if self._listener:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._listener = None
+
+
+config_sync = ConfigSync()
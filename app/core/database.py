@@ -1,51 +1,201 @@
 import asyncio
-from typing import AsyncGenerator
+from pathlib import Path
+from typing import AsyncGenerator, Optional
+from starlette.requests import HTTPConnection
+from sqlalchemy import inspect, text
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from sqlmodel import SQLModel
 from app.core.config import settings
 from app.core.search import FTSSearch
+from app.core.search.cjk import install_sqlite_functions
+from app.core.search.sqlite_search_impl import install_fts_segmenter
+from app.core.db_routing import RoutingSession, ReplicaSet, SQLiteWriterPool, install_sqlite_pragmas
 
 
 class Base(DeclarativeBase):
     pass
 
 
-# 创建异步引擎
-engine = create_async_engine(
-    settings.database_url,
-    echo=settings.debug,
-    future=True
+_is_sqlite = settings.database_url.startswith("sqlite")
+
+
+def _create_server_engine(url: str):
+    """PostgreSQL 等服务端数据库：可配置的连接池大小、回收、预探测和预编译语句缓存"""
+    connect_args = {}
+    if url.startswith("postgresql+asyncpg"):
+        connect_args["prepared_statement_cache_size"] = settings.db_statement_cache_size
+    return create_async_engine(
+        url,
+        echo=settings.debug,
+        future=True,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        connect_args=connect_args
+    )
+
+
+# 读引擎：未启用读写分离时为 None，所有语句走 engine
+read_engine = None
+
+if _is_sqlite and settings.sqlite_production_mode:
+    # SQLite 生产模式：engine 只有一个写连接，所有写入在其上串行执行；读走只读连接池
+    # （aiosqlite 默认不复用连接，这里显式使用连接池，PRAGMA 只在建立连接时设置一次）
+    engine = create_async_engine(
+        settings.database_url,
+        echo=settings.debug,
+        future=True,
+        poolclass=SQLiteWriterPool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=settings.sqlite_write_timeout
+    )
+    read_engine = create_async_engine(
+        settings.database_url,
+        echo=settings.debug,
+        future=True,
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=settings.sqlite_read_pool_size,
+        max_overflow=0,
+        pool_timeout=settings.sqlite_write_timeout
+    )
+    install_sqlite_pragmas(engine.sync_engine)
+    install_sqlite_pragmas(read_engine.sync_engine, read_only=True)
+elif _is_sqlite:
+    # 创建异步引擎
+    engine = create_async_engine(
+        settings.database_url,
+        echo=settings.debug,
+        future=True
+    )
+else:
+    engine = _create_server_engine(settings.database_url)
+
+# SQLite 的 FTS 表由应用切分中文后写入：每个连接注册 cjk_segment()，写过文章的会话提交前重写索引行
+if _is_sqlite:
+    install_sqlite_functions(engine.sync_engine)
+    if read_engine is not None:
+        install_sqlite_functions(read_engine.sync_engine)
+    install_fts_segmenter()
+
+# 只读副本（仅服务端数据库），只读接口按请求选择
+replicas = ReplicaSet(
+    [] if _is_sqlite else [_create_server_engine(url) for url in settings.database_replica_urls],
+    retry_seconds=settings.db_replica_retry_seconds
 )
 
+# 写请求之后设置该 cookie，有效期内该客户端的读请求走主库
+PRIMARY_COOKIE = "db_primary"
+
+
+def session_factory(**kwargs) -> async_sessionmaker:
+    """会话工厂：写语句走 engine，只读语句走 read_engine（如有）"""
+    return async_sessionmaker(
+        engine,
+        class_=AsyncSession,
+        sync_session_class=RoutingSession,
+        reader=read_engine,
+        **kwargs
+    )
+
+
 # 创建会话工厂
-async_session = async_sessionmaker(
-    engine,
-    class_=AsyncSession,
-    expire_on_commit=False
-)
+async_session = session_factory(expire_on_commit=False)
+
+
+def _request_session(conn: Optional[HTTPConnection]) -> Optional[AsyncSession]:
+    """当前请求工作单元的会话（见 app.core.unit_of_work），没有时返回 None"""
+    if conn is None:
+        return None
+    uow = conn.scope.get("state", {}).get("uow")
+    return uow.session if uow is not None else None
 
 
-async def get_db() -> AsyncGenerator[AsyncSession, None]:
-    """获取数据库会话"""
+async def get_db(conn: HTTPConnection = None) -> AsyncGenerator[AsyncSession, None]:
+    """获取数据库会话：HTTP 请求内与中间件、其他依赖共用请求级会话，由中间件负责关闭；
+    脚本中直接调用（async for db in get_db()）时创建独立的会话"""
+    session = _request_session(conn)
+    if session is not None:
+        yield session
+        return
     async with async_session() as session:
         yield session
 
 
-async def create_db_and_tables():
-    """创建数据库表"""
+async def get_read_db(request: HTTPConnection) -> AsyncGenerator[AsyncSession, None]:
+    """只读接口的数据库会话：读语句走只读副本（副本不可用或客户端刚写入过时走主库），写语句仍走主库
+
+    GET 请求的请求级会话已经是只读作用域，直接复用。
+    """
+    session = _request_session(request)
+    if session is not None:
+        yield session
+        return
+    reader = read_engine
+    if replicas.engines and PRIMARY_COOKIE not in request.cookies:
+        reader = replicas.pick() or read_engine
+    async with async_session(reader=reader) as session:
+        yield session
+
+
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
+
+
+async def create_tables() -> bool:
+    """按模型创建缺少的表和索引（已有的不变），返回数据库是否已有迁移版本记录"""
     async with engine.begin() as conn:
         await conn.run_sync(SQLModel.metadata.create_all)
-    
-    # 创建搜索索引
+        return await conn.run_sync(lambda sync_conn: inspect(sync_conn).has_table("alembic_version"))
+
+
+async def ensure_search_index():
+    """搜索索引：版本一致时只做校验，版本变化时才重建（跨进程加锁，其他进程不等待）"""
     async with async_session() as session:
         try:
-            # 创建 FTS5 表
-            await FTSSearch.create_fts_table(session)
-            # 填充数据
-            await FTSSearch.populate_fts_table(session)
-            print("FTS5 search index setup completed successfully")
+            state = await FTSSearch.ensure_fts_index(session)
+            print(f"FTS search index {state}")
         except Exception as e:
             print(f"Warning: FTS5 setup failed: {e}")
             print("Application will continue without FTS5 search functionality")
-            # 继续运行，不要让 FTS5 错误阻止应用启动 
\ No newline at end of file
+            # 继续运行，不要让 FTS5 错误阻止应用启动
+
+
+async def create_db_and_tables():
+    """创建数据库表（开发模式下每个进程启动时执行）"""
+    await create_tables()
+    await ensure_search_index()
+
+
+def alembic_head() -> Optional[str]:
+    """代码中最新的迁移版本"""
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+
+    config = Config(str(ALEMBIC_INI))
+    config.set_main_option("script_location", str(ALEMBIC_INI.parent / "alembic"))
+    return ScriptDirectory.from_config(config).get_current_head()
+
+
+async def current_revision() -> Optional[str]:
+    """数据库当前的迁移版本，未执行过迁移时为 None"""
+    async with engine.connect() as conn:
+        has_version = await conn.run_sync(lambda sync_conn: inspect(sync_conn).has_table("alembic_version"))
+        if not has_version:
+            return None
+        return (await conn.execute(text("SELECT version_num FROM alembic_version"))).scalar()
+
+
+async def verify_schema_revision():
+    """生产模式下进程启动时只校验迁移版本，建表、迁移和搜索索引由 scripts/init_db.py 预先完成"""
+    head = await asyncio.to_thread(alembic_head)
+    current = await current_revision()
+    if current != head:
+        raise RuntimeError(
+            f"Database schema revision {current} does not match code revision {head}; "
+            f"run `python scripts/init_db.py` before starting the workers"
+        )
+    return current
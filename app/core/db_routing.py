@@ -0,0 +1,180 @@
+"""
+读写分离的会话路由
+写语句（以及同一事务中写之后的所有语句）走主库/写连接，其余读语句走只读连接池或只读副本。
+
+SQLite 生产模式下：
+- 写引擎只有一个连接，所有写入在其上串行执行；等待写连接的请求数有上限，超出立即失败
+- 读引擎是一组 query_only 连接，WAL 模式下读不阻塞写、写也不阻塞读
+
+PostgreSQL 配置了只读副本时，只读接口的会话按请求选择一个健康副本作为读引擎。
+"""
+
+import time
+import asyncio
+import logging
+from typing import Dict, List, Optional
+
+from sqlalchemy import event, exc, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.sql import Delete, Insert, Update
+from sqlalchemy.sql.elements import TextClause
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 以这些关键字开头的文本 SQL 视为只读
+_READ_ONLY_PREFIXES = ("select", "with", "explain", "values")
+
+
+def is_write(clause) -> bool:
+    if isinstance(clause, (Insert, Update, Delete)):
+        return True
+    if isinstance(clause, TextClause):
+        return not clause.text.lstrip().lower().startswith(_READ_ONLY_PREFIXES)
+    return False
+
+
+class RoutingSession(Session):
+    """按语句选择连接：bind 为写引擎，reader 为只读引擎（未配置时全部走 bind）
+
+    写入和 flush 走写引擎，之后直到事务结束都留在写引擎上，保证读到自己刚写的数据。
+    """
+
+    def __init__(self, *args, reader=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # 通过 async_sessionmaker 传入的是 AsyncEngine，路由需要同步引擎
+        self.reader = getattr(reader, "sync_engine", reader)
+        self._wrote = False
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self.reader is None:
+            return super().get_bind(mapper=mapper, clause=clause, **kwargs)
+        if self._wrote or self._flushing or is_write(clause):
+            self._wrote = True
+            return self.bind
+        return self.reader
+
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _reset_route(session, transaction):
+    if transaction.parent is None:
+        session._wrote = False
+
+
+class SQLiteWriterPool(AsyncAdaptedQueuePool):
+    """单写连接池：等待写连接的请求数超过 sqlite_write_queue_size 时直接报错，而不是无限排队"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._max_waiting = settings.sqlite_write_queue_size
+        self._waiting = 0
+
+    def _do_get(self):
+        if self._waiting >= self._max_waiting:
+            raise exc.TimeoutError(f"SQLite write queue is full ({self._max_waiting} waiting)")
+        self._waiting += 1
+        try:
+            return super()._do_get()
+        finally:
+            self._waiting -= 1
+
+
+def install_sqlite_pragmas(sync_engine: Engine, read_only: bool = False):
+    """每个 SQLite 连接建立时设置 PRAGMA；journal_mode 持久化在数据库文件中，只需写连接设置"""
+
+    @event.listens_for(sync_engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        if not read_only:
+            cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout)}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}")
+        # 负数表示以 KiB 为单位
+        cursor.execute(f"PRAGMA cache_size=-{int(settings.sqlite_cache_size_kb)}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+
+
+class ReplicaSet:
+    """只读副本集合：轮询选择健康的副本，全部不可用时回退到主库
+
+    副本连接出错（断线、无法连接）时标记为不可用，retry_seconds 之后再参与选择；
+    后台探活任务定期检查不可用的副本，恢复后立即放回。
+    """
+
+    def __init__(self, engines: List[AsyncEngine], retry_seconds: int = 30):
+        self.engines = engines
+        self.retry_seconds = retry_seconds
+        self._down_until: Dict[AsyncEngine, float] = {}
+        self._next = 0
+        self._probe: Optional[asyncio.Task] = None
+        for replica in engines:
+            self._watch(replica)
+
+    def _watch(self, replica: AsyncEngine):
+        @event.listens_for(replica.sync_engine, "handle_error")
+        def _on_error(context):
+            if context.is_disconnect or context.connection is None:
+                self.mark_down(replica)
+
+    def mark_down(self, replica: AsyncEngine):
+        if replica not in self._down_until:
+            logger.warning(f"只读副本不可用，暂时回退: {replica.url.render_as_string(hide_password=True)}")
+        self._down_until[replica] = time.monotonic() + self.retry_seconds
+
+    def mark_up(self, replica: AsyncEngine):
+        if self._down_until.pop(replica, None) is not None:
+            logger.info(f"只读副本已恢复: {replica.url.render_as_string(hide_password=True)}")
+
+    def healthy(self) -> List[AsyncEngine]:
+        now = time.monotonic()
+        return [replica for replica in self.engines if self._down_until.get(replica, 0) <= now]
+
+    def pick(self) -> Optional[AsyncEngine]:
+        """下一个健康副本；没有可用副本时返回 None（调用方使用主库）"""
+        candidates = self.healthy()
+        if not candidates:
+            return None
+        self._next = (self._next + 1) % len(candidates)
+        return candidates[self._next]
+
+    async def check(self):
+        """探测不可用的副本"""
+        for replica in list(self._down_until):
+            try:
+                async with replica.connect() as conn:
+                    await conn.execute(text("SELECT 1"))
+            except Exception:
+                self.mark_down(replica)
+            else:
+                self.mark_up(replica)
+
+    async def _probe_loop(self):
+        while True:
+            await asyncio.sleep(self.retry_seconds)
+            try:
+                await self.check()
+            except Exception as e:
+                logger.warning(f"只读副本探活失败: {e}")
+
+    def start(self):
+        if self.engines and self._probe is None:
+            self._probe = asyncio.create_task(self._probe_loop())
+
+    async def stop(self):
+        if self._probe:
+            self._probe.cancel()
+            try:
+                await self._probe
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._probe = None
+        for replica in self.engines:
+            await replica.dispose()
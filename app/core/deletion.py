@@ -0,0 +1,147 @@
+"""
+级联删除服务
+用户、文章、评论、标签的删除以集合方式执行：每张关联表一条 DELETE ... WHERE x IN (子查询)，
+不再逐行循环；全部语句在同一个事务中提交，返回各表受影响的行数。
+SQLAdmin 后台和 REST 删除接口共用。
+"""
+
+import logging
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from fastapi import BackgroundTasks
+from sqlalchemy import delete, select, update, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.search.result_cache import search_result_cache
+from app.core.search.suggest import suggestion_index
+from app.core.search.related import related_articles
+from app.models.article import Article
+from app.models.comment import Comment
+from app.models.donation import DonationRecord
+from app.models.media import MediaFile
+from app.models.related import ArticleTermVector, RelatedArticle
+from app.models.tag import Tag, ArticleTag
+from app.models.user import User, OAuthAccount
+
+logger = logging.getLogger(__name__)
+
+# 一次删除的文章不超过该数量时逐篇更新相关文章，更多时交给每日全量重建
+# （相关文章查询会联表过滤掉已删除的文章，不会返回失效结果）
+RELATED_REFRESH_LIMIT = 20
+
+
+class DeletionResult(NamedTuple):
+    """counts 为各表受影响的行数；其余字段用于提交后同步搜索索引"""
+    counts: Dict[str, int]
+    article_ids: List[int] = []  # 删除的文章
+    tag_ids: List[int] = []  # 文章数变化的标签
+    removed_tag_ids: List[int] = []  # 删除的标签
+
+
+def _comment_tree(seed):
+    """seed 选出的评论及其全部后代回复（递归 CTE）"""
+    tree = select(Comment.id).where(seed).cte("comment_tree", recursive=True)
+    tree = tree.union_all(select(Comment.id).where(Comment.parent_id == tree.c.id))
+    return select(tree.c.id)
+
+
+class DeletionService:
+    """集合式级联删除"""
+
+    @staticmethod
+    async def _run(db: AsyncSession, statements, article_ids=(), tag_ids=(), removed_tag_ids=()) -> DeletionResult:
+        """按顺序执行 (名称, 语句)，一次提交；失败时回滚并抛出原异常"""
+        counts: Dict[str, int] = {}
+        try:
+            for name, statement in statements:
+                result = await db.execute(statement)
+                counts[name] = counts.get(name, 0) + max(result.rowcount or 0, 0)
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+        return DeletionResult(counts, list(article_ids), list(tag_ids), list(removed_tag_ids))
+
+    @staticmethod
+    async def _ids(db: AsyncSession, query) -> List[int]:
+        return list((await db.execute(query)).scalars().all())
+
+    @staticmethod
+    def _article_statements(articles) -> list:
+        """删除 articles（文章 id 子查询）及其评论、标签关联和相关文章数据"""
+        return [
+            ("comments", delete(Comment).where(Comment.article_id.in_(articles))),
+            ("article_tags", delete(ArticleTag).where(ArticleTag.article_id.in_(articles))),
+            ("term_vectors", delete(ArticleTermVector).where(ArticleTermVector.article_id.in_(articles))),
+            ("related", delete(RelatedArticle).where(RelatedArticle.article_id.in_(articles))),
+        ]
+
+    async def delete_articles(self, db: AsyncSession, article_ids: Iterable[int]) -> DeletionResult:
+        article_ids = [int(article_id) for article_id in article_ids]
+        tag_ids = await self._ids(
+            db, select(ArticleTag.tag_id).where(ArticleTag.article_id.in_(article_ids)).distinct()
+        )
+        statements = self._article_statements(article_ids)
+        statements.append(("articles", delete(Article).where(Article.id.in_(article_ids))))
+        return await self._run(db, statements, article_ids, tag_ids)
+
+    async def delete_users(self, db: AsyncSession, user_ids: Iterable[int]) -> DeletionResult:
+        """删除用户及其文章、评论（含他人对其评论的回复）和 OAuth 绑定；媒体文件和捐赠记录保留，解除关联"""
+        user_ids = [int(user_id) for user_id in user_ids]
+        articles = select(Article.id).where(Article.author_id.in_(user_ids))
+        article_ids = await self._ids(db, articles)
+        tag_ids = await self._ids(
+            db, select(ArticleTag.tag_id).where(ArticleTag.article_id.in_(articles)).distinct()
+        )
+        comments = _comment_tree(or_(Comment.author_id.in_(user_ids), Comment.article_id.in_(articles)))
+        statements = [("comments", delete(Comment).where(Comment.id.in_(comments)))]
+        statements += self._article_statements(articles)
+        statements += [
+            ("articles", delete(Article).where(Article.author_id.in_(user_ids))),
+            ("oauth_accounts", delete(OAuthAccount).where(OAuthAccount.user_id.in_(user_ids))),
+            ("media_files_detached", update(MediaFile).where(MediaFile.uploader_id.in_(user_ids)).values(uploader_id=None)),
+            ("donations_detached", update(DonationRecord).where(DonationRecord.user_id.in_(user_ids)).values(user_id=None)),
+            ("users", delete(User).where(User.id.in_(user_ids))),
+        ]
+        return await self._run(db, statements, article_ids, tag_ids)
+
+    async def delete_comments(self, db: AsyncSession, comment_ids: Iterable[int]) -> DeletionResult:
+        """删除评论及其全部回复"""
+        comment_ids = [int(comment_id) for comment_id in comment_ids]
+        comments = _comment_tree(Comment.id.in_(comment_ids))
+        return await self._run(db, [("comments", delete(Comment).where(Comment.id.in_(comments)))])
+
+    async def delete_tags(self, db: AsyncSession, tag_ids: Iterable[int]) -> DeletionResult:
+        tag_ids = [int(tag_id) for tag_id in tag_ids]
+        return await self._run(db, [
+            ("article_tags", delete(ArticleTag).where(ArticleTag.tag_id.in_(tag_ids))),
+            ("tags", delete(Tag).where(Tag.id.in_(tag_ids))),
+        ], removed_tag_ids=tag_ids)
+
+    async def after_commit(
+        self,
+        db: AsyncSession,
+        result: DeletionResult,
+        background_tasks: Optional[BackgroundTasks] = None
+    ):
+        """提交后同步搜索缓存、搜索建议和相关文章；传入 background_tasks 时相关文章在响应后更新"""
+        if result.article_ids or result.removed_tag_ids:
+            await search_result_cache.bump_generation()
+        for article_id in result.article_ids:
+            await suggestion_index.remove_article(article_id)
+        for tag_id in result.tag_ids:
+            await suggestion_index.refresh_tag(db, tag_id)
+        for tag_id in result.removed_tag_ids:
+            await suggestion_index.remove_tag(tag_id)
+
+        if len(result.article_ids) > RELATED_REFRESH_LIMIT:
+            logger.info(f"删除了 {len(result.article_ids)} 篇文章，相关文章将在每日重建时更新")
+            return
+        for article_id in result.article_ids:
+            if background_tasks is not None:
+                background_tasks.add_task(related_articles.refresh_in_background, article_id)
+            else:
+                await related_articles.refresh_in_background(article_id)
+
+
+deletion_service = DeletionService()
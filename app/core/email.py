@@ -3,7 +3,7 @@ import logging
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from typing import Optional
-from app.core.config import settings, reload_settings
+from app.core.config import settings, settings_store
 
 logger = logging.getLogger(__name__)
 
@@ -12,22 +12,25 @@ class EmailService:
     """邮件服务类"""
     
     def __init__(self):
-        self._reload_config()
+        # 使用已加载的全局配置，不在导入时重新解析 .env
+        self._apply_config(settings)
+        self._config_version = settings_store.version
     
     def _reload_config(self):
-        """重新加载配置"""
-        # 重新加载全局配置
-        reload_settings()
-        from app.core.config import settings
-        
+        """配置快照版本变化（.env 修改或管理员重新加载）时更新邮件配置"""
+        current = settings_store.current()
+        if settings_store.version != self._config_version:
+            self._apply_config(current)
+            self._config_version = settings_store.version
+            logger.info(f"邮件服务配置已重新加载: enabled={self.enabled}")
+    
+    def _apply_config(self, settings):
         self.smtp_server = settings.smtp_server
         self.smtp_port = settings.smtp_port
         self.email_user = settings.email_user
         self.email_password = settings.email_password
         self.email_from = settings.email_from or settings.email_user
         self.enabled = settings.email_enabled
-        
-        logger.info(f"邮件服务配置已重新加载: enabled={self.enabled}")
     
     def _create_message(self, to_email: str, subject: str, body: str, html_body: Optional[str] = None) -> MIMEMultipart:
         """创建邮件消息"""
@@ -49,7 +52,7 @@ class EmailService:
     
     def send_email(self, to_email: str, subject: str, body: str, html_body: Optional[str] = None) -> bool:
         """发送邮件"""
-        # 每次发送前重新加载配置，确保获取最新的EMAIL_ENABLED状态
+        # 每次发送前检查配置版本，确保获取最新的EMAIL_ENABLED状态
         self._reload_config()
         
         if not self.enabled:
@@ -56,4 +56,14 @@ class ConflictError(BlogException):
         super().__init__(
             status_code=status.HTTP_409_CONFLICT,
             detail=detail
-        ) 
\ No newline at end of file
+        ) 
+
+
+class ServiceUnavailableError(BlogException):
+    """Service temporarily unavailable"""
+    def __init__(self, detail: str = "Service temporarily unavailable"):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=detail,
+            headers={"Retry-After": "5"}
+        )
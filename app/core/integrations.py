@@ -0,0 +1,35 @@
+"""
+第三方集成预热
+PayPal、微信支付和 LaTeX 渲染器都在首次使用时才初始化（获取令牌、创建客户端、检查 pdflatex），
+导入模块不做任何 I/O。开启 INTEGRATION_WARMUP 后，启动完成时在后台线程中逐个预热，
+首个支付/渲染请求不必再等待初始化；预热出错只记录日志，不影响启动。
+"""
+
+import time
+import asyncio
+import logging
+
+from app.core.latex import latex_renderer
+from app.core.paypal import paypal_pay
+from app.core.wechat_pay import wechat_pay_v3
+
+logger = logging.getLogger(__name__)
+
+# (名称, 提供者)：提供者实现 warm_up()
+INTEGRATIONS = [
+    ("paypal", paypal_pay),
+    ("wechat_pay", wechat_pay_v3),
+    ("latex", latex_renderer),
+]
+
+
+async def warm_up_integrations():
+    """在线程池中依次预热各集成，不阻塞事件循环"""
+    for name, provider in INTEGRATIONS:
+        started = time.perf_counter()
+        try:
+            await asyncio.to_thread(provider.warm_up)
+        except Exception as e:
+            logger.warning(f"{name} 预热失败: {e}")
+            continue
+        logger.info(f"{name} 预热完成，用时 {(time.perf_counter() - started) * 1000:.0f} ms")
@@ -3,26 +3,213 @@ LaTeX渲染服务
 支持数学公式渲染和LaTeX内容处理
 """
 
+import os
 import re
-import base64
+import json
+import asyncio
 import hashlib
-import os
+import shutil
+import tempfile
+import uuid
 from typing import List, Dict, Optional, Tuple
 from pathlib import Path
 import logging
 
+from fastapi import Request
+
+from app.core.config import settings
+from app.core.exceptions import ServiceUnavailableError
+from app.core.latex_tokenizer import tokenize_math, substitute_math
+from app.core.redis import redis_manager
+
 logger = logging.getLogger(__name__)
 
 
+# 渲染模板版本：修改 LATEX_TEMPLATE 或渲染参数时递增，使旧缓存自然失效
+LATEX_TEMPLATE_VERSION = 1
+
+# LaTeX模板
+LATEX_TEMPLATE = r"""
+\documentclass[12pt]{article}
+\usepackage[utf8]{inputenc}
+\usepackage{amsmath}
+\usepackage{amssymb}
+\usepackage{amsfonts}
+\usepackage{geometry}
+\usepackage{color}
+\usepackage{graphicx}
+\usepackage{mathtools}
+\usepackage{physics}
+\usepackage{siunitx}
+\usepackage{chemfig}
+\usepackage{tikz}
+\usepackage{pgfplots}
+\pgfplotsset{compat=1.18}
+
+\geometry{margin=1in}
+\pagestyle{empty}
+
+\begin{document}
+\thispagestyle{empty}
+
+%s
+
+\end{document}
+"""
+
+
+class LatexRenderCache:
+    """基于内容寻址的LaTeX渲染结果缓存
+    
+    文件名由 (模板版本, 块类型, 公式内容) 的完整哈希决定；命中时刷新文件
+    mtime 作为最近访问时间，目录总大小超过上限时按 mtime 淘汰最旧的文件。
+    
+    图片URL会被保存进文章内容，淘汰后仍可能被请求：每个公式的源码另存在 sources/ 下
+    （只有几百字节，不参与淘汰），请求已淘汰的图片时按源码重新渲染。
+    """
+    
+    URL_PREFIX = "/api/v1/articles/latex/"
+    SOURCE_DIR = "sources"
+    _FILENAME_RE = re.compile(r"latex_([0-9a-f]{64})\.(?:png|svg)")
+    
+    def __init__(self, cache_dir: Path, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._size: Optional[int] = None  # 首次写入时再扫描目录
+        
+        # 统计信息（按进程）
+        self.hits = 0
+        self.misses = 0
+        self.deduplicated = 0
+        self.evictions = 0
+    
+    @staticmethod
+    def key(latex_content: str, block_type: str) -> str:
+        payload = f"{LATEX_TEMPLATE_VERSION}\0{block_type}\0{latex_content}"
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def path_for(self, key: str, ext: str) -> Path:
+        return self.cache_dir / f"latex_{key}.{ext}"
+    
+    def url_for(self, path: Path) -> str:
+        return f"{self.URL_PREFIX}{path.name}"
+    
+    def source_path(self, key: str) -> Path:
+        return self.cache_dir / self.SOURCE_DIR / f"{key}.json"
+    
+    def save_source(self, key: str, latex_content: str, block_type: str):
+        """保存公式源码，供图片被淘汰后重新渲染"""
+        path = self.source_path(key)
+        if path.exists():
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp_file.write_text(
+            json.dumps({"latex_content": latex_content, "block_type": block_type}, ensure_ascii=False),
+            encoding='utf-8'
+        )
+        os.replace(tmp_file, path)
+    
+    def load_source(self, filename: str) -> Optional[Tuple[str, str]]:
+        """按图片文件名查找公式源码，返回 (公式内容, 块类型)；不是缓存文件名或没有源码时为 None"""
+        match = self._FILENAME_RE.fullmatch(filename)
+        if not match:
+            return None
+        try:
+            source = json.loads(self.source_path(match.group(1)).read_text(encoding='utf-8'))
+        except (FileNotFoundError, ValueError):
+            return None
+        return source["latex_content"], source["block_type"]
+    
+    def lookup(self, path: Path) -> Optional[str]:
+        """查找缓存，命中时刷新访问时间"""
+        try:
+            os.utime(path, None)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return self.url_for(path)
+    
+    def record_write(self, path: Path):
+        """记录新写入的文件，超出容量时触发淘汰"""
+        if self._size is None:
+            self._size = self._scan_size()
+        else:
+            try:
+                self._size += path.stat().st_size
+            except FileNotFoundError:
+                pass
+        if self._size > self.max_bytes:
+            self.evict()
+    
+    def _scan_size(self) -> int:
+        return sum(f.stat().st_size for f in self.cache_dir.glob("latex_*") if f.is_file())
+    
+    def evict(self, target_ratio: float = 0.9):
+        """按最近访问时间淘汰文件，直到总大小降到上限的 target_ratio 以下"""
+        entries = []
+        for f in self.cache_dir.glob("latex_*"):
+            try:
+                st = f.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, f))
+        entries.sort(key=lambda e: e[0])
+        
+        total = sum(e[1] for e in entries)
+        target = int(self.max_bytes * target_ratio)
+        for _, size, f in entries:
+            if total <= target:
+                break
+            try:
+                f.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+            self.evictions += 1
+        self._size = total
+        logger.info(f"LaTeX缓存淘汰完成，当前大小 {total} 字节")
+    
+    def stats(self) -> Dict[str, int]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0,
+            "deduplicated": self.deduplicated,
+            "evictions": self.evictions,
+            "size_bytes": self._size if self._size is not None else self._scan_size(),
+            "max_bytes": self.max_bytes,
+        }
+
+
 class LatexRenderer:
     """LaTeX渲染器 - 简化版本"""
     
-    def __init__(self, output_dir: str = "uploads/latex"):
+    def __init__(
+        self,
+        output_dir: str = "uploads/latex",
+        command_timeout: float = 30,
+        cache_max_bytes: int = 512 * 1024 * 1024
+    ):
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
-        
-        # 检查是否有LaTeX支持
-        self.has_latex_support = self._check_latex_support()
+        # 单条外部命令（pdflatex / convert）的超时时间
+        self.command_timeout = command_timeout
+        self.cache = LatexRenderCache(self.output_dir, cache_max_bytes)
+        self._has_latex_support: Optional[bool] = None
+    
+    @property
+    def has_latex_support(self) -> bool:
+        # 首次使用（或启动预热）时再检查 pdflatex，导入模块时不启动子进程
+        if self._has_latex_support is None:
+            self._has_latex_support = self._check_latex_support()
+        return self._has_latex_support
+    
+    def warm_up(self):
+        """预先检查LaTeX支持"""
+        return self.has_latex_support
         
     def _check_latex_support(self) -> bool:
         """检查系统是否有LaTeX支持"""
@@ -36,185 +223,110 @@ class LatexRenderer:
             return False
     
     def extract_latex_blocks(self, content: str) -> List[Dict[str, str]]:
-        """从内容中提取LaTeX块"""
-        latex_blocks = []
-        
-        # 匹配行内数学公式 $...$ 或 \(...\)
-        inline_patterns = [
-            r'\$([^$]+)\$',
-            r'\\\(([^)]+)\\\)'
-        ]
-        
-        # 匹配块级数学公式 $$...$$ 或 \[...\]
-        block_patterns = [
-            r'\$\$([^$]+)\$\$',
-            r'\\\[([^\]]+)\\\]'
-        ]
-        
-        # 匹配LaTeX环境
-        environment_patterns = [
-            r'\\begin\{([^}]+)\}(.*?)\\end\{\1\}',
-            r'\\begin\{([^}]+)\}(.*?)\\end\{([^}]+)\}'
-        ]
-        
-        # 处理行内公式
-        for pattern in inline_patterns:
-            matches = re.finditer(pattern, content, re.DOTALL)
-            for match in matches:
-                latex_blocks.append({
-                    'type': 'inline',
-                    'content': match.group(1),
-                    'start': match.start(),
-                    'end': match.end(),
-                    'original': match.group(0)
-                })
-        
-        # 处理块级公式
-        for pattern in block_patterns:
-            matches = re.finditer(pattern, content, re.DOTALL)
-            for match in matches:
-                latex_blocks.append({
-                    'type': 'block',
-                    'content': match.group(1),
-                    'start': match.start(),
-                    'end': match.end(),
-                    'original': match.group(0)
-                })
-        
-        # 处理LaTeX环境
-        for pattern in environment_patterns:
-            matches = re.finditer(pattern, content, re.DOTALL)
-            for match in matches:
-                latex_blocks.append({
-                    'type': 'environment',
-                    'content': match.group(0),
-                    'start': match.start(),
-                    'end': match.end(),
-                    'original': match.group(0)
-                })
-        
-        return sorted(latex_blocks, key=lambda x: x['start'])
+        """从内容中提取LaTeX块（单遍扫描，结果按位置排序且互不重叠）"""
+        return [span.as_dict() for span in tokenize_math(content)]
+    
+    def output_path(self, latex_content: str, block_type: str = 'block') -> Path:
+        """公式对应的缓存文件路径（无LaTeX支持时为SVG占位符）"""
+        ext = 'png' if self.has_latex_support else 'svg'
+        return self.cache.path_for(self.cache.key(latex_content, block_type), ext)
+    
+    def lookup_cached(self, latex_content: str, block_type: str = 'block') -> Optional[str]:
+        """命中缓存时返回图片URL"""
+        return self.cache.lookup(self.output_path(latex_content, block_type))
     
-    def render_latex_to_image(self, latex_content: str, block_type: str = 'block') -> Optional[str]:
-        """将LaTeX内容渲染为图片 - 简化版本"""
+    async def render_latex_to_image(self, latex_content: str, block_type: str = 'block') -> Optional[str]:
+        """将LaTeX内容渲染为图片"""
         try:
-            # 生成唯一文件名
-            content_hash = hashlib.md5(latex_content.encode()).hexdigest()[:8]
-            filename = f"latex_{content_hash}.png"
-            filepath = self.output_dir / filename
+            filepath = self.output_path(latex_content, block_type)
+            self.cache.save_source(self.cache.key(latex_content, block_type), latex_content, block_type)
             
-            # 如果文件已存在，直接返回
+            # 如果文件已存在（例如刚由其他进程渲染完成），直接返回
             if filepath.exists():
-                return f"/api/v1/articles/latex/{filename}"
+                return self.cache.url_for(filepath)
             
             if self.has_latex_support:
-                return self._render_with_latex(latex_content, block_type, filepath)
+                image_url = await self._render_with_latex(latex_content, block_type, filepath)
             else:
-                return self._render_with_placeholder(latex_content, block_type, filepath)
+                image_url = self._render_with_placeholder(latex_content, block_type, filepath)
+            
+            if image_url:
+                self.cache.record_write(filepath)
+            return image_url
                 
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
             logger.error(f"LaTeX渲染失败: {e}")
             return None
     
-    def _render_with_latex(self, latex_content: str, block_type: str, filepath: Path) -> Optional[str]:
-        """使用系统LaTeX渲染"""
+    async def _run_command(self, args: List[str], timeout: float) -> Tuple[int, str]:
+        """异步执行外部命令，超时或被取消时杀掉子进程"""
+        proc = await asyncio.create_subprocess_exec(
+            *args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
         try:
-            import subprocess
-            import tempfile
-            
-            # LaTeX模板
-            latex_template = r"""
-\documentclass[12pt]{article}
-\usepackage[utf8]{inputenc}
-\usepackage{amsmath}
-\usepackage{amssymb}
-\usepackage{amsfonts}
-\usepackage{geometry}
-\usepackage{color}
-\usepackage{graphicx}
-\usepackage{mathtools}
-\usepackage{physics}
-\usepackage{siunitx}
-\usepackage{chemfig}
-\usepackage{tikz}
-\usepackage{pgfplots}
-\pgfplotsset{compat=1.18}
-
-\geometry{margin=1in}
-\pagestyle{empty}
-
-\begin{document}
-\thispagestyle{empty}
-
-%s
-
-\end{document}
-"""
-            
-            # 准备LaTeX内容
-            if block_type == 'inline':
-                latex_doc = latex_template % f"${latex_content}$"
-            else:
-                latex_doc = latex_template % latex_content
-            
-            # 创建临时文件
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.tex', delete=False) as f:
-                f.write(latex_doc)
-                tex_file = f.name
+            _, stderr = await asyncio.wait_for(proc.communicate(), timeout=timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+            raise
+        return proc.returncode, stderr.decode(errors='ignore')
+    
+    async def _render_with_latex(self, latex_content: str, block_type: str, filepath: Path) -> Optional[str]:
+        """使用系统LaTeX渲染（pdflatex + ImageMagick，均为异步子进程）"""
+        # 准备LaTeX内容
+        if block_type == 'inline':
+            latex_doc = LATEX_TEMPLATE % f"${latex_content}$"
+        else:
+            latex_doc = LATEX_TEMPLATE % latex_content
+        
+        # 每个任务使用独立的临时目录，避免并发渲染互相覆盖中间文件
+        with tempfile.TemporaryDirectory(prefix="latex_") as work_dir:
+            tex_file = Path(work_dir) / "formula.tex"
+            tex_file.write_text(latex_doc, encoding='utf-8')
             
             try:
                 # 编译LaTeX文档
-                result = subprocess.run([
+                returncode, stderr = await self._run_command([
                     'pdflatex',
                     '-interaction=nonstopmode',
-                    '-output-directory=' + str(self.output_dir),
-                    tex_file
-                ], capture_output=True, text=True, timeout=30)
+                    '-output-directory=' + work_dir,
+                    str(tex_file)
+                ], timeout=self.command_timeout)
                 
-                if result.returncode != 0:
-                    logger.error(f"LaTeX compilation failed: {result.stderr}")
+                if returncode != 0:
+                    logger.error(f"LaTeX compilation failed: {stderr}")
                     return None
                 
-                # 获取PDF文件路径
-                pdf_file = Path(tex_file).with_suffix('.pdf')
-                pdf_path = self.output_dir / pdf_file.name
-                
+                pdf_path = tex_file.with_suffix('.pdf')
                 if not pdf_path.exists():
                     logger.error("PDF file not generated")
                     return None
                 
-                # 转换为PNG
-                result = subprocess.run([
+                # 转换为PNG，先写入临时文件再原子替换，避免读到半成品
+                tmp_png = Path(work_dir) / filepath.name
+                returncode, stderr = await self._run_command([
                     'convert',
                     '-density', '300',
                     '-quality', '90',
                     str(pdf_path),
-                    str(filepath)
-                ], capture_output=True, text=True, timeout=30)
+                    str(tmp_png)
+                ], timeout=self.command_timeout)
                 
-                if result.returncode != 0:
-                    logger.error(f"PDF to PNG conversion failed: {result.stderr}")
+                if returncode != 0:
+                    logger.error(f"PDF to PNG conversion failed: {stderr}")
                     return None
                 
-                # 清理临时文件
-                os.unlink(tex_file)
-                for ext in ['.aux', '.log', '.out', '.pdf']:
-                    temp_file = self.output_dir / Path(tex_file).with_suffix(ext).name
-                    if temp_file.exists():
-                        temp_file.unlink()
-                
-                return f"/api/v1/articles/latex/{filename}"
+                shutil.move(str(tmp_png), str(filepath))
+                return self.cache.url_for(filepath)
                 
-            except subprocess.TimeoutExpired:
+            except asyncio.TimeoutError:
                 logger.error("LaTeX rendering timeout")
                 return None
-            except Exception as e:
-                logger.error(f"LaTeX rendering error: {e}")
-                return None
-                
-        except Exception as e:
-            logger.error(f"LaTeX rendering failed: {e}")
-            return None
     
     def _render_with_placeholder(self, latex_content: str, block_type: str, filepath: Path) -> Optional[str]:
         """使用占位符渲染（当没有LaTeX支持时）"""
@@ -231,41 +343,19 @@ class LatexRenderer:
   </text>
 </svg>"""
             
-            # 保存SVG文件
+            # 保存SVG文件（先写临时文件再原子替换）
             svg_file = filepath.with_suffix('.svg')
-            svg_file.write_text(svg_content, encoding='utf-8')
+            tmp_file = svg_file.with_name(f".{svg_file.name}.{os.getpid()}.tmp")
+            tmp_file.write_text(svg_content, encoding='utf-8')
+            os.replace(tmp_file, svg_file)
             
             # 返回SVG URL
-            return f"/api/v1/articles/latex/{svg_file.name}"
+            return self.cache.url_for(svg_file)
             
         except Exception as e:
             logger.error(f"占位符渲染失败: {e}")
             return None
     
-    def process_content(self, content: str) -> Tuple[str, List[Dict[str, str]]]:
-        """处理内容中的LaTeX，返回处理后的内容和LaTeX块信息"""
-        latex_blocks = self.extract_latex_blocks(content)
-        processed_content = content
-        rendered_blocks = []
-        
-        # 从后往前替换，避免位置偏移
-        for block in reversed(latex_blocks):
-            image_url = self.render_latex_to_image(block['content'], block['type'])
-            if image_url:
-                rendered_blocks.append({
-                    **block,
-                    'image_url': image_url
-                })
-                # 替换原内容为图片标记
-                placeholder = f"![LaTeX]({image_url})"
-                processed_content = (
-                    processed_content[:block['start']] + 
-                    placeholder + 
-                    processed_content[block['end']:]
-                )
-        
-        return processed_content, rendered_blocks
-    
     def validate_latex(self, latex_content: str) -> Tuple[bool, str]:
         """验证LaTeX语法"""
         try:
@@ -294,5 +384,279 @@ class LatexRenderer:
             return False, f"LaTeX验证失败: {str(e)}"
 
 
+# 只删除自己持有的锁：锁已过期并被其他 worker 取得时，GET 返回的不再是本次的令牌
+RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class LatexRenderService:
+    """异步LaTeX渲染服务
+    
+    在渲染器之上提供有界并发（同时运行的子进程数）、队列深度限制
+    （排队已满时返回503）、单任务超时以及客户端断开时的取消。
+    """
+    
+    def __init__(
+        self,
+        renderer: LatexRenderer,
+        max_workers: int = 2,
+        max_queue: int = 16,
+        job_timeout: float = 60
+    ):
+        self.renderer = renderer
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self.job_timeout = job_timeout
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._pending = 0  # 运行中 + 排队中的渲染任务数
+        self._inflight: Dict[str, Dict] = {}  # 缓存键 -> 正在进行的渲染任务
+    
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # 延迟创建，确保绑定到运行中的事件循环
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+        return self._semaphore
+    
+    def _check_capacity(self):
+        if self._pending >= self.max_workers + self.max_queue:
+            raise ServiceUnavailableError("LaTeX渲染队列已满，请稍后重试")
+    
+    async def render(self, latex_content: str, block_type: str = 'block') -> Optional[str]:
+        """渲染单个公式
+        
+        缓存命中直接返回；相同公式的并发请求共享同一个渲染任务（single-flight），
+        只有最后一个等待者取消时才真正取消渲染。队列已满时抛出 ServiceUnavailableError。
+        """
+        cached_url = self.renderer.lookup_cached(latex_content, block_type)
+        if cached_url:
+            return cached_url
+        return await self._render_shared(latex_content, block_type)
+    
+    async def _render_shared(self, latex_content: str, block_type: str) -> Optional[str]:
+        """加入（或发起）同一公式的共享渲染任务"""
+        key = self.renderer.cache.key(latex_content, block_type)
+        entry = self._inflight.get(key)
+        if entry is None:
+            self._check_capacity()
+            self._pending += 1
+            task = asyncio.ensure_future(self._render_once(key, latex_content, block_type))
+            entry = self._inflight[key] = {"task": task, "waiters": 0}
+            task.add_done_callback(lambda _t, k=key: self._on_render_done(k))
+        else:
+            self.renderer.cache.deduplicated += 1
+        
+        entry["waiters"] += 1
+        try:
+            return await asyncio.shield(entry["task"])
+        except asyncio.CancelledError:
+            if entry["waiters"] == 1 and not entry["task"].done():
+                entry["task"].cancel()
+            raise
+        finally:
+            entry["waiters"] -= 1
+    
+    def _on_render_done(self, key: str):
+        self._pending -= 1
+        self._inflight.pop(key, None)
+    
+    async def _render_once(self, key: str, latex_content: str, block_type: str) -> Optional[str]:
+        """实际执行一次渲染：有界并发，取得渲染名额后再跨进程加锁，整体超时
+
+        锁的有效期按 job_timeout 计算，只覆盖真正渲染的时间；在本进程排队期间不持有锁，
+        不会因为排队过久而在渲染中途过期、让其他 worker 重复渲染。
+        """
+        lock_key = f"latex_render_lock:{key}"
+        async with self.semaphore:
+            token = await self._acquire_worker_lock(lock_key)
+            if token is not None:
+                try:
+                    return await asyncio.wait_for(
+                        self.renderer.render_latex_to_image(latex_content, block_type),
+                        timeout=self.job_timeout
+                    )
+                except asyncio.TimeoutError:
+                    logger.error(f"LaTeX渲染任务超时（{self.job_timeout}s）")
+                    return None
+                finally:
+                    await self._release_worker_lock(lock_key, token)
+        # 其他 worker 正在渲染同一个公式：释放渲染名额后等待其结果落盘
+        return await self._wait_for_other_worker(latex_content, block_type)
+    
+    async def _acquire_worker_lock(self, lock_key: str) -> Optional[str]:
+        """通过 Redis SET NX 实现跨 worker 的 single-flight
+
+        返回本次持有者的令牌（释放时核对），其他 worker 持有锁时返回 None；Redis 不可用时直接放行（空令牌）
+        """
+        if not redis_manager.redis:
+            return ""
+        token = f"{os.getpid()}:{uuid.uuid4().hex}"
+        try:
+            acquired = await redis_manager.redis.set(lock_key, token, nx=True, ex=int(self.job_timeout) + 5)
+            return token if acquired else None
+        except Exception as e:
+            logger.warning(f"获取LaTeX渲染锁失败，直接渲染: {e}")
+            return ""
+    
+    async def _release_worker_lock(self, lock_key: str, token: str):
+        """比较令牌后删除，不会删掉锁过期后其他 worker 取得的锁"""
+        if not token or not redis_manager.redis:
+            return
+        try:
+            await redis_manager.redis.eval(RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+        except Exception as e:
+            logger.warning(f"释放LaTeX渲染锁失败: {e}")
+    
+    async def _wait_for_other_worker(self, latex_content: str, block_type: str, poll_interval: float = 0.2) -> Optional[str]:
+        filepath = self.renderer.output_path(latex_content, block_type)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.job_timeout
+        while loop.time() < deadline:
+            await asyncio.sleep(poll_interval)
+            if filepath.exists():
+                self.renderer.cache.deduplicated += 1
+                return self.renderer.cache.url_for(filepath)
+        logger.error("等待其他进程渲染LaTeX超时")
+        return None
+    
+    async def render_for_request(
+        self,
+        request: Request,
+        latex_content: str,
+        block_type: str = 'block',
+        poll_interval: float = 0.5
+    ) -> Optional[str]:
+        """渲染公式，并在客户端断开连接时取消任务（同时杀掉子进程）"""
+        task = asyncio.ensure_future(self.render(latex_content, block_type))
+        try:
+            while True:
+                done, _ = await asyncio.wait({task}, timeout=poll_interval)
+                if done:
+                    return task.result()
+                if await request.is_disconnected():
+                    logger.info("客户端已断开，取消LaTeX渲染任务")
+                    task.cancel()
+                    return None
+        finally:
+            if not task.done():
+                task.cancel()
+    
+    async def restore(self, filename: str) -> Optional[Path]:
+        """已被淘汰的缓存图片：按保存的源码重新渲染，返回文件路径；没有源码或渲染失败时为 None"""
+        source = self.renderer.cache.load_source(filename)
+        if source is None:
+            return None
+        latex_content, block_type = source
+        if not await self.render(latex_content, block_type):
+            return None
+        path = self.renderer.output_path(latex_content, block_type)
+        return path if path.exists() else None
+    
+    async def render_batch(
+        self,
+        formulas: List[Tuple[str, str]],
+        time_budget: float
+    ) -> Dict[Tuple[str, str], Dict[str, Optional[str]]]:
+        """并发渲染一组（已去重的）公式，返回每个公式的渲染结果
+        
+        缓存命中的公式直接返回；其余公式最多占用 max_workers 个队列位置，
+        避免单个批量请求占满队列。超出时间预算的公式标记为 timeout。
+        """
+        limiter = asyncio.Semaphore(self.max_workers)
+        
+        async def render_one(latex_content: str, block_type: str) -> Optional[str]:
+            cached_url = self.renderer.lookup_cached(latex_content, block_type)
+            if cached_url:
+                return cached_url
+            async with limiter:
+                return await self._render_shared(latex_content, block_type)
+        
+        tasks = {
+            asyncio.ensure_future(render_one(latex_content, block_type)): (latex_content, block_type)
+            for latex_content, block_type in formulas
+        }
+        pending = set()
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=time_budget)
+            for task in pending:
+                task.cancel()
+        
+        results = {}
+        for task, formula in tasks.items():
+            if task in pending:
+                results[formula] = {"status": "timeout", "image_url": None, "message": "渲染超时"}
+            elif isinstance(task.exception(), ServiceUnavailableError):
+                results[formula] = {"status": "busy", "image_url": None, "message": task.exception().detail}
+            elif task.exception() is not None or not task.result():
+                results[formula] = {"status": "failed", "image_url": None, "message": "LaTeX渲染失败"}
+            else:
+                results[formula] = {"status": "ok", "image_url": task.result(), "message": None}
+        return results
+    
+    async def process_content(self, content: str) -> Tuple[str, List[Dict[str, str]]]:
+        """处理内容中的LaTeX，返回处理后的内容和LaTeX块信息
+        
+        相同公式只渲染一次；未命中缓存的公式与 render_batch 一样最多占用 max_workers 个队列位置，
+        公式再多的文章也不会因为自己占满队列而返回503。渲染完成后一次性拼接出替换后的内容。
+        """
+        spans = tokenize_math(content)
+        limiter = asyncio.Semaphore(self.max_workers)
+        
+        async def render_one(latex_content: str, block_type: str) -> Optional[str]:
+            cached_url = self.renderer.lookup_cached(latex_content, block_type)
+            if cached_url:
+                return cached_url
+            async with limiter:
+                return await self._render_shared(latex_content, block_type)
+        
+        formulas = list(dict.fromkeys((span.content, span.type) for span in spans))
+        image_urls = await asyncio.gather(*(render_one(*formula) for formula in formulas))
+        url_by_formula = dict(zip(formulas, image_urls))
+        url_by_start = {
+            span.start: url_by_formula[(span.content, span.type)]
+            for span in spans if url_by_formula[(span.content, span.type)]
+        }
+        
+        processed_content = substitute_math(
+            content,
+            spans,
+            lambda span: f"![LaTeX]({url_by_start[span.start]})" if span.start in url_by_start else None
+        )
+        rendered_blocks = [
+            {**span.as_dict(), 'image_url': url_by_start[span.start]}
+            for span in spans if span.start in url_by_start
+        ]
+        return processed_content, rendered_blocks
+    
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """渲染队列与缓存状态"""
+        running = self.max_workers - self.semaphore._value if self._semaphore else 0
+        return {
+            "queue": {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "running": running,
+                "pending": self._pending,
+                "inflight": len(self._inflight),
+            },
+            "cache": self.renderer.cache.stats(),
+        }
+
+
 # 全局LaTeX渲染器实例
-latex_renderer = LatexRenderer() 
\ No newline at end of file
+latex_renderer = LatexRenderer(
+    command_timeout=settings.latex_command_timeout,
+    cache_max_bytes=settings.latex_cache_max_mb * 1024 * 1024
+)
+
+# 全局LaTeX渲染服务实例
+latex_render_service = LatexRenderService(
+    latex_renderer,
+    max_workers=settings.latex_render_workers,
+    max_queue=settings.latex_render_queue_size,
+    job_timeout=settings.latex_render_timeout
+) 
\ No newline at end of file
@@ -0,0 +1,159 @@
+"""
+LaTeX/Markdown 数学公式单遍扫描分词器
+一次线性扫描输出互不重叠的公式片段，跳过代码块和行内代码，
+供公式检测、提取和替换共用
+"""
+
+import re
+from functools import lru_cache
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional
+
+
+class MathSpan(NamedTuple):
+    """一个公式片段，start/end 为在原文中的位置"""
+    type: str  # inline / block / environment
+    content: str
+    start: int
+    end: int
+    original: str
+
+    def as_dict(self) -> Dict:
+        return self._asdict()
+
+
+# 所有可能开启一个片段的记号合并为一个正则，按优先级排列：
+# 代码围栏 > 行内代码 > 转义字符 > $$ > $ > \( > \[ > \begin{env}
+_TOKEN_RE = re.compile(
+    r"^[ ]{0,3}(?P<fence>`{3,}|~{3,})"
+    r"|(?P<code>`+)"
+    r"|(?P<escape>\\[$\\])"
+    r"|(?P<display>\$\$)"
+    r"|(?P<dollar>\$)"
+    r"|(?P<paren>\\\()"
+    r"|(?P<bracket>\\\[)"
+    r"|\\begin\{(?P<env>[^{}\n]+)\}",
+    re.MULTILINE
+)
+
+
+@lru_cache(maxsize=32)
+def _fence_close_re(char: str, length: int) -> "re.Pattern[str]":
+    return re.compile(r"^[ ]{0,3}%s{%d,}[ \t]*$" % (re.escape(char), length), re.MULTILINE)
+
+
+@lru_cache(maxsize=32)
+def _code_close_re(length: int) -> "re.Pattern[str]":
+    return re.compile(r"(?<!`)`{%d}(?!`)" % length)
+
+
+def iter_math_spans(content: str) -> Iterator[MathSpan]:
+    """按出现顺序逐个产出公式片段
+
+    整体为线性时间：每次查找闭合记号要么成功并跳过该片段，要么失败并被记录，
+    之后不再为同一种闭合记号重复扫描剩余文本。
+    """
+    pos = 0
+    length = len(content)
+    missing = set()  # 已确认在剩余文本中不存在的闭合记号
+
+    def find_closer(closer: str, start: int) -> int:
+        if closer in missing:
+            return -1
+        idx = content.find(closer, start)
+        if idx < 0:
+            missing.add(closer)
+        return idx
+
+    while pos < length:
+        match = _TOKEN_RE.search(content, pos)
+        if not match:
+            return
+        kind = match.lastgroup
+        start = match.start()
+        after = match.end()
+
+        if kind == "fence":
+            # 围栏代码块：跳到闭合围栏行之后；没有闭合则一直到文末
+            fence = match.group("fence")
+            line_end = content.find("\n", after)
+            if line_end < 0:
+                return
+            close = _fence_close_re(fence[0], len(fence)).search(content, line_end + 1)
+            if not close:
+                return
+            pos = close.end()
+            continue
+
+        if kind == "code":
+            ticks = match.group("code")
+            key = "`" * len(ticks)
+            close = None if key in missing else _code_close_re(len(ticks)).search(content, after)
+            if close:
+                pos = close.end()
+            else:
+                missing.add(key)
+                pos = after
+            continue
+
+        if kind == "escape":
+            pos = after
+            continue
+
+        if kind == "env":
+            name = match.group("env")
+            closer = "\\end{%s}" % name
+            end = find_closer(closer, after)
+            if end < 0:
+                pos = after
+                continue
+            end += len(closer)
+            original = content[start:end]
+            yield MathSpan("environment", original, start, end, original)
+            pos = end
+            continue
+
+        if kind == "display":
+            span_type, closer = "block", "$$"
+        elif kind == "dollar":
+            span_type, closer = "inline", "$"
+        elif kind == "paren":
+            span_type, closer = "inline", "\\)"
+        else:
+            span_type, closer = "block", "\\]"
+
+        end = find_closer(closer, after)
+        if end <= after:
+            # 未闭合或内容为空，按普通文本处理
+            pos = after
+            continue
+        yield MathSpan(span_type, content[after:end], start, end + len(closer), content[start:end + len(closer)])
+        pos = end + len(closer)
+
+
+def tokenize_math(content: str) -> List[MathSpan]:
+    """返回全部公式片段（按位置排序，互不重叠）"""
+    return list(iter_math_spans(content))
+
+
+def contains_math(content: str) -> bool:
+    """内容中是否包含公式，找到第一个片段即返回"""
+    return next(iter_math_spans(content), None) is not None
+
+
+def substitute_math(
+    content: str,
+    spans: List[MathSpan],
+    replace: Callable[[MathSpan], Optional[str]]
+) -> str:
+    """按片段替换内容，replace 返回 None 时保留原文；最终只做一次 join"""
+    parts = []
+    last = 0
+    for span in spans:
+        replacement = replace(span)
+        if replacement is None:
+            continue
+        parts.append(content[last:span.start])
+        parts.append(replacement)
+        last = span.end
+    parts.append(content[last:])
+    return "".join(parts)
@@ -6,11 +6,12 @@ from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.middleware.sessions import SessionMiddleware
 from app.core.config import settings
-from app.core.redis import redis_manager
 from app.core.security import verify_token
 from app.core.exceptions import AuthenticationError
 from app.models.user import User
-from app.core.database import async_session
+from app.core.database import async_session, replicas, PRIMARY_COOKIE
+from app.core.unit_of_work import ReleaseSessionMiddleware, UnitOfWorkMiddleware, current_unit_of_work
+from app.core.token_revocation import token_revocation
 from sqlalchemy import select
 
 # Configure logging
@@ -36,6 +37,22 @@ class LoggingMiddleware(BaseHTTPMiddleware):
         return response
 
 
+class ReadYourWritesMiddleware(BaseHTTPMiddleware):
+    """写请求成功后设置短期 cookie，该客户端随后的读请求走主库，不受副本复制延迟影响"""
+    
+    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+        response = await call_next(request)
+        if request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+            response.set_cookie(
+                PRIMARY_COOKIE,
+                "1",
+                max_age=settings.db_read_your_writes_seconds,
+                httponly=True,
+                samesite="lax"
+            )
+        return response
+
+
 class AuthMiddleware(BaseHTTPMiddleware):
     """Authentication middleware"""
     
@@ -117,6 +134,13 @@ class AuthMiddleware(BaseHTTPMiddleware):
                 and request.method == "GET"
                 and len(request.url.path.split("/")) == 6
             )
+            # 允许匿名访问 /api/v1/articles/{id}/related 相关文章
+            or (
+                request.url.path.startswith("/api/v1/articles/")
+                and request.url.path.endswith("/related")
+                and request.method == "GET"
+                and len(request.url.path.split("/")) == 6
+            )
         )
         logger.info(f"Auth check for path: {request.url.path}, normalized: {normalized_path}, is_public: {is_public}")
         logger.info(f"Normalized public paths: {normalized_public_paths}")
@@ -138,12 +162,6 @@ class AuthMiddleware(BaseHTTPMiddleware):
         token = auth_header.split(" ")[1]
         logger.info(f"Token extracted: {token[:20]}...")
         
-        # Check if token is blacklisted
-        is_blacklisted = await redis_manager.exists(f"blacklist:{token}")
-        if is_blacklisted:
-            logger.error(f"Token is blacklisted for path: {request.url.path}")
-            raise AuthenticationError("Token has been revoked")
-        
         # Verify token
         payload = verify_token(token)
         logger.info(f"Token verification result: {payload}")
@@ -152,23 +170,42 @@ class AuthMiddleware(BaseHTTPMiddleware):
             logger.error(f"Invalid or expired token for path: {request.url.path}")
             raise AuthenticationError("Invalid or expired token")
         
-        # Add user info to request state
-        async with async_session() as db:
-            result = await db.execute(select(User).where(User.username == payload.get("sub")))
-            user = result.scalar_one_or_none()
-            if not user:
-                logger.error(f"User not found for token subject: {payload.get('sub')}")
-                raise AuthenticationError("User not found")
-            request.state.user = user
-            logger.info(f"User authenticated: {user.username} for path: {request.url.path}")
+        # Add user info to request state（使用请求级会话，加载的用户供后续依赖复用）
+        uow = current_unit_of_work(request)
+        if uow is not None:
+            user = await self._load_user(uow.session, payload.get("sub"))
+        else:
+            async with async_session() as db:
+                user = await self._load_user(db, payload.get("sub"))
+        
+        # 吊销检查：比较令牌版本号和本地吊销 jti，不访问 Redis
+        if not await token_revocation.is_valid(token, payload, user):
+            logger.error(f"Token has been revoked for path: {request.url.path}")
+            raise AuthenticationError("Token has been revoked")
+        if uow is not None:
+            uow.user = user
+        request.state.user = user
+        logger.info(f"User authenticated: {user.username} for path: {request.url.path}")
         
         return await call_next(request)
+    
+    @staticmethod
+    async def _load_user(db, username: str) -> User:
+        result = await db.execute(select(User).where(User.username == username))
+        user = result.scalar_one_or_none()
+        if not user:
+            logger.error(f"User not found for token subject: {username}")
+            raise AuthenticationError("User not found")
+        return user
 
 
 def setup_middleware(app):
     """Setup all middleware"""
     print("[DEBUG] Allowed origins:", settings.allowed_origins)
     
+    # 最先添加的在最内层：响应发送完毕即归还请求会话的连接，后台任务才能取得写连接
+    app.add_middleware(ReleaseSessionMiddleware)
+    
     # Session middleware - 必须最先添加，OAuth功能需要
     app.add_middleware(
         SessionMiddleware,
@@ -189,4 +226,8 @@ def setup_middleware(app):
     
     # Custom middleware
     app.add_middleware(LoggingMiddleware)
-    app.add_middleware(AuthMiddleware) 
\ No newline at end of file
+    app.add_middleware(AuthMiddleware)
+    if replicas.engines:
+        app.add_middleware(ReadYourWritesMiddleware)
+    # 最后添加的在最外层：请求级会话需要在认证中间件之前创建、在整个响应结束后关闭
+    app.add_middleware(UnitOfWorkMiddleware) 
\ No newline at end of file
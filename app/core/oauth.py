@@ -5,8 +5,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.core.config import settings
 from app.models.user import User, OAuthProvider, OAuthAccount
-from app.core.security import create_access_token, create_refresh_token
-from app.core.redis import redis_manager
+from app.core.refresh_sessions import refresh_sessions
 import os
 
 
@@ -177,27 +176,10 @@ class OAuthService:
         return new_user
     
     @staticmethod
-    async def create_oauth_tokens(user: User) -> Dict[str, str]:
+    async def create_oauth_tokens(user: User, device: Optional[str] = None) -> Dict[str, str]:
         """Create JWT tokens for OAuth user"""
-        access_token = create_access_token(
-            data={"sub": user.username, "user_id": user.id, "role": user.role.value}
-        )
-        refresh_token = create_refresh_token(
-            data={"sub": user.username, "user_id": user.id}
-        )
-        
-        # Store refresh token in Redis (multi-device support, same as normal login)
-        await redis_manager.set(
-            f"refresh_token:{user.id}:{refresh_token}",
-            "valid",
-            expire=7 * 24 * 60 * 60  # 7 days
-        )
-        
-        return {
-            "access_token": access_token,
-            "refresh_token": refresh_token,
-            "token_type": "bearer"
-        }
+        # 与普通登录相同：新建会话，刷新令牌记录在用户的会话哈希中
+        return await refresh_sessions.issue(user, device)
     
     @staticmethod
     async def bind_oauth_account(
@@ -6,6 +6,7 @@ PayPal支付工具类
 import requests
 import json
 import base64
+import threading
 from typing import Dict, Optional, Any
 from app.core.config import settings
 
@@ -20,18 +21,32 @@ class PayPalPay:
         self.paypal_return_url = settings.paypal_return_url
         self.paypal_cancel_url = settings.paypal_cancel_url
         self.paypal_currency = settings.paypal_currency
-        self.access_token = None
         
-        # 初始化PayPal客户端
-        self._init_paypal()
+        # 访问令牌在首次使用（或启动预热）时获取，导入模块时不发起网络请求
+        self._access_token: Optional[str] = None
+        self._initialized = False
+        self._init_lock = threading.Lock()
+    
+    @property
+    def access_token(self) -> Optional[str]:
+        if not self._initialized:
+            with self._init_lock:
+                if not self._initialized:
+                    self._init_paypal()
+                    self._initialized = True
+        return self._access_token
+    
+    def warm_up(self):
+        """预先获取访问令牌"""
+        return self.access_token
     
     def _init_paypal(self):
         """初始化PayPal客户端"""
         try:
             if all([self.paypal_client_id, self.paypal_client_secret]):
                 # 获取访问令牌
-                self.access_token = self._get_access_token()
-                if self.access_token:
+                self._access_token = self._get_access_token()
+                if self._access_token:
                     print("✅ PayPal客户端初始化成功")
                 else:
                     print("❌ PayPal访问令牌获取失败")
@@ -39,7 +54,7 @@ class PayPalPay:
                 print("⚠️  PayPal配置不完整，使用测试模式")
         except Exception as e:
             print(f"初始化PayPal失败: {e}")
-            self.access_token = None
+            self._access_token = None
     
     def _get_access_token(self) -> Optional[str]:
         """获取PayPal访问令牌"""
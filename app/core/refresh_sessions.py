@@ -0,0 +1,175 @@
+"""
+刷新令牌会话
+每个用户一个 Redis 哈希 auth:sessions:{user_id}，字段为令牌族 ID（fid，一次登录对应一个族），
+值为该族当前的刷新令牌 jti、访问令牌 jti 以及设备信息：
+- 刷新时轮换：签发新的刷新令牌并替换族中记录的 jti，旧刷新令牌随即失效
+- 重放检测：提交的刷新令牌不是族中当前的 jti，说明旧令牌被再次使用，整个族立即吊销
+- 会话数上限：超过 max_sessions_per_user 时淘汰最久未使用的会话
+- 列出和吊销设备只读写这一个哈希，耗时与会话数成正比；哈希整体的 TTL 等于刷新令牌有效期，
+  用户长期不活跃时自然过期，不需要定时扫描
+
+本次改动之前签发的刷新令牌没有 fid，仍按旧的 refresh_token:{user_id}:{token} 键校验，
+使用一次后删除并转为新的会话。
+"""
+
+import json
+import time
+import uuid
+import logging
+from typing import Dict, List, Optional
+
+from redis.exceptions import WatchError
+
+from app.core.config import get_settings
+from app.core.exceptions import AuthenticationError
+from app.core.redis import redis_manager
+from app.core.security import create_access_token, create_refresh_token, verify_token
+from app.core.token_revocation import token_revocation
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+
+class RefreshSessionStore:
+    KEY = "auth:sessions:{user_id}"
+    ROTATE_ATTEMPTS = 3  # 同一用户的哈希被并发修改时的重试次数
+
+    @property
+    def redis(self):
+        if not redis_manager.redis:
+            raise RuntimeError("Redis not connected")
+        return redis_manager.redis
+
+    def _key(self, user_id: int) -> str:
+        return self.KEY.format(user_id=user_id)
+
+    @staticmethod
+    def _lifetime() -> int:
+        return get_settings().refresh_token_expire_days * 24 * 60 * 60
+
+    @staticmethod
+    def _new_tokens(user: User, fid: str, record: dict, device: Optional[str]) -> tuple:
+        """为令牌族签发一对新令牌，返回 (令牌, 更新后的会话记录)"""
+        data = {"sub": user.username, "user_id": user.id, "ver": user.token_version, "fid": fid}
+        access_token = create_access_token(data={**data, "role": user.role.value})
+        refresh_token = create_refresh_token(data=data)
+        access, refresh = verify_token(access_token), verify_token(refresh_token)
+        now = round(time.time(), 3)
+        record = {
+            "jti": refresh["jti"],
+            "exp": refresh["exp"],
+            "access_jti": access["jti"],
+            "access_exp": access["exp"],
+            "device": (device or record.get("device") or "")[:200],
+            "created_at": record.get("created_at", now),
+            "last_used": now,
+        }
+        tokens = {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
+        return tokens, record
+
+    @staticmethod
+    def _revoke_access(record: dict):
+        return token_revocation.revoke_token({"jti": record.get("access_jti"), "exp": record.get("access_exp")})
+
+    # ---- 签发与轮换 ----
+
+    async def issue(self, user: User, device: Optional[str] = None) -> Dict[str, str]:
+        """登录 / 注册 / OAuth：新建令牌族，超出会话数上限时淘汰最久未使用的会话"""
+        key = self._key(user.id)
+        fid = uuid.uuid4().hex[:12]
+        tokens, record = self._new_tokens(user, fid, {}, device)
+
+        now = time.time()
+        sessions = {f: json.loads(v) for f, v in (await self.redis.hgetall(key)).items()}
+        expired = [f for f, s in sessions.items() if s["exp"] <= now]
+        alive = sorted(
+            (f for f in sessions if f not in expired),
+            key=lambda f: sessions[f]["last_used"]
+        )
+        evicted = alive[:max(len(alive) + 1 - get_settings().max_sessions_per_user, 0)]
+
+        pipe = self.redis.pipeline()
+        if expired or evicted:
+            pipe.hdel(key, *expired, *evicted)
+        pipe.hset(key, fid, json.dumps(record))
+        pipe.expire(key, self._lifetime())
+        await pipe.execute()
+
+        for f in evicted:
+            await self._revoke_access(sessions[f])
+        if evicted:
+            logger.info(f"用户 {user.id} 会话数超过上限，淘汰 {len(evicted)} 个最久未使用的会话")
+        return tokens
+
+    async def rotate(self, refresh_token: str, payload: dict, user: User, device: Optional[str] = None) -> Dict[str, str]:
+        """刷新：校验提交的刷新令牌是族中当前的令牌，签发新令牌并替换记录"""
+        fid = payload.get("fid")
+        if not fid:
+            # 旧刷新令牌：校验旧键并删除（只能使用一次），然后转为新的会话
+            if not await self.redis.delete(f"refresh_token:{user.id}:{refresh_token}"):
+                raise AuthenticationError("Invalid refresh token")
+            return await self.issue(user, device)
+
+        key = self._key(user.id)
+        for _ in range(self.ROTATE_ATTEMPTS):
+            async with self.redis.pipeline() as pipe:
+                try:
+                    await pipe.watch(key)
+                    raw = await pipe.hget(key, fid)
+                    if raw is None:
+                        raise AuthenticationError("Session has expired or been revoked")
+                    record = json.loads(raw)
+                    if record["jti"] != payload.get("jti"):
+                        await pipe.unwatch()
+                        logger.warning(f"检测到刷新令牌重放，吊销用户 {user.id} 的会话 {fid}")
+                        await self.revoke(user.id, fid)
+                        raise AuthenticationError("Refresh token has already been used")
+                    tokens, new_record = self._new_tokens(user, fid, record, device)
+                    pipe.multi()
+                    pipe.hset(key, fid, json.dumps(new_record))
+                    pipe.expire(key, self._lifetime())
+                    await pipe.execute()
+                except WatchError:
+                    # 同一用户的其他会话同时被修改，重新读取后再试
+                    continue
+            return tokens
+        raise AuthenticationError("Session is busy, please retry")
+
+    # ---- 设备管理 ----
+
+    async def list_sessions(self, user_id: int) -> List[dict]:
+        """用户当前的会话，按最近使用时间倒序；顺便清理已过期的记录"""
+        key = self._key(user_id)
+        now = time.time()
+        sessions, expired = [], []
+        for fid, raw in (await self.redis.hgetall(key)).items():
+            record = json.loads(raw)
+            if record["exp"] <= now:
+                expired.append(fid)
+                continue
+            sessions.append({
+                "id": fid,
+                "device": record.get("device", ""),
+                "created_at": record["created_at"],
+                "last_used": record["last_used"],
+            })
+        if expired:
+            await self.redis.hdel(key, *expired)
+        return sorted(sessions, key=lambda s: s["last_used"], reverse=True)
+
+    async def revoke(self, user_id: int, fid: str) -> bool:
+        """吊销一个会话：刷新令牌立即失效，该会话最近签发的访问令牌同时吊销"""
+        key = self._key(user_id)
+        raw = await self.redis.hget(key, fid)
+        if raw is None:
+            return False
+        await self.redis.hdel(key, fid)
+        await self._revoke_access(json.loads(raw))
+        return True
+
+    async def revoke_all(self, user_id: int):
+        """删除用户的全部会话（访问令牌由递增 token_version 吊销）"""
+        await self.redis.delete(self._key(user_id))
+
+
+refresh_sessions = RefreshSessionStore()
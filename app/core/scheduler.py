@@ -8,6 +8,7 @@ from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.redis import redis_manager
+from app.core.token_revocation import token_revocation
 from app.core.database import async_session
 from app.models.user import User
 from app.models.article import Article, ArticleStatus
@@ -17,6 +18,7 @@ from app.core.config import settings
 from app.core.websocket import manager
 from app.models.system_notification import SystemNotification
 from app.core.email import email_service
+from app.core.search.related import related_articles
 
 logger = logging.getLogger(__name__)
 
@@ -68,12 +70,12 @@ class TaskScheduler:
     
     async def _add_jobs(self):
         """添加定时任务"""
-        # 每小时执行一次：清理 Redis 黑名单
+        # 每小时执行一次：清理并同步令牌吊销记录
         self.scheduler.add_job(
-            self._cleanup_redis_blacklist,
+            self._sync_token_revocations,
             CronTrigger(minute=0),  # 每小时整点执行
-            id='cleanup_redis_blacklist',
-            name='清理 Redis 黑名单',
+            id='sync_token_revocations',
+            name='同步令牌吊销记录',
             replace_existing=True
         )
         
@@ -113,6 +115,15 @@ class TaskScheduler:
             replace_existing=True
         )
         
+        # 每天凌晨3点执行：全量重建相关文章（校正增量更新积累的 IDF 漂移）
+        self.scheduler.add_job(
+            self._rebuild_related_articles,
+            CronTrigger(hour=3, minute=0),
+            id='rebuild_related_articles',
+            name='重建相关文章',
+            replace_existing=True
+        )
+        
         # 每分钟推送定时任务状态到首页频道
         self.scheduler.add_job(
             self._push_all_task_status,
@@ -142,28 +153,13 @@ class TaskScheduler:
         
         logger.info("定时任务已添加")
     
-    async def _cleanup_redis_blacklist(self):
-        """清理 Redis 中已过期的黑名单"""
+    async def _sync_token_revocations(self):
+        """清理已过期的令牌吊销记录，并刷新本进程的本地副本（补上可能错过的 Pub/Sub 通知）"""
         try:
-            logger.info("开始清理 Redis 黑名单...")
-            # 确保已连接
-            if not redis_manager.redis:
-                await redis_manager.connect()
-            # 获取所有黑名单键
-            blacklist_keys = await redis_manager.redis.keys("blacklist:*")
-            if not blacklist_keys:
-                logger.info("没有找到黑名单记录")
-                return
-            cleaned_count = 0
-            for key in blacklist_keys:
-                # 检查是否过期
-                ttl = await redis_manager.redis.ttl(key)
-                if ttl <= 0:
-                    await redis_manager.redis.delete(key)
-                    cleaned_count += 1
-            logger.info(f"Redis 黑名单清理完成，清理了 {cleaned_count} 个过期记录")
+            await token_revocation.sync()
+            logger.info("令牌吊销记录已同步")
         except Exception as e:
-            logger.error(f"清理 Redis 黑名单失败: {e}")
+            logger.error(f"同步令牌吊销记录失败: {e}")
     
     async def _send_system_notifications(self):
         """发送系统通知"""
@@ -389,24 +385,47 @@ class TaskScheduler:
         except Exception as e:
             logger.error(f"每日数据维护失败: {e}")
     
+    async def _rebuild_related_articles(self):
+        """全量重建相关文章"""
+        try:
+            async with async_session() as session:
+                state = await related_articles.rebuild(session)
+            logger.info(f"相关文章重建: {state}")
+        except Exception as e:
+            logger.error(f"重建相关文章失败: {e}")
+    
     async def _cleanup_temp_data(self):
-        """清理临时数据"""
+        """清理临时数据
+
+        登录会话（刷新令牌）保存在每个用户的会话哈希中，整体带 TTL，不需要在这里清理。
+        """
         try:
             # 清理过期的会话数据
-            expired_sessions = await redis_manager.redis.keys("session:*")
-            if expired_sessions:
-                await redis_manager.redis.delete(*expired_sessions)
-                logger.info(f"清理了 {len(expired_sessions)} 个过期会话")
+            cleaned = await self._unlink_matching("session:*")
+            if cleaned:
+                logger.info(f"清理了 {cleaned} 个过期会话")
             
             # 清理过期的缓存数据
-            expired_cache = await redis_manager.redis.keys("cache:*")
-            if expired_cache:
-                await redis_manager.redis.delete(*expired_cache)
-                logger.info(f"清理了 {len(expired_cache)} 个过期缓存")
+            cleaned = await self._unlink_matching("cache:*")
+            if cleaned:
+                logger.info(f"清理了 {cleaned} 个过期缓存")
                 
         except Exception as e:
             logger.error(f"清理临时数据失败: {e}")
     
+    @staticmethod
+    async def _unlink_matching(pattern: str, batch_size: int = 500) -> int:
+        """用 SCAN 分批删除匹配的键，不像 KEYS 那样一次遍历整个库阻塞 Redis"""
+        batch, total = [], 0
+        async for key in redis_manager.redis.scan_iter(match=pattern, count=batch_size):
+            batch.append(key)
+            if len(batch) >= batch_size:
+                total += await redis_manager.redis.unlink(*batch)
+                batch = []
+        if batch:
+            total += await redis_manager.redis.unlink(*batch)
+        return total
+    
     async def _backup_reminder(self):
         """数据备份提醒"""
         try:
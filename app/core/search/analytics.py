@@ -0,0 +1,142 @@
+"""
+搜索词统计
+记录用户实际搜索的词，按时间分桶写入 Redis 有序集合并做指数衰减，
+热门搜索直接读取合并后的有序集合，不再扫描文章标题
+"""
+
+import re
+import time
+import random
+import hashlib
+import logging
+from typing import List, Optional
+
+from fastapi import Request
+
+from app.core.config import settings
+from app.core.redis import redis_manager
+from app.core.search.fts_base_interface import BaseFTSSearch
+
+logger = logging.getLogger(__name__)
+
+# 爬虫、脚本等非真人流量
+_BOT_UA_RE = re.compile(
+    r"bot|crawl|spider|slurp|fetch|monitor|preview|headless|curl|wget|python-requests|httpx|aiohttp|go-http-client|java/",
+    re.IGNORECASE
+)
+
+
+def get_client_ip(request: Request) -> str:
+    """客户端IP，位于反向代理之后时取 X-Forwarded-For 的第一个地址"""
+    forwarded = request.headers.get("x-forwarded-for")
+    if forwarded:
+        return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+class SearchAnalytics:
+    """搜索词热度统计
+
+    每个时间桶一个有序集合，桶内的增量为 2^((t - 桶起点) / 半衰期)（前向衰减），
+    数值有界且同一桶内越晚的搜索权重越高。读取时把最近几个桶按各自起点的衰减系数
+    合并成一个短期缓存的有序集合，热门搜索只需一次 ZREVRANGE。
+    """
+
+    BUCKET_PREFIX = "search:popular:bucket:"
+    MERGED_KEY = "search:popular:merged"
+    SEEN_PREFIX = "search:popular:seen:"
+
+    def __init__(
+        self,
+        half_life: int,
+        bucket_seconds: int,
+        bucket_count: int,
+        max_terms: int,
+        dedupe_seconds: int,
+        merged_ttl: int = 60
+    ):
+        self.half_life = half_life
+        self.bucket_seconds = bucket_seconds
+        self.bucket_count = bucket_count
+        self.max_terms = max_terms
+        self.dedupe_seconds = dedupe_seconds
+        self.merged_ttl = merged_ttl
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        return BaseFTSSearch.build_search_query(query)
+
+    @staticmethod
+    def is_bot(request: Request) -> bool:
+        user_agent = request.headers.get("user-agent", "")
+        return not user_agent or bool(_BOT_UA_RE.search(user_agent))
+
+    def _bucket(self, now: float) -> int:
+        return int(now // self.bucket_seconds)
+
+    async def record(self, query: str, request: Request):
+        """记录一次搜索（请求结束后在后台执行）"""
+        if not redis_manager.redis or self.is_bot(request):
+            return
+        term = self.normalize(query)
+        if not term or len(term) > settings.search_popular_max_length:
+            return
+
+        try:
+            # 同一客户端短时间内重复搜索同一个词只计一次（翻页、刷新、脚本刷词）
+            client = hashlib.sha1(f"{get_client_ip(request)}\0{term}".encode("utf-8")).hexdigest()
+            first_seen = await redis_manager.redis.set(
+                self.SEEN_PREFIX + client, 1, nx=True, ex=self.dedupe_seconds
+            )
+            if not first_seen:
+                return
+
+            now = time.time()
+            bucket = self._bucket(now)
+            key = f"{self.BUCKET_PREFIX}{bucket}"
+            increment = 2 ** ((now - bucket * self.bucket_seconds) / self.half_life)
+
+            pipe = redis_manager.redis.pipeline(transaction=False)
+            pipe.zincrby(key, increment, term)
+            pipe.expire(key, self.bucket_seconds * (self.bucket_count + 1))
+            # 偶尔裁剪长尾，限制每个桶的大小
+            if random.random() < 0.01:
+                pipe.zremrangebyrank(key, 0, -self.max_terms - 1)
+            await pipe.execute()
+        except Exception as e:
+            logger.warning(f"记录搜索词失败: {e}")
+
+    async def _merge(self):
+        """合并最近的桶：每个桶乘以其起点相对当前桶起点的衰减系数"""
+        current = self._bucket(time.time())
+        weights = {}
+        for offset in range(self.bucket_count):
+            bucket = current - offset
+            weights[f"{self.BUCKET_PREFIX}{bucket}"] = 2 ** (-offset * self.bucket_seconds / self.half_life)
+        pipe = redis_manager.redis.pipeline(transaction=True)
+        pipe.zunionstore(self.MERGED_KEY, weights)
+        pipe.zremrangebyrank(self.MERGED_KEY, 0, -self.max_terms - 1)
+        pipe.expire(self.MERGED_KEY, self.merged_ttl)
+        await pipe.execute()
+
+    async def top(self, limit: int = 10) -> Optional[List[dict]]:
+        """热门搜索词；Redis 不可用时返回 None"""
+        if not redis_manager.redis:
+            return None
+        try:
+            if not await redis_manager.redis.exists(self.MERGED_KEY):
+                await self._merge()
+            items = await redis_manager.redis.zrevrange(self.MERGED_KEY, 0, limit - 1, withscores=True)
+        except Exception as e:
+            logger.warning(f"读取热门搜索失败: {e}")
+            return None
+        return [{"word": word, "frequency": round(score, 2)} for word, score in items if score > 0]
+
+
+search_analytics = SearchAnalytics(
+    half_life=settings.search_popular_half_life_hours * 3600,
+    bucket_seconds=settings.search_popular_bucket_hours * 3600,
+    bucket_count=settings.search_popular_buckets,
+    max_terms=settings.search_popular_max_terms,
+    dedupe_seconds=settings.search_popular_dedupe_seconds
+)
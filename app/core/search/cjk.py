@@ -0,0 +1,62 @@
+"""
+中日韩（CJK）文本切分
+FTS5 的 unicode61 和 PostgreSQL 的 simple 配置都会把连续的汉字当成一个词，
+这里把 CJK 字符逐字切开再建索引，查询时用短语（相邻位置）匹配，
+效果等同于二元切分，同时摘要/高亮中的原文可以还原
+"""
+
+import re
+from typing import List, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# 汉字、日文假名、韩文音节
+CJK_RANGES = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af"
+
+_CJK_CHAR_RE = re.compile(f"([{CJK_RANGES}])")
+_CJK_RUN_RE = re.compile(f"([{CJK_RANGES}]+)")
+_CJK_GAP_RE = re.compile(f"(?<=[{CJK_RANGES}]) (?=[{CJK_RANGES}])")
+_PUNCT_RE = re.compile(r"[^\w\s]")
+
+
+def segment_cjk(text: str) -> str:
+    """建索引用：在每个 CJK 字符两侧加空格，使其成为独立的词"""
+    if not text:
+        return ""
+    return _CJK_CHAR_RE.sub(r" \1 ", text)
+
+
+def join_cjk(text: str) -> str:
+    """segment_cjk 的逆操作：去掉 CJK 字符之间的空格（用于摘要展示）"""
+    if not text:
+        return ""
+    return _CJK_GAP_RE.sub("", re.sub(r" {2,}", " ", text)).strip()
+
+
+def split_query_terms(search_term: str) -> List[Tuple[str, str]]:
+    """把搜索词拆成 (kind, term)：kind 为 cjk（连续的 CJK 字符）或 word"""
+    terms = []
+    for word in _PUNCT_RE.sub(" ", search_term).split():
+        for part in _CJK_RUN_RE.split(word):
+            if not part:
+                continue
+            terms.append(("cjk" if _CJK_RUN_RE.fullmatch(part) else "word", part))
+    return terms
+
+
+def register_sqlite_functions(dbapi_connection):
+    """在一个 SQLite 连接（sqlite3.Connection 或驱动层连接）上注册 cjk_segment()
+
+    search_fts_tokenizer=cjk 时应用用它把中文切分后写入 FTS 表（见 sqlite_search_impl.segment_pending）。
+    触发器不调用该函数，没有注册它的连接（sqlite3 命令行等）同样可以写 article 表。
+    """
+    dbapi_connection.create_function("cjk_segment", 1, segment_cjk, deterministic=True)
+
+
+def install_sqlite_functions(sync_engine: Engine):
+    """在引擎的每个 SQLite 连接上注册 cjk_segment()，供应用切分 FTS 索引行"""
+
+    @event.listens_for(sync_engine, "connect")
+    def _register(dbapi_connection, connection_record):
+        register_sqlite_functions(dbapi_connection)
@@ -0,0 +1,95 @@
+"""
+搜索分面
+在全部匹配结果（而非当前页）上统计标签、作者和年份分布；
+三类统计共用一个匹配 id 的 CTE，合并为一次 UNION ALL 分组查询
+"""
+
+from typing import List, Optional
+
+from sqlalchemy import Integer, String, cast, func, literal, select, true, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.article import Article, ArticleStatus
+from app.models.tag import Tag, ArticleTag
+from app.models.user import User
+from app.schemas.article import FacetBucket, SearchFacets
+
+
+def tag_filter(tags: Optional[List[str]]):
+    """多标签过滤：文章需同时带有所有给定的标签"""
+    names = sorted({name.strip() for name in tags or [] if name and name.strip()})
+    if not names:
+        return true()
+    return Article.id.in_(
+        select(ArticleTag.article_id)
+        .join(Tag, Tag.id == ArticleTag.tag_id)
+        .where(Tag.name.in_(names))
+        .group_by(ArticleTag.article_id)
+        .having(func.count(func.distinct(Tag.id)) == len(names))
+    )
+
+
+def matched_ids(
+    match_clause,
+    status: Optional[ArticleStatus] = None,
+    author: Optional[str] = None,
+    tags: Optional[List[str]] = None
+):
+    """与搜索相同过滤条件下的全部匹配文章 id"""
+    stmt = (
+        select(Article.id)
+        .where(match_clause)
+        .where(Article.status == (status or ArticleStatus.PUBLISHED))
+        .where(tag_filter(tags))
+    )
+    if author:
+        stmt = stmt.join(User, User.id == Article.author_id).where(User.username == author)
+    return stmt
+
+
+async def compute_facets(db: AsyncSession, ids, limit: int = 10) -> SearchFacets:
+    """ids 为 matched_ids() 返回的查询；每类保留数量最多的 limit 项，年份按时间倒序"""
+    matched = ids.cte("matched")
+    year = cast(func.extract("year", Article.created_at), Integer)
+
+    tag_counts = (
+        select(
+            literal("tags").label("kind"),
+            Tag.name.label("value"),
+            Tag.name.label("label"),
+            func.count().label("count"),
+        )
+        .select_from(ArticleTag)
+        .join(Tag, Tag.id == ArticleTag.tag_id)
+        .where(ArticleTag.article_id.in_(select(matched.c.id)))
+        .group_by(Tag.id, Tag.name)
+    )
+    author_counts = (
+        select(
+            literal("authors"),
+            User.username,
+            func.coalesce(User.full_name, User.username),
+            func.count(),
+        )
+        .select_from(Article)
+        .join(User, User.id == Article.author_id)
+        .where(Article.id.in_(select(matched.c.id)))
+        .group_by(User.id, User.username, User.full_name)
+    )
+    year_counts = (
+        select(literal("years"), cast(year, String), cast(year, String), func.count())
+        .select_from(Article)
+        .where(Article.id.in_(select(matched.c.id)))
+        .group_by(year)
+    )
+
+    result = await db.execute(union_all(tag_counts, author_counts, year_counts))
+    buckets = {"tags": [], "authors": [], "years": []}
+    for kind, value, label, count in result.all():
+        if value is not None:
+            buckets[kind].append(FacetBucket(value=str(value), label=str(label), count=count))
+
+    for kind in ("tags", "authors"):
+        buckets[kind] = sorted(buckets[kind], key=lambda bucket: (-bucket.count, bucket.value))[:limit]
+    buckets["years"] = sorted(buckets["years"], key=lambda bucket: bucket.value, reverse=True)[:limit]
+    return SearchFacets(**buckets)
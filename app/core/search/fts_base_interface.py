@@ -1,15 +1,23 @@
 # app/core/search/base.py
 
+import re
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import Awaitable, Callable, List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.search import index_meta
 from app.models.article import ArticleStatus
-from app.schemas.article import ArticleListResponse
+from app.core.search.projection import SearchPage
 
 
 class BaseFTSSearch(ABC):
     """全文搜索接口统一规范"""
 
+    @staticmethod
+    def build_search_query(search_term: str) -> str:
+        """规范化搜索词（去标点、小写、合并空白），子类可按索引语法覆盖"""
+        return " ".join(re.sub(r'[^\w\s]', ' ', search_term).lower().split())
+
     @staticmethod
     @abstractmethod
     async def create_fts_table(db: AsyncSession):
@@ -28,6 +36,67 @@ class BaseFTSSearch(ABC):
         """填充搜索索引数据"""
         pass
 
+    @staticmethod
+    @abstractmethod
+    def index_version() -> str:
+        """索引结构版本（含分词方式），变化时才需要重建"""
+        pass
+
+    @staticmethod
+    @abstractmethod
+    async def build_fts_index(db: AsyncSession, on_batch: Callable[[], Awaitable[None]]):
+        """分批重建索引，期间旧索引保持可读；每批提交后调用 on_batch"""
+        pass
+
+    @staticmethod
+    @abstractmethod
+    async def verify_fts_index(db: AsyncSession) -> bool:
+        """校验索引存在且行数与文章表一致（必要时补齐缺失行），索引不可用时返回 False"""
+        pass
+
+    @staticmethod
+    @abstractmethod
+    def match_filter(query: str):
+        """全文匹配的 WHERE 条件（Article.id 属于命中集合），无可用词时返回 false()"""
+        pass
+
+    @staticmethod
+    @abstractmethod
+    def substring_filter(query: str):
+        """子串匹配（替代 LIKE '%q%'）的 WHERE 条件，走三元组索引；
+        短于 search_substring_min_length 的查询改用全文索引，无可用词时返回 false()"""
+        pass
+
+    @classmethod
+    async def ensure_fts_index(cls, db: AsyncSession) -> str:
+        """启动时调用：版本一致只做校验，版本变化时在跨进程锁下重建
+
+        返回 verified / rebuilt / skipped（其他进程正在重建）
+        """
+        await index_meta.ensure_meta_table(db)
+        version = cls.index_version()
+        if await index_meta.get_meta(db, index_meta.VERSION_KEY) == version:
+            if await cls.verify_fts_index(db):
+                return "verified"
+        return await cls.rebuild_fts_index(db)
+
+    @classmethod
+    async def rebuild_fts_index(cls, db: AsyncSession) -> str:
+        """在跨进程锁下重建索引；拿不到锁说明其他进程正在重建，直接返回 skipped"""
+        await index_meta.ensure_meta_table(db)
+        owner = index_meta.make_lock_owner()
+        if not await index_meta.acquire_rebuild_lock(db, owner, settings.search_index_lock_timeout):
+            return "skipped"
+        try:
+            await cls.build_fts_index(db, lambda: index_meta.touch_rebuild_lock(db, owner))
+            await index_meta.set_meta(db, index_meta.VERSION_KEY, cls.index_version())
+        except Exception:
+            await db.rollback()
+            raise
+        finally:
+            await index_meta.release_rebuild_lock(db, owner)
+        return "rebuilt"
+
     @staticmethod
     @abstractmethod
     async def search_articles(
@@ -37,8 +106,9 @@ class BaseFTSSearch(ABC):
         limit: int = 10,
         status: Optional[ArticleStatus] = None,
         author: Optional[str] = None,
-    ) -> List[ArticleListResponse]:
-        """执行搜索文章"""
+        tags: Optional[List[str]] = None,
+    ) -> SearchPage:
+        """按相关度搜索文章，结果附带数据库生成的高亮标题和摘要，total 与分页在同一次查询中得到"""
         pass
 
     @staticmethod
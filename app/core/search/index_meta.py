@@ -0,0 +1,83 @@
+"""
+搜索索引元数据
+记录已构建索引的版本，并用一行记录充当跨进程的重建锁（SQLite/PostgreSQL 通用）
+"""
+
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+META_TABLE = "search_index_meta"
+VERSION_KEY = "articles_fts.version"
+LOCK_KEY = "articles_fts.rebuild_lock"
+RELATED_LOCK_KEY = "related_articles.rebuild_lock"
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat()
+
+
+def make_lock_owner() -> str:
+    """锁持有者标识：主机名 + 进程号 + 随机串"""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+async def ensure_meta_table(db: AsyncSession):
+    await db.execute(text(f"""
+        CREATE TABLE IF NOT EXISTS {META_TABLE} (
+            key VARCHAR(100) PRIMARY KEY,
+            value VARCHAR(255) NOT NULL,
+            updated_at VARCHAR(32) NOT NULL
+        )
+    """))
+    await db.commit()
+
+
+async def get_meta(db: AsyncSession, key: str) -> Optional[str]:
+    result = await db.execute(text(f"SELECT value FROM {META_TABLE} WHERE key = :key"), {"key": key})
+    return result.scalar()
+
+
+async def set_meta(db: AsyncSession, key: str, value: str):
+    await db.execute(text(f"""
+        INSERT INTO {META_TABLE} (key, value, updated_at) VALUES (:key, :value, :now)
+        ON CONFLICT (key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at
+    """), {"key": key, "value": value, "now": _now()})
+    await db.commit()
+
+
+async def acquire_rebuild_lock(db: AsyncSession, owner: str, stale_after: int, key: str = LOCK_KEY) -> bool:
+    """尝试获取重建锁；超过 stale_after 秒未续期的锁视为持有者已退出，可被接管"""
+    stale = (datetime.utcnow() - timedelta(seconds=stale_after)).isoformat()
+    await db.execute(
+        text(f"DELETE FROM {META_TABLE} WHERE key = :key AND updated_at < :stale"),
+        {"key": key, "stale": stale}
+    )
+    await db.execute(text(f"""
+        INSERT INTO {META_TABLE} (key, value, updated_at) VALUES (:key, :owner, :now)
+        ON CONFLICT (key) DO NOTHING
+    """), {"key": key, "owner": owner, "now": _now()})
+    await db.commit()
+    return await get_meta(db, key) == owner
+
+
+async def touch_rebuild_lock(db: AsyncSession, owner: str, key: str = LOCK_KEY):
+    """分批重建过程中续期，避免长时间重建被误判为过期"""
+    await db.execute(
+        text(f"UPDATE {META_TABLE} SET updated_at = :now WHERE key = :key AND value = :owner"),
+        {"key": key, "owner": owner, "now": _now()}
+    )
+    await db.commit()
+
+
+async def release_rebuild_lock(db: AsyncSession, owner: str, key: str = LOCK_KEY):
+    await db.execute(
+        text(f"DELETE FROM {META_TABLE} WHERE key = :key AND value = :owner"),
+        {"key": key, "owner": owner}
+    )
+    await db.commit()
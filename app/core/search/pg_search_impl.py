@@ -1,14 +1,73 @@
 import re
 from typing import List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import text, select
-from sqlalchemy.orm import selectinload
+from sqlalchemy import text, select, func, false, or_, literal_column
 from collections import Counter
 
+from app.core.config import settings
+from app.core.search.cjk import CJK_RANGES, split_query_terms
 from app.core.search.fts_base_interface import BaseFTSSearch
+from app.core.search.facets import tag_filter
 from app.models.article import Article, ArticleStatus
 from app.models.tag import Tag, ArticleTag
-from app.schemas.article import ArticleListResponse, UserBasicInfo, TagInfo
+from app.models.user import User
+from app.core.search.projection import (
+    HIGHLIGHT_OPEN, HIGHLIGHT_CLOSE, SNIPPET_ELLIPSIS, SNIPPET_TOKENS, SearchPage, result_columns
+)
+
+
+def _indexed(expr: str) -> str:
+    """tsvector 的输入表达式，cjk 模式下在每个中文字符两侧加空格，使其成为独立的词"""
+    if settings.search_fts_tokenizer == "cjk":
+        return f"regexp_replace({expr}, '([{CJK_RANGES}])', ' \\1 ', 'g')"
+    return expr
+
+
+def _weighted_document() -> str:
+    """生成加权 tsvector 的 SQL 表达式：标题 A、摘要 B、正文 C（不可变表达式，可用于生成列）"""
+    parts = []
+    for column_name, weight in (("title", "A"), ("summary", "B"), ("content", "C")):
+        source = _indexed(f"coalesce({column_name}, '')")
+        parts.append(f"setweight(to_tsvector('simple'::regconfig, {source}), '{weight}')")
+    return " || ".join(parts)
+
+
+# 索引结构版本：修改 tsvector 表达式或索引时递增，启动时据此决定是否重建
+FTS_INDEX_VERSION = 4
+
+TS_CONFIG = literal_column("'simple'::regconfig")
+TITLE_HEADLINE_OPTIONS = f"StartSel={HIGHLIGHT_OPEN}, StopSel={HIGHLIGHT_CLOSE}, HighlightAll=true"
+SNIPPET_HEADLINE_OPTIONS = (
+    f"StartSel={HIGHLIGHT_OPEN}, StopSel={HIGHLIGHT_CLOSE}, "
+    f"MaxWords={SNIPPET_TOKENS}, MinWords={SNIPPET_TOKENS // 2}, "
+    f"MaxFragments=2, FragmentDelimiter=\" {SNIPPET_ELLIPSIS} \""
+)
+
+# 旧版本由触发器维护 tsv，切换到生成列时需要先删除
+LEGACY_DDL = [
+    "DROP TRIGGER IF EXISTS article_tsv_update ON article",
+    "DROP FUNCTION IF EXISTS update_article_tsvector",
+]
+
+
+def tsv_column_ddl() -> str:
+    """tsv 生成列的定义，应用启动和 Alembic 迁移共用"""
+    return f"tsvector GENERATED ALWAYS AS ({_weighted_document()}) STORED"
+
+
+def index_ddl(concurrently: bool = False) -> List[str]:
+    """tsv 和子串搜索用到的索引；迁移中在事务外 CONCURRENTLY 创建，不阻塞写入"""
+    option = "CONCURRENTLY " if concurrently else ""
+    return [
+        f"CREATE INDEX {option}IF NOT EXISTS idx_article_tsv ON article USING GIN(tsv)",
+        f"CREATE INDEX {option}IF NOT EXISTS idx_article_title_trgm ON article USING GIN(title gin_trgm_ops)",
+        f"CREATE INDEX {option}IF NOT EXISTS idx_article_content_trgm ON article USING GIN(content gin_trgm_ops)",
+    ]
+
+
+def tsv_comment_ddl(version: str) -> str:
+    """在列注释中记录生成表达式的版本，迁移已建好的列启动时不再重建"""
+    return f"COMMENT ON COLUMN article.tsv IS '{version}'"
 
 
 class PostgresFTSSearch(BaseFTSSearch):
@@ -16,59 +75,109 @@ class PostgresFTSSearch(BaseFTSSearch):
 
     @staticmethod
     async def drop_fts_table(db: AsyncSession):
-        """删除全文索引和触发器（如果存在）"""
-        drop_sqls = [
-            "DROP TRIGGER IF EXISTS article_tsv_update ON article",
-            "DROP FUNCTION IF EXISTS update_article_tsvector",
-            "DROP INDEX IF EXISTS idx_article_tsv"
+        """删除全文索引和旧版触发器（如果存在）"""
+        drop_sqls = LEGACY_DDL + [
+            "DROP INDEX IF EXISTS idx_article_tsv",
+            "DROP INDEX IF EXISTS idx_article_title_trgm",
+            "DROP INDEX IF EXISTS idx_article_content_trgm"
         ]
-        async with db.begin():
-            for sql in drop_sqls:
-                try:
-                    await db.execute(text(sql))
-                except Exception as e:
-                    print(f"⚠️ Drop SQL failed: {sql} -> {e}")
+        for sql in drop_sqls:
+            try:
+                await db.execute(text(sql))
+                await db.commit()
+            except Exception as e:
+                await db.rollback()
+                print(f"⚠️ Drop SQL failed: {sql} -> {e}")
 
     @staticmethod
-    async def create_fts_table(db: AsyncSession):
-        """创建 GIN 索引和 tsvector 更新触发器"""
-        create_function = """
-        CREATE OR REPLACE FUNCTION update_article_tsvector() RETURNS trigger AS $$
-        BEGIN
-            NEW.tsv := to_tsvector('simple', coalesce(NEW.title, '') || ' ' || coalesce(NEW.content, '') || ' ' || coalesce(NEW.summary, ''));
-            RETURN NEW;
-        END
-        $$ LANGUAGE plpgsql;
-        """
-
-        create_trigger = """
-        CREATE TRIGGER article_tsv_update
-        BEFORE INSERT OR UPDATE ON article
-        FOR EACH ROW EXECUTE FUNCTION update_article_tsvector();
-        """
-
-        create_index = """
-        CREATE INDEX idx_article_tsv ON article USING GIN(tsv);
-        """
+    async def _column_version(db: AsyncSession) -> Optional[str]:
+        """当前 tsv 生成列的版本（列不存在或不是生成列时为 None）"""
+        result = await db.execute(text("""
+            SELECT col_description('article'::regclass, a.attnum)
+            FROM pg_attribute a
+            WHERE a.attrelid = 'article'::regclass AND a.attname = 'tsv'
+              AND a.attgenerated = 's' AND NOT a.attisdropped
+        """))
+        return result.scalar()
 
+    @staticmethod
+    async def create_fts_table(db: AsyncSession):
+        """创建加权 tsv 生成列及索引（幂等：版本一致时只补建缺失的索引）"""
+        version = PostgresFTSSearch.index_version()
         try:
-            async with db.begin():
-                await db.execute(text(create_function))
-                await db.execute(text(create_trigger))
-                await db.execute(text(create_index))
+            await db.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            if await PostgresFTSSearch._column_version(db) != version:
+                for sql in LEGACY_DDL:
+                    await db.execute(text(sql))
+                # 删除列会连带删除其上的 GIN 索引；新增生成列会重写整张表
+                await db.execute(text("ALTER TABLE article DROP COLUMN IF EXISTS tsv"))
+                await db.execute(text(f"ALTER TABLE article ADD COLUMN tsv {tsv_column_ddl()}"))
+                await db.execute(text(tsv_comment_ddl(version)))
+            for sql in index_ddl():
+                await db.execute(text(sql))
+            await db.commit()
         except Exception as e:
+            await db.rollback()
             print(f"❌ 创建 PostgreSQL FTS 结构失败: {e}")
+            raise
 
     @staticmethod
     async def populate_fts_table(db: AsyncSession):
-        """手动触发更新所有现有数据的 tsvector"""
+        """tsv 为生成列，写入文章时由数据库计算，无需回填"""
+        await PostgresFTSSearch.create_fts_table(db)
+
+    @staticmethod
+    def index_version() -> str:
+        return f"postgresql:{FTS_INDEX_VERSION}:{settings.search_fts_tokenizer}"
+
+    @staticmethod
+    async def build_fts_index(db: AsyncSession, on_batch):
+        """重建生成列；大表请改用 Alembic 迁移（索引以 CONCURRENTLY 方式创建）"""
+        await PostgresFTSSearch.create_fts_table(db)
+        await on_batch()
+
+    @staticmethod
+    async def verify_fts_index(db: AsyncSession) -> bool:
         try:
-            await db.execute(text("UPDATE article SET title = title"))
-            await db.commit()
-            print("✅ 已更新所有文章的 tsvector 字段")
+            column_version = await PostgresFTSSearch._column_version(db)
+            result = await db.execute(text("SELECT to_regclass('idx_article_tsv') IS NOT NULL"))
+            has_index = result.scalar()
         except Exception as e:
-            print(f"❌ 更新 tsvector 失败: {e}")
             await db.rollback()
+            print(f"⚠️ FTS 索引不可用: {e}")
+            return False
+        if column_version != PostgresFTSSearch.index_version() or not has_index:
+            print("⚠️ tsv 生成列或 GIN 索引缺失/版本不一致")
+            return False
+        return True
+
+    @staticmethod
+    def build_search_query(search_term: str) -> str:
+        """构建 to_tsquery 表达式：中文按相邻字符做短语匹配，其他词做前缀匹配"""
+        query_parts = []
+        for kind, term in split_query_terms(search_term):
+            term = term.lower()
+            if kind == "cjk" and settings.search_fts_tokenizer == "cjk":
+                query_parts.append(" <-> ".join(f"'{char}'" for char in term))
+            elif len(term) >= 2:
+                query_parts.append(f"'{term}':*")
+        return " & ".join(query_parts)
+
+    @staticmethod
+    def match_filter(query: str):
+        ts_query = PostgresFTSSearch.build_search_query(query)
+        if not ts_query:
+            return false()
+        return literal_column("article.tsv").op("@@")(func.to_tsquery(TS_CONFIG, ts_query))
+
+    @staticmethod
+    def substring_filter(query: str):
+        """子串匹配：ILIKE 走 pg_trgm GIN 索引；少于 3 个字符时三元组无法命中，改用 tsvector"""
+        query = query.strip()
+        if len(query) < max(settings.search_substring_min_length, 3):
+            return PostgresFTSSearch.match_filter(query)
+        pattern = "%" + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        return or_(Article.title.ilike(pattern, escape="\\"), Article.content.ilike(pattern, escape="\\"))
 
     @staticmethod
     async def search_articles(
@@ -77,89 +186,87 @@ class PostgresFTSSearch(BaseFTSSearch):
         skip: int = 0,
         limit: int = 10,
         status: Optional[ArticleStatus] = None,
-        author: Optional[str] = None
-    ) -> List[ArticleListResponse]:
-        """使用 PostgreSQL FTS 查询文章"""
-        if not query.strip():
-            return []
+        author: Optional[str] = None,
+        tags: Optional[List[str]] = None
+    ) -> SearchPage:
+        """使用 PostgreSQL FTS 查询文章，按相关度（ts_rank_cd + 新近度加成）排序，
+        高亮和摘要由 ts_headline 生成"""
+        ts_query = PostgresFTSSearch.build_search_query(query)
+        if not ts_query:
+            return SearchPage([], 0)
 
-        ts_query = query.strip()
+        tsquery = func.to_tsquery(TS_CONFIG, ts_query)
+        tsv = literal_column("article.tsv")
 
-        sql = """
-            SELECT id
-            FROM article
-            WHERE tsv @@ plainto_tsquery(:query)
-        """
-        params = {"query": ts_query}
-
-        if status:
-            sql += " AND status = :status"
-            params["status"] = status.value
-        else:
-            sql += " AND status = 'PUBLISHED'"
+        # 相关度 × (1 + 权重 × 0.5^(文章天数 / 半衰期))：新文章略微靠前，但不压过明显更相关的旧文章
+        boost = literal_column(
+            f"(1 + {float(settings.search_rank_recency_weight)} * power(0.5, "
+            f"extract(epoch FROM now() - article.created_at) / 86400.0 / "
+            f"{float(settings.search_rank_recency_half_life_days)}))"
+        )
+        score = func.ts_rank_cd(tsv, tsquery) * boost
 
+        # 先在索引上取出当前页的 id 和总数（同一次扫描），ts_headline 只对这一页计算
+        hits = (
+            select(Article.id, score.label("score"), func.count().over().label("total"))
+            .where(tsv.op("@@")(tsquery))
+            .where(Article.status == (status or ArticleStatus.PUBLISHED))
+            .where(tag_filter(tags))
+        )
         if author:
-            sql += """
-            AND author_id IN (
-                SELECT id FROM "user" WHERE username = :author
-            )
-            """
-            params["author"] = author
-
-        sql += " ORDER BY created_at DESC LIMIT :limit OFFSET :skip"
-        params["limit"] = limit
-        params["skip"] = skip
-
-        result = await db.execute(text(sql), params)
-        article_ids = [row[0] for row in result.fetchall()]
+            hits = hits.join(User, User.id == Article.author_id).where(User.username == author)
+        hits = hits.order_by(score.desc(), Article.id.desc()).offset(skip).limit(limit).subquery()
 
-        if not article_ids:
-            return []
+        tags_json = (
+            select(func.coalesce(
+                func.json_agg(func.json_build_object(
+                    literal_column("'id'"), Tag.id, literal_column("'name'"), Tag.name
+                )),
+                literal_column("'[]'::json")
+            ))
+            .select_from(ArticleTag)
+            .join(Tag, Tag.id == ArticleTag.tag_id)
+            .where(ArticleTag.article_id == Article.id)
+            .correlate(Article)
+            .scalar_subquery()
+        )
 
-        result = await db.execute(
-            select(Article)
-            .options(
-                selectinload(Article.author),
-                selectinload(Article.tags).selectinload(ArticleTag.tag),
-                selectinload(Article.comments)
+        stmt = (
+            select(
+                *result_columns(),
+                tags_json.label("tags"),
+                func.ts_headline(
+                    TS_CONFIG, literal_column(_indexed("article.title")), tsquery, TITLE_HEADLINE_OPTIONS
+                ).label("title_highlight"),
+                func.ts_headline(
+                    TS_CONFIG, literal_column(_indexed("coalesce(article.content, '')")), tsquery, SNIPPET_HEADLINE_OPTIONS
+                ).label("snippet"),
+                hits.c.total,
             )
-            .where(Article.id.in_(article_ids))
+            .select_from(hits)
+            .join(Article, Article.id == hits.c.id)
+            .join(User, User.id == Article.author_id)
+            .order_by(hits.c.score.desc(), Article.id.desc())
         )
-        articles = result.scalars().all()
-
-        article_dict = {a.id: a for a in articles}
-        sorted_articles = [article_dict[aid] for aid in article_ids if aid in article_dict]
-
-        responses = []
-        for article in sorted_articles:
-            responses.append(ArticleListResponse(
-                id=article.id,
-                title=article.title,
-                summary=article.summary,
-                status=article.status,
-                author=UserBasicInfo.model_validate(article.author),
-                tags=[TagInfo.model_validate(at.tag) for at in article.tags if at.tag],
-                created_at=article.created_at,
-                updated_at=article.updated_at,
-                view_count=0,
-                comment_count=len(article.comments or [])
-            ))
-        return responses
+
+        result = await db.execute(stmt)
+        return SearchPage.from_rows(result.all(), skip)
 
     @staticmethod
     async def get_search_suggestions(db: AsyncSession, query: str, limit: int = 5) -> List[str]:
         """返回匹配的标题建议"""
-        if not query.strip():
+        ts_query = PostgresFTSSearch.build_search_query(query)
+        if not ts_query:
             return []
 
         sql = """
             SELECT DISTINCT title FROM article
-            WHERE tsv @@ plainto_tsquery(:query)
+            WHERE tsv @@ to_tsquery('simple', :query)
               AND status = 'PUBLISHED'
             ORDER BY created_at DESC
             LIMIT :limit
         """
-        result = await db.execute(text(sql), {"query": query.strip(), "limit": limit})
+        result = await db.execute(text(sql), {"query": ts_query, "limit": limit})
         return [row[0] for row in result.fetchall()]
 
     @staticmethod
@@ -0,0 +1,135 @@
+"""
+搜索结果投影
+搜索只查询列表所需的列，摘要和高亮由数据库生成，正文和评论不离开数据库
+"""
+
+import re
+import html
+import json
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.search.cjk import CJK_RANGES
+from app.models.article import Article
+from app.models.comment import Comment
+from app.models.tag import Tag, ArticleTag
+from app.models.user import User
+from app.schemas.article import ArticleSearchResult, UserBasicInfo, TagInfo
+
+# 高亮标记：先用控制字符标记，转义 HTML 之后再替换为 <mark>，避免正文中的标签被当作 HTML
+HIGHLIGHT_OPEN = "\x02"
+HIGHLIGHT_CLOSE = "\x03"
+SNIPPET_ELLIPSIS = "…"
+SNIPPET_TOKENS = 48
+
+# cjk 分词下 FTS 返回的文本是逐字切分的，需要去掉中文字符（含全角标点）之间的空格，标记可以夹在中间
+_CJK_TEXT = CJK_RANGES + "\u3000-\u303f\uff00-\uffef"
+_CJK_GAP_RE = re.compile(f"([{_CJK_TEXT}][\x02\x03]*) +(?=[\x02\x03]*[{_CJK_TEXT}])")
+
+
+def format_highlight(value: str) -> str:
+    """把带控制字符标记的片段转为安全的 HTML"""
+    if not value:
+        return value
+    if settings.search_fts_tokenizer == "cjk":
+        value = _CJK_GAP_RE.sub(r"\1", value)
+        value = re.sub(r" {2,}", " ", value).strip()
+    # 相邻的高亮合并为一段
+    value = value.replace(HIGHLIGHT_CLOSE + HIGHLIGHT_OPEN, "")
+    value = html.escape(value)
+    return value.replace(HIGHLIGHT_OPEN, "<mark>").replace(HIGHLIGHT_CLOSE, "</mark>")
+
+
+def comment_count_column():
+    return (
+        select(func.count(Comment.id))
+        .where(Comment.article_id == Article.id)
+        .correlate(Article)
+        .scalar_subquery()
+        .label("comment_count")
+    )
+
+
+def result_columns() -> List[Any]:
+    """列表展示需要的列（不含正文）"""
+    return [
+        Article.id,
+        Article.title,
+        Article.summary,
+        Article.status,
+        Article.created_at,
+        Article.updated_at,
+        Article.view_count,
+        User.id.label("author_id"),
+        User.username.label("author_username"),
+        User.full_name.label("author_full_name"),
+        User.role.label("author_role"),
+        comment_count_column(),
+    ]
+
+
+async def load_tags(db: AsyncSession, article_ids: Iterable[int]) -> Dict[int, List[dict]]:
+    """一次查询取出一页文章的标签（不依赖数据库的 JSON 聚合函数）"""
+    tags: Dict[int, List[dict]] = {}
+    article_ids = list(article_ids)
+    if not article_ids:
+        return tags
+    result = await db.execute(
+        select(ArticleTag.article_id, Tag.id, Tag.name)
+        .join(Tag, Tag.id == ArticleTag.tag_id)
+        .where(ArticleTag.article_id.in_(article_ids))
+    )
+    for article_id, tag_id, name in result.all():
+        tags.setdefault(article_id, []).append({"id": tag_id, "name": name})
+    return tags
+
+
+class SearchPage(list):
+    """一页搜索结果，total 为满足条件的总数（与分页查询同一次扫描得到，页码越界时未知为 None）"""
+
+    def __init__(self, items=(), total: Optional[int] = None):
+        super().__init__(items)
+        self.total = total
+
+    @classmethod
+    def from_rows(cls, rows, skip: int = 0, tags: Optional[Dict[int, List[dict]]] = None) -> "SearchPage":
+        """rows 需包含 count(*) OVER () 得到的 total 列"""
+        if tags is None:
+            items = [to_search_result(row) for row in rows]
+        else:
+            items = [to_search_result(row, tags.get(row.id, [])) for row in rows]
+        if rows:
+            total = rows[0].total
+        else:
+            total = 0 if skip == 0 else None
+        return cls(items, total)
+
+
+def to_search_result(row, tags: Optional[List[dict]] = None) -> ArticleSearchResult:
+    """tags 未传入时读取查询中聚合的 row.tags；无高亮列时高亮/摘要为空"""
+    if tags is None:
+        tags = row.tags
+    if isinstance(tags, str):
+        tags = json.loads(tags)
+    return ArticleSearchResult(
+        id=row.id,
+        title=row.title,
+        summary=row.summary,
+        status=row.status,
+        author=UserBasicInfo(
+            id=row.author_id,
+            username=row.author_username,
+            full_name=row.author_full_name,
+            role=row.author_role
+        ),
+        tags=[TagInfo(**tag) for tag in tags or [] if tag and tag.get("id") is not None],
+        created_at=row.created_at,
+        updated_at=row.updated_at,
+        view_count=row.view_count or 0,
+        comment_count=row.comment_count or 0,
+        title_highlight=format_highlight(getattr(row, "title_highlight", None)),
+        snippet=format_highlight(getattr(row, "snippet", None))
+    )
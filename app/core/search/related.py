@@ -0,0 +1,487 @@
+"""
+相关文章
+为已发布文章计算哈希词频向量（TF-IDF），把余弦相似度与标签 Jaccard 重合度加权合并，
+预先算好每篇文章的 top-k 邻居写入 related_article 表，接口按文章 id 直接读取。
+
+向量始终以稀疏形式存储和计算（按行拼接的下标和值），相似度按批流式计算，内存占用与批大小成正比：
+- 文章变更时只用该文章（以及原来把它列为邻居的文章）对已存储的向量打分，
+  其他文章只在它的得分超过自己当前第 k 名时插入它，不重算整个语料
+- 增量更新按全量重建时保存的 IDF 快照加权；每晚全量重建一次，校正 IDF 的漂移
+"""
+
+import re
+import zlib
+import asyncio
+import logging
+from collections import Counter
+from datetime import datetime
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import async_session
+from app.core.search import index_meta
+from app.core.search.cjk import CJK_RANGES
+from app.core.search.projection import load_tags, result_columns, to_search_result
+from app.models.article import Article, ArticleStatus
+from app.models.related import ArticleTermVector, RelatedArticle, RelatedTermStats
+from app.models.tag import ArticleTag
+from app.models.user import User
+from app.schemas.article import ArticleListResponse
+
+logger = logging.getLogger(__name__)
+
+# 稀疏向量的存储格式：词的哈希桶下标 + 值（原始向量为带符号的次线性词频）
+VECTOR_DTYPE = np.dtype([("index", "<u4"), ("value", "<f4")])
+
+# 标题、摘要中的词比正文更能代表主题
+FIELD_WEIGHTS = (("title", 3), ("summary", 2), ("content", 1))
+# 正文只取前一部分，长文的尾部（参考文献、附录）对主题贡献不大
+MAX_CONTENT_CHARS = 20000
+# 计算内积时一次展开的 查询数 × 非零元素数 上限，控制临时数组的大小（约 16MB）
+MAX_PRODUCT_CELLS = 4 * 1024 * 1024
+# 按 id 分批查询时 IN 列表的长度
+ID_CHUNK = 500
+
+# 纯数字（年份、编号）对主题没有区分度，不作为词
+_WORD_RE = re.compile(r"[a-z_][a-z0-9_]+")
+_CJK_RUN_RE = re.compile(f"[{CJK_RANGES}]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """英文按词切分（至少 2 个字符），连续的中文按相邻两字（二元组）切分"""
+    text = (text or "").lower()
+    tokens = _WORD_RE.findall(_CJK_RUN_RE.sub(" ", text))
+    for run in _CJK_RUN_RE.findall(text):
+        if len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+def term_vector(title: str, summary: Optional[str], content: str, dim: int) -> bytes:
+    """带符号的哈希词频向量：crc32 取模映射到 dim 个桶（与进程无关，可持久化），
+    adler32 决定符号，使哈希冲突在内积中相互抵消而不是累加；词频取 sign · (1 + log|tf|)"""
+    fields = {"title": title, "summary": summary, "content": (content or "")[:MAX_CONTENT_CHARS]}
+    counts = Counter()
+    for field, weight in FIELD_WEIGHTS:
+        for token in tokenize(fields[field]):
+            data = token.encode("utf-8")
+            sign = 1 if zlib.adler32(data) & 1 else -1
+            counts[zlib.crc32(data) % dim] += sign * weight
+    vector = np.array(sorted((index, value) for index, value in counts.items() if value), dtype=VECTOR_DTYPE)
+    vector["value"] = np.sign(vector["value"]) * (1.0 + np.log(np.abs(vector["value"])))
+    return vector.tobytes()
+
+
+def compute_idf(df: np.ndarray, documents: int) -> np.ndarray:
+    """平滑 IDF：log((1 + N) / (1 + df)) + 1"""
+    return (np.log((1.0 + documents) / (1.0 + df)) + 1.0).astype(np.float32)
+
+
+def weighted_vector(tf: bytes, idf: np.ndarray) -> bytes:
+    """词频向量按 IDF 加权并 L2 归一化，存储格式不变"""
+    vector = np.frombuffer(tf, dtype=VECTOR_DTYPE).copy()
+    vector["value"] *= idf[vector["index"]]
+    norm = np.linalg.norm(vector["value"])
+    if norm > 0:
+        vector["value"] /= norm
+    return vector.tobytes()
+
+
+class VectorChunk:
+    """一批文章的稀疏向量（CSR：按行拼接的下标和值 + 每行的起点）及各自的标签"""
+
+    def __init__(self, ids: Sequence[int], blobs: Sequence[bytes], tags: Dict[int, Set[int]]):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        vectors = [np.frombuffer(blob, dtype=VECTOR_DTYPE) for blob in blobs]
+        self.lengths = np.array([len(vector) for vector in vectors], dtype=np.int64)
+        self.starts = np.concatenate(([0], np.cumsum(self.lengths)[:-1])).astype(np.int64)
+        merged = np.concatenate(vectors) if vectors else np.empty(0, dtype=VECTOR_DTYPE)
+        self.indices = merged["index"].astype(np.int64)
+        self.values = merged["value"]
+        self.tags = [tags.get(int(article_id), set()) for article_id in self.ids]
+        self.tag_counts = np.array([len(t) for t in self.tags], dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def dense(self, dim: int) -> np.ndarray:
+        """展开为 len × dim 的稠密矩阵（只用于少量查询文章）"""
+        matrix = np.zeros((len(self.ids), dim), dtype=np.float32)
+        rows = np.repeat(np.arange(len(self.ids)), self.lengths)
+        matrix[rows, self.indices] = self.values
+        return matrix
+
+    def cosine(self, queries: np.ndarray) -> np.ndarray:
+        """查询（稠密，已归一化）与本批文章的内积，b × len(self)"""
+        result = np.zeros((len(queries), len(self.ids)), dtype=np.float32)
+        nonempty = self.lengths > 0
+        if not nonempty.any():
+            return result
+        starts = self.starts[nonempty]
+        step = max(1, MAX_PRODUCT_CELLS // max(len(self.values), 1))
+        for begin in range(0, len(queries), step):
+            products = queries[begin:begin + step][:, self.indices] * self.values
+            result[begin:begin + step, nonempty] = np.add.reduceat(products, starts, axis=1)
+        return result
+
+    def jaccard(self, query_tags: List[Set[int]]) -> np.ndarray:
+        """查询文章与本批文章的标签 Jaccard 重合度；只在查询文章出现过的标签上展开"""
+        columns = {tag_id: col for col, tag_id in enumerate(sorted(set().union(*query_tags)))}
+        result = np.zeros((len(query_tags), len(self.ids)), dtype=np.float32)
+        if not columns:
+            return result
+        queries = np.zeros((len(query_tags), len(columns)), dtype=np.float32)
+        for row, tag_ids in enumerate(query_tags):
+            queries[row, [columns[tag_id] for tag_id in tag_ids]] = 1.0
+        members = np.zeros((len(self.ids), len(columns)), dtype=np.float32)
+        for row, tag_ids in enumerate(self.tags):
+            cols = [columns[tag_id] for tag_id in tag_ids if tag_id in columns]
+            if cols:
+                members[row, cols] = 1.0
+        overlap = queries @ members.T
+        union = queries.sum(axis=1)[:, None] + self.tag_counts[None, :] - overlap
+        return np.divide(overlap, union, out=result, where=union > 0)
+
+
+class NeighbourAccumulator:
+    """一组查询文章对语料逐批打分，保留每篇的 top-k；可同时记录某一篇对全部文章的得分"""
+
+    def __init__(self, queries: VectorChunk, dim: int, k: int, track_id: Optional[int] = None):
+        self.queries = queries
+        self.dense = queries.dense(dim)
+        self.k = k
+        self.best: List[List[Tuple[float, int]]] = [[] for _ in range(len(queries))]
+        self.track_row = None
+        if track_id is not None and track_id in set(queries.ids.tolist()):
+            self.track_row = int(np.flatnonzero(queries.ids == track_id)[0])
+        self.tracked: Dict[int, float] = {}  # 得分不低于 related_min_score 的文章 -> 得分
+
+    def add(self, chunk: VectorChunk):
+        if not len(chunk) or not len(self.queries):
+            return
+        weight = settings.related_tag_weight
+        combined = (1.0 - weight) * chunk.cosine(self.dense) + weight * chunk.jaccard(self.queries.tags)
+        combined[self.queries.ids[:, None] == chunk.ids[None, :]] = -np.inf
+        min_score = settings.related_min_score
+        for row, line in enumerate(combined):
+            cols = np.flatnonzero(line >= min_score)
+            if row == self.track_row:
+                self.tracked.update((int(chunk.ids[col]), float(line[col])) for col in cols)
+            if len(cols) > self.k:
+                cols = cols[np.argpartition(-line[cols], self.k - 1)[:self.k]]
+            if len(cols):
+                merged = self.best[row] + [(float(line[col]), int(chunk.ids[col])) for col in cols]
+                merged.sort(key=lambda item: (-item[0], item[1]))
+                self.best[row] = merged[:self.k]
+
+    def results(self) -> List[List[Tuple[int, float]]]:
+        return [[(article_id, score) for score, article_id in best] for best in self.best]
+
+
+class RelatedArticles:
+    """相关文章服务：向量与 top-k 邻居都持久化在数据库中，读取只需一次按主键前缀的查询"""
+
+    def __init__(self):
+        self._lock = asyncio.Lock()
+
+    # ---- 向量 ----
+
+    @staticmethod
+    async def _load_idf(db: AsyncSession) -> np.ndarray:
+        """全量重建保存的 IDF 快照；尚未重建或维度已修改时不加权"""
+        dim = settings.related_vector_dim
+        stats = await db.get(RelatedTermStats, 1)
+        if stats is None:
+            return np.ones(dim, dtype=np.float32)
+        idf = np.frombuffer(stats.idf, dtype=np.float32)
+        return idf if len(idf) == dim else np.ones(dim, dtype=np.float32)
+
+    @staticmethod
+    async def _store_vectors(db: AsyncSession, rows, idf: np.ndarray) -> List[bytes]:
+        """计算并保存文章的词频向量和加权向量，返回词频向量"""
+        dim = settings.related_vector_dim
+        values = []
+        for row in rows:
+            tf = term_vector(row.title, row.summary, row.content, dim)
+            values.append({
+                "article_id": row.id,
+                "vector": tf,
+                "weighted": weighted_vector(tf, idf),
+                "updated_at": datetime.utcnow(),
+            })
+        if not values:
+            return []
+        await db.execute(delete(ArticleTermVector).where(
+            ArticleTermVector.article_id.in_([value["article_id"] for value in values])
+        ))
+        await db.execute(insert(ArticleTermVector), values)
+        return [value["vector"] for value in values]
+
+    @staticmethod
+    async def _load_tags(db: AsyncSession, article_ids: List[int]) -> Dict[int, Set[int]]:
+        tags: Dict[int, Set[int]] = {}
+        for start in range(0, len(article_ids), ID_CHUNK):
+            result = await db.execute(
+                select(ArticleTag.article_id, ArticleTag.tag_id)
+                .where(ArticleTag.article_id.in_(article_ids[start:start + ID_CHUNK]))
+            )
+            for article_id, tag_id in result.all():
+                tags.setdefault(article_id, set()).add(tag_id)
+        return tags
+
+    async def _load_chunk(self, db: AsyncSession, article_ids: List[int]) -> VectorChunk:
+        """指定文章（已发布且有向量的）的加权向量"""
+        ids, blobs = [], []
+        for start in range(0, len(article_ids), ID_CHUNK):
+            result = await db.execute(
+                select(ArticleTermVector.article_id, ArticleTermVector.weighted)
+                .join(Article, Article.id == ArticleTermVector.article_id)
+                .where(Article.status == ArticleStatus.PUBLISHED)
+                .where(ArticleTermVector.article_id.in_(article_ids[start:start + ID_CHUNK]))
+                .order_by(ArticleTermVector.article_id)
+            )
+            for article_id, blob in result.all():
+                ids.append(article_id)
+                blobs.append(blob)
+        return VectorChunk(ids, blobs, await self._load_tags(db, ids))
+
+    async def _iter_chunks(self, db: AsyncSession) -> AsyncIterator[VectorChunk]:
+        """按 id 分批读取全部已发布文章的加权向量"""
+        last_id = 0
+        while True:
+            result = await db.execute(
+                select(ArticleTermVector.article_id, ArticleTermVector.weighted)
+                .join(Article, Article.id == ArticleTermVector.article_id)
+                .where(Article.status == ArticleStatus.PUBLISHED, ArticleTermVector.article_id > last_id)
+                .order_by(ArticleTermVector.article_id)
+                .limit(settings.related_batch_size)
+            )
+            rows = result.all()
+            if not rows:
+                return
+            ids = [row[0] for row in rows]
+            yield VectorChunk(ids, [row[1] for row in rows], await self._load_tags(db, ids))
+            last_id = ids[-1]
+
+    @staticmethod
+    async def _write_neighbours(db: AsyncSession, article_ids: List[int], neighbours: List[List[Tuple[int, float]]]):
+        if not article_ids:
+            return
+        for start in range(0, len(article_ids), ID_CHUNK):
+            await db.execute(delete(RelatedArticle).where(
+                RelatedArticle.article_id.in_(article_ids[start:start + ID_CHUNK])
+            ))
+        values = [
+            {"article_id": article_id, "rank": rank, "related_id": related_id, "score": score}
+            for article_id, items in zip(article_ids, neighbours)
+            for rank, (related_id, score) in enumerate(items)
+        ]
+        if values:
+            await db.execute(insert(RelatedArticle), values)
+
+    @staticmethod
+    def _rank_all(chunks: List[VectorChunk], dim: int, k: int) -> Tuple[List[int], List[List[Tuple[int, float]]]]:
+        """全量重建：每批文章作为查询，对全部批次打分"""
+        article_ids, neighbours = [], []
+        for queries in chunks:
+            accumulator = NeighbourAccumulator(queries, dim, k)
+            for chunk in chunks:
+                accumulator.add(chunk)
+            article_ids.extend(int(article_id) for article_id in queries.ids)
+            neighbours.extend(accumulator.results())
+        return article_ids, neighbours
+
+    # ---- 全量重建 ----
+
+    async def rebuild(self, db: AsyncSession) -> str:
+        """在跨进程锁下重算全部向量、IDF 快照和邻居；返回 rebuilt / skipped（其他进程正在重建）"""
+        await index_meta.ensure_meta_table(db)
+        owner = index_meta.make_lock_owner()
+        key = index_meta.RELATED_LOCK_KEY
+        if not await index_meta.acquire_rebuild_lock(db, owner, settings.search_index_lock_timeout, key):
+            return "skipped"
+        try:
+            async with self._lock:
+                dim = settings.related_vector_dim
+                # 按 id 分批计算并写入词频向量，同时统计文档频率；每批提交
+                df = np.zeros(dim, dtype=np.int64)
+                documents = 0
+                unweighted = np.ones(dim, dtype=np.float32)
+                last_id = 0
+                while True:
+                    result = await db.execute(
+                        select(Article.id, Article.title, Article.summary, Article.content)
+                        .where(Article.status == ArticleStatus.PUBLISHED, Article.id > last_id)
+                        .order_by(Article.id)
+                        .limit(settings.related_batch_size)
+                    )
+                    rows = result.all()
+                    if not rows:
+                        break
+                    for tf in await self._store_vectors(db, rows, unweighted):
+                        df[np.frombuffer(tf, dtype=VECTOR_DTYPE)["index"]] += 1
+                    documents += len(rows)
+                    await db.commit()
+                    await index_meta.touch_rebuild_lock(db, owner, key)
+                    last_id = rows[-1].id
+                await db.execute(delete(ArticleTermVector).where(ArticleTermVector.article_id.not_in(
+                    select(Article.id).where(Article.status == ArticleStatus.PUBLISHED)
+                )))
+
+                # 保存 IDF 快照，按它重新加权全部向量
+                idf = compute_idf(df, documents)
+                await db.execute(delete(RelatedTermStats))
+                await db.execute(insert(RelatedTermStats), [{
+                    "id": 1, "document_count": documents, "idf": idf.tobytes(), "updated_at": datetime.utcnow()
+                }])
+                last_id = 0
+                while True:
+                    result = await db.execute(
+                        select(ArticleTermVector.article_id, ArticleTermVector.vector)
+                        .where(ArticleTermVector.article_id > last_id)
+                        .order_by(ArticleTermVector.article_id)
+                        .limit(settings.related_batch_size)
+                    )
+                    rows = result.all()
+                    if not rows:
+                        break
+                    for article_id, tf in rows:
+                        await db.execute(
+                            update(ArticleTermVector)
+                            .where(ArticleTermVector.article_id == article_id)
+                            .values(weighted=weighted_vector(tf, idf))
+                        )
+                    await db.commit()
+                    last_id = rows[-1][0]
+
+                chunks = [chunk async for chunk in self._iter_chunks(db)]
+                article_ids, neighbours = await asyncio.to_thread(
+                    self._rank_all, chunks, dim, settings.related_top_k
+                )
+
+                # 一次性替换，读请求要么看到旧结果要么看到新结果
+                await db.execute(delete(RelatedArticle))
+                await self._write_neighbours(db, article_ids, neighbours)
+                await db.commit()
+                logger.info(f"相关文章重建完成: {len(article_ids)} 篇")
+        except Exception:
+            await db.rollback()
+            raise
+        finally:
+            await index_meta.release_rebuild_lock(db, owner, key)
+        return "rebuilt"
+
+    async def ensure_built(self):
+        """启动时调用：已有结果则跳过，否则在后台构建"""
+        try:
+            async with async_session() as db:
+                built = (await db.execute(select(func.count()).select_from(ArticleTermVector))).scalar()
+                if not built or await db.get(RelatedTermStats, 1) is None:
+                    await self.rebuild(db)
+        except Exception as e:
+            logger.warning(f"构建相关文章失败: {e}")
+
+    # ---- 增量更新 ----
+
+    async def refresh_article(self, db: AsyncSession, article_id: int):
+        """文章新建/修改/删除后调用
+
+        - 该文章以及原来把它列为邻居的文章：对全部已存储的向量流式打分，重算 top-k
+        - 其他文章：得分是对称的，它对某篇文章的得分超过该文章当前第 k 名（或不足 k 篇）时插入它
+        """
+        async with self._lock:
+            result = await db.execute(
+                select(Article.id, Article.title, Article.summary, Article.content, Article.status)
+                .where(Article.id == article_id)
+            )
+            row = result.first()
+            published = row is not None and row.status == ArticleStatus.PUBLISHED
+            if published:
+                await self._store_vectors(db, [row], await self._load_idf(db))
+            else:
+                await db.execute(delete(ArticleTermVector).where(ArticleTermVector.article_id == article_id))
+                await db.execute(delete(RelatedArticle).where(RelatedArticle.article_id == article_id))
+
+            # 原来把它列为邻居的文章可能失去或改变这个邻居，需要完整重算
+            result = await db.execute(
+                select(RelatedArticle.article_id).where(RelatedArticle.related_id == article_id).distinct()
+            )
+            targets = set(result.scalars().all())
+            if published:
+                targets.add(article_id)
+            queries = await self._load_chunk(db, sorted(targets))
+
+            dim, k = settings.related_vector_dim, settings.related_top_k
+            accumulator = NeighbourAccumulator(queries, dim, k, track_id=article_id if published else None)
+            async for chunk in self._iter_chunks(db):
+                await asyncio.to_thread(accumulator.add, chunk)
+            await self._write_neighbours(db, [int(i) for i in queries.ids], accumulator.results())
+
+            # 其他文章：只有得分超过其当前第 k 名时插入
+            candidates = {
+                other: score for other, score in accumulator.tracked.items()
+                if other not in targets
+            }
+            inserts = await self._insert_candidates(db, article_id, candidates, k)
+            await db.commit()
+            logger.debug(f"相关文章增量更新 (article {article_id}): 重算 {len(queries)} 篇，插入 {inserts} 篇")
+
+    async def _insert_candidates(self, db: AsyncSession, article_id: int, candidates: Dict[int, float], k: int) -> int:
+        """把 article_id 插入得分超过其当前第 k 名的文章的邻居列表，返回更新的文章数"""
+        others = sorted(candidates)
+        lists: Dict[int, List[Tuple[int, float]]] = {}
+        for start in range(0, len(others), ID_CHUNK):
+            result = await db.execute(
+                select(RelatedArticle.article_id, RelatedArticle.related_id, RelatedArticle.score)
+                .where(RelatedArticle.article_id.in_(others[start:start + ID_CHUNK]))
+                .order_by(RelatedArticle.article_id, RelatedArticle.rank)
+            )
+            for other, related_id, score in result.all():
+                lists.setdefault(other, []).append((related_id, score))
+
+        changed_ids, changed_lists = [], []
+        for other in others:
+            items = lists.get(other, [])
+            score = candidates[other]
+            if len(items) >= k and score <= items[-1][1]:
+                continue
+            items = sorted(items + [(article_id, score)], key=lambda item: (-item[1], item[0]))[:k]
+            changed_ids.append(other)
+            changed_lists.append(items)
+        await self._write_neighbours(db, changed_ids, changed_lists)
+        return len(changed_ids)
+
+    async def refresh_in_background(self, article_id: int):
+        """供 BackgroundTasks 调用：使用独立会话，失败只记录日志，不影响请求"""
+        try:
+            async with async_session() as db:
+                await self.refresh_article(db, article_id)
+        except Exception as e:
+            logger.warning(f"更新相关文章失败 (article {article_id}): {e}")
+
+    # ---- 读取 ----
+
+    @staticmethod
+    async def get_related(db: AsyncSession, article_id: int, limit: int = 5) -> List[ArticleListResponse]:
+        result = await db.execute(
+            select(*result_columns())
+            .select_from(RelatedArticle)
+            .join(Article, Article.id == RelatedArticle.related_id)
+            .join(User, User.id == Article.author_id)
+            .where(RelatedArticle.article_id == article_id)
+            .where(Article.status == ArticleStatus.PUBLISHED)
+            .order_by(RelatedArticle.rank)
+            .limit(limit)
+        )
+        rows = result.all()
+        tags = await load_tags(db, [row.id for row in rows])
+        return [to_search_result(row, tags.get(row.id, [])) for row in rows]
+
+
+related_articles = RelatedArticles()
@@ -0,0 +1,142 @@
+"""
+搜索结果缓存
+按规范化查询缓存搜索结果，文章写入时通过递增索引代数整体失效
+"""
+
+import json
+import time
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Any, Optional
+
+from app.core.config import settings
+from app.core.redis import redis_manager
+
+logger = logging.getLogger(__name__)
+
+
+class SearchResultCache:
+    """搜索结果缓存：进程内 LRU + Redis 两级
+
+    缓存键由规范化后的查询和过滤条件组成，并带上全局的索引代数（generation）。
+    文章写入时递增代数，旧代数下的缓存自然失效，无需逐个删除。
+    调用方在查询前取一次代数，get/set 都使用这个代数：查询期间代数被递增时，
+    结果写入旧代数下（不会再被读到），而不是被当作新代数下的结果缓存。
+    空结果同样缓存（负缓存），避免重复触发子串备选查询。
+
+    未连接 Redis 时代数只在本进程内递增，其他 worker 写入文章无法使本进程的缓存失效，
+    此时进程内缓存只保留 local_ttl 秒，过期的结果最多存在这么久。
+    """
+
+    GENERATION_KEY = "search:generation"
+    # 缓存值为 {"items": [...], "total": n}
+    KEY_PREFIX = "search:page:"
+
+    def __init__(self, ttl: int = 300, local_size: int = 512, local_ttl: float = 5, generation_ttl: float = 1.0):
+        self.ttl = ttl
+        self.local_size = local_size
+        self.local_ttl = local_ttl
+        self.generation_ttl = generation_ttl  # 本地缓存代数的时长，降低 Redis 往返
+        self._local: "OrderedDict[str, tuple]" = OrderedDict()  # full_key -> (过期时间, 结果)
+        self._generation = 0
+        self._generation_checked_at = 0.0
+
+        # 统计信息（按进程）
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    async def generation(self) -> int:
+        """当前索引代数"""
+        now = time.monotonic()
+        if now - self._generation_checked_at < self.generation_ttl:
+            return self._generation
+        if redis_manager.redis:
+            try:
+                value = await redis_manager.get(self.GENERATION_KEY)
+                self._generation = int(value or 0)
+            except Exception as e:
+                logger.warning(f"读取搜索索引代数失败: {e}")
+        self._generation_checked_at = now
+        return self._generation
+
+    async def bump_generation(self):
+        """文章写入后调用，使所有已缓存的搜索结果失效"""
+        self._local.clear()
+        if redis_manager.redis:
+            try:
+                self._generation = int(await redis_manager.redis.incr(self.GENERATION_KEY))
+            except Exception as e:
+                logger.warning(f"递增搜索索引代数失败: {e}")
+                self._generation += 1
+        else:
+            self._generation += 1
+        self._generation_checked_at = time.monotonic()
+
+    @staticmethod
+    def make_key(normalized_query: str, **filters: Any) -> str:
+        payload = json.dumps([normalized_query, filters], sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str, generation: int) -> Optional[Any]:
+        full_key = f"{generation}:{key}"
+
+        entry = self._local.get(full_key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._local.move_to_end(full_key)
+                self.local_hits += 1
+                return value
+            del self._local[full_key]
+
+        if redis_manager.redis:
+            try:
+                cached = await redis_manager.get(self.KEY_PREFIX + full_key)
+            except Exception as e:
+                logger.warning(f"读取搜索缓存失败: {e}")
+                cached = None
+            if cached is not None:
+                value = json.loads(cached)
+                self._remember(full_key, value)
+                self.redis_hits += 1
+                return value
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: Any, generation: int):
+        """generation 为查询前 get 使用的代数"""
+        full_key = f"{generation}:{key}"
+        self._remember(full_key, value)
+        if redis_manager.redis:
+            try:
+                await redis_manager.set(self.KEY_PREFIX + full_key, json.dumps(value, ensure_ascii=False), expire=self.ttl)
+            except Exception as e:
+                logger.warning(f"写入搜索缓存失败: {e}")
+
+    def _remember(self, full_key: str, value: Any):
+        ttl = self.ttl if redis_manager.redis else self.local_ttl
+        self._local[full_key] = (time.monotonic() + ttl, value)
+        self._local.move_to_end(full_key)
+        while len(self._local) > self.local_size:
+            self._local.popitem(last=False)
+
+    def stats(self) -> dict:
+        lookups = self.local_hits + self.redis_hits + self.misses
+        return {
+            "generation": self._generation,
+            "local_entries": len(self._local),
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.local_hits + self.redis_hits) / lookups, 4) if lookups else 0,
+        }
+
+
+search_result_cache = SearchResultCache(
+    ttl=settings.search_cache_ttl,
+    local_size=settings.search_cache_local_size,
+    local_ttl=settings.search_cache_local_ttl
+)
@@ -1,83 +1,367 @@
 import re
-from typing import List, Optional
+from itertools import chain
+from typing import Callable, List, NamedTuple, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import text, select
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import Session
+from sqlalchemy import event, text, select, func, false, literal_column, table, column
 from collections import Counter
 
+from app.core.config import settings
+from app.core.search.cjk import split_query_terms
 from app.core.search.fts_base_interface import BaseFTSSearch
+from app.core.search.facets import tag_filter
 from app.models.article import Article, ArticleStatus
 from app.models.tag import Tag, ArticleTag
-from app.schemas.article import ArticleListResponse, UserBasicInfo, TagInfo
+from app.models.user import User
+from app.core.search.projection import (
+    HIGHLIGHT_OPEN, HIGHLIGHT_CLOSE, SNIPPET_ELLIPSIS, SNIPPET_TOKENS, SearchPage, result_columns
+)
+
+
+# FTS5 分词方式：
+#   cjk       unicode61 + 写入前由应用逐字切分中文，查询用短语匹配（默认）
+#             触发器不调用应用函数：只写入原文并把文章 id 记入 articles_fts_pending，
+#             应用在提交写过文章的事务前（以及启动校验索引时）把这些行重写为切分后的文本，
+#             sqlite3 命令行等外部工具可以照常写 article 表
+#   trigram   FTS5 内置三元组分词，子串匹配，每个查询词至少 3 个字符
+#   unicode61 原始的按空白/标点分词，不适合中文
+FTS_TOKENIZERS = {"cjk": "unicode61", "trigram": "trigram", "unicode61": "unicode61"}
+
+# 索引结构版本：修改表结构、触发器或写入表达式时递增，启动时据此决定是否重建
+FTS_INDEX_VERSION = 6
+
+# 2/3 字符的前缀索引，加速 "term"* 前缀查询（搜索建议的持久化备选）
+FTS_PREFIX_INDEX = "2 3"
+
+FTS_TABLE = "articles_fts"
+# bm25() 列权重，顺序同 articles_fts 的列：id, title, content, summary, 其余 UNINDEXED 列
+BM25_WEIGHTS = "0.0, 10.0, 1.0, 4.0"
+# 子串搜索用的三元组影子表（标题+正文），替代 LIKE '%q%' 全表扫描
+TRGM_TABLE = "articles_trgm"
+BUILD_SUFFIX = "_build"
+# cjk 模式下等待应用切分的文章 id（触发器写入）
+FTS_PENDING_TABLE = "articles_fts_pending"
+
+
+def segments_in_app() -> bool:
+    """cjk 模式下中文由应用切分，触发器写入的原文需要之后重写"""
+    return settings.search_fts_tokenizer == "cjk"
+
+
+def _indexed(expr: str, segment: bool) -> str:
+    """写入 FTS 表的列表达式，cjk 模式下由应用在连接上注册的 cjk_segment() 切分中文（触发器中不使用）"""
+    if segment and segments_in_app():
+        return f"cjk_segment({expr})"
+    return expr
+
+
+class _FtsTable(NamedTuple):
+    """一张由 article 触发器维护的 FTS5 表（rowid 与文章 id 一致）"""
+    name: str
+    trigger_prefix: str
+    columns: str
+    values: Callable[..., str]  # 参数为列前缀（"new." 或 ""）和是否切分（触发器中为 False）
+    definition: Callable[[], str]
+    watched: str  # 只有这些列变化时才重写索引行（浏览量等其他列的更新不触发重新分词）
+    metadata: str = ""  # 这些列变化时原地更新（UNINDEXED 列，不重写已切分的文本）
+    queued: Callable[[], bool] = lambda: False  # 触发器是否把文章 id 记入 FTS_PENDING_TABLE
+
+
+def _fts_definition() -> str:
+    tokenizer = FTS_TOKENIZERS.get(settings.search_fts_tokenizer, "unicode61")
+    # 三元组分词本身就是子串匹配，不需要前缀索引
+    prefix_option = "" if tokenizer == "trigram" else f", prefix = '{FTS_PREFIX_INDEX}'"
+    return f"""
+        id UNINDEXED,
+        title,
+        content,
+        summary,
+        author_id UNINDEXED,
+        status UNINDEXED,
+        created_at UNINDEXED,
+        updated_at UNINDEXED,
+        tokenize = '{tokenizer}'{prefix_option}
+    """
+
+
+FTS_INDEXES = [
+    _FtsTable(
+        name=FTS_TABLE,
+        trigger_prefix="articles",
+        columns="rowid, id, title, content, summary, author_id, status, created_at, updated_at",
+        values=lambda p, segment=True: (
+            f"{p}id, {p}id, {_indexed(p + 'title', segment)}, {_indexed(p + 'content', segment)}, "
+            f"{_indexed(p + 'summary', segment)}, {p}author_id, {p}status, {p}created_at, {p}updated_at"
+        ),
+        definition=_fts_definition,
+        watched="title, content, summary",
+        metadata="author_id, status, created_at, updated_at",
+        queued=segments_in_app,
+    ),
+    _FtsTable(
+        name=TRGM_TABLE,
+        trigger_prefix="articles_trgm",
+        columns="rowid, title, content",
+        values=lambda p, segment=True: f"{p}id, {p}title, {p}content",
+        definition=lambda: "title, content, tokenize = 'trigram'",
+        watched="title, content",
+    ),
+]
+
+
+def segment_pending(connection) -> int:
+    """把触发器记下的文章在 FTS 表（及构建中的影子表）中重写为切分后的文本，返回处理的文章数
+
+    connection 为同步连接，需已注册 cjk_segment()（应用引擎建立连接时注册）；在调用方的事务中执行
+    """
+    index = FTS_INDEXES[0]
+    names = [index.name, index.name + BUILD_SUFFIX, FTS_PENDING_TABLE]
+    existing = set(connection.execute(
+        text("SELECT name FROM sqlite_master WHERE type = 'table' AND name IN (:live, :build, :pending)"),
+        dict(zip(("live", "build", "pending"), names))
+    ).scalars())
+    if FTS_PENDING_TABLE not in existing:
+        return 0
+    pending = connection.execute(text(f"SELECT count(*) FROM {FTS_PENDING_TABLE}")).scalar()
+    if not pending:
+        return 0
+    for name in names[:2]:
+        if name not in existing:
+            continue
+        connection.execute(text(f"DELETE FROM {name} WHERE rowid IN (SELECT id FROM {FTS_PENDING_TABLE})"))
+        connection.execute(text(f"""
+            INSERT INTO {name}({index.columns})
+            SELECT {index.values('')} FROM article WHERE id IN (SELECT id FROM {FTS_PENDING_TABLE})
+        """))
+    connection.execute(text(f"DELETE FROM {FTS_PENDING_TABLE}"))
+    return pending
+
+
+_segmenter_installed = False
+
+
+def install_fts_segmenter():
+    """cjk 模式：写过 article 表的会话在提交前切分触发器记下的文章，与文章写入在同一事务中完成"""
+    global _segmenter_installed
+    if _segmenter_installed or not segments_in_app():
+        return
+    _segmenter_installed = True
+    article_table = Article.__tablename__
+
+    @event.listens_for(Session, "after_flush")
+    def _track_flush(session, flush_context):
+        if any(isinstance(obj, Article) for obj in chain(session.new, session.dirty, session.deleted)):
+            session.info["fts_pending"] = True
+
+    @event.listens_for(Session, "do_orm_execute")
+    def _track_execute(orm_execute_state):
+        target = getattr(orm_execute_state.statement, "table", None)
+        if not orm_execute_state.is_select and getattr(target, "name", None) == article_table:
+            orm_execute_state.session.info["fts_pending"] = True
+
+    @event.listens_for(Session, "before_commit")
+    def _segment(session):
+        # 提交时才 flush 的改动此时还没有写入，先 flush 让触发器记下文章 id
+        session.flush()
+        if session.info.pop("fts_pending", False):
+            segment_pending(session.connection())
+
+    @event.listens_for(Session, "after_rollback")
+    def _reset(session):
+        session.info.pop("fts_pending", None)
 
 
 class SQLiteFTSSearch(BaseFTSSearch):
+    @staticmethod
+    async def _drop_triggers(db: AsyncSession, trigger_prefix: str):
+        for suffix in ("ai", "ad", "au", "am"):
+            await db.execute(text(f"DROP TRIGGER IF EXISTS {trigger_prefix}_{suffix}"))
+
+    @staticmethod
+    async def _create_table(db: AsyncSession, index: _FtsTable, table: str):
+        await db.execute(text(f"CREATE VIRTUAL TABLE {table} USING fts5({index.definition()})"))
+
+    @staticmethod
+    async def _create_triggers(db: AsyncSession, index: _FtsTable, table: str, trigger_prefix: str):
+        """article 表的增删改同步到 FTS 表，按 rowid 定位，无需扫描
+
+        触发器只使用 SQLite 内置语句：需要切分的表写入原文并记下文章 id，由 segment_pending 重写
+        """
+        queue = ""
+        if index.queued():
+            await db.execute(text(f"CREATE TABLE IF NOT EXISTS {FTS_PENDING_TABLE} (id INTEGER PRIMARY KEY)"))
+            queue = f"INSERT OR IGNORE INTO {FTS_PENDING_TABLE}(id) VALUES (new.id);"
+        await db.execute(text(f"""
+            CREATE TRIGGER {trigger_prefix}_ai AFTER INSERT ON article BEGIN
+                INSERT INTO {table}({index.columns}) VALUES ({index.values('new.', segment=False)});
+                {queue}
+            END
+        """))
+        await db.execute(text(f"""
+            CREATE TRIGGER {trigger_prefix}_ad AFTER DELETE ON article BEGIN
+                DELETE FROM {table} WHERE rowid = old.id;
+            END
+        """))
+        await db.execute(text(f"""
+            CREATE TRIGGER {trigger_prefix}_au AFTER UPDATE OF {index.watched} ON article BEGIN
+                DELETE FROM {table} WHERE rowid = old.id;
+                INSERT INTO {table}({index.columns}) VALUES ({index.values('new.', segment=False)});
+                {queue}
+            END
+        """))
+        if index.metadata:
+            # 状态、作者等 UNINDEXED 列原地更新，保留已切分的文本
+            assignments = ", ".join(f"{name} = new.{name}" for name in index.metadata.split(", "))
+            await db.execute(text(f"""
+                CREATE TRIGGER {trigger_prefix}_am AFTER UPDATE OF {index.metadata} ON article BEGIN
+                    UPDATE {table} SET {assignments} WHERE rowid = old.id;
+                END
+            """))
+
     @staticmethod
     async def drop_fts_table(db: AsyncSession):
-        async with db.begin():
-            await db.execute(text("DROP TRIGGER IF EXISTS articles_ai"))
-            await db.execute(text("DROP TRIGGER IF EXISTS articles_ad"))
-            await db.execute(text("DROP TRIGGER IF EXISTS articles_au"))
-            await db.execute(text("DROP TABLE IF EXISTS articles_fts"))
+        for index in FTS_INDEXES:
+            await SQLiteFTSSearch._drop_triggers(db, index.trigger_prefix)
+            await db.execute(text(f"DROP TABLE IF EXISTS {index.name}"))
+        await db.execute(text(f"DROP TABLE IF EXISTS {FTS_PENDING_TABLE}"))
+        await db.commit()
 
     @staticmethod
     async def create_fts_table(db: AsyncSession):
         await SQLiteFTSSearch.drop_fts_table(db)
-        async with db.begin():
-            await db.execute(text("""
-                CREATE VIRTUAL TABLE articles_fts USING fts5(
-                    id UNINDEXED,
-                    title,
-                    content,
-                    summary,
-                    author_id UNINDEXED,
-                    status UNINDEXED,
-                    created_at UNINDEXED,
-                    updated_at UNINDEXED
-                )
-            """))
-            await db.execute(text("""
-                CREATE TRIGGER articles_ai AFTER INSERT ON article BEGIN
-                    INSERT INTO articles_fts(id, title, content, summary, author_id, status, created_at, updated_at)
-                    VALUES (new.id, new.title, new.content, new.summary, new.author_id, new.status, new.created_at, new.updated_at);
-                END
-            """))
-            await db.execute(text("""
-                CREATE TRIGGER articles_ad AFTER DELETE ON article BEGIN
-                    DELETE FROM articles_fts WHERE id = old.id;
-                END
-            """))
-            await db.execute(text("""
-                CREATE TRIGGER articles_au AFTER UPDATE ON article BEGIN
-                    UPDATE articles_fts SET
-                        title = new.title,
-                        content = new.content,
-                        summary = new.summary,
-                        author_id = new.author_id,
-                        status = new.status,
-                        updated_at = new.updated_at
-                    WHERE id = new.id;
-                END
-            """))
+        for index in FTS_INDEXES:
+            await SQLiteFTSSearch._create_table(db, index, index.name)
+            await SQLiteFTSSearch._create_triggers(db, index, index.name, index.trigger_prefix)
+        await db.commit()
 
     @staticmethod
     async def populate_fts_table(db: AsyncSession):
-        async with db.begin():
-            await db.execute(text("DELETE FROM articles_fts"))
-            await db.execute(text("""
-                INSERT INTO articles_fts(id, title, content, summary, author_id, status, created_at, updated_at)
-                SELECT id, title, content, summary, author_id, status, created_at, updated_at
-                FROM article WHERE status = 'PUBLISHED'
+        await SQLiteFTSSearch._fill_in_batches(db, [(index, index.name) for index in FTS_INDEXES])
+
+    @staticmethod
+    def index_version() -> str:
+        return f"sqlite:{FTS_INDEX_VERSION}:{settings.search_fts_tokenizer}"
+
+    @staticmethod
+    async def _fill_in_batches(db: AsyncSession, targets, on_batch=None):
+        """按 id 分批写入 (index, 表名) 列表中的每张表，每批单独提交，写锁只持有很短的时间"""
+        batch_size = settings.search_index_batch_size
+        last_id = 0
+        while True:
+            result = await db.execute(
+                text("SELECT max(id) FROM (SELECT id FROM article WHERE id > :last ORDER BY id LIMIT :limit)"),
+                {"last": last_id, "limit": batch_size}
+            )
+            batch_end = result.scalar()
+            if batch_end is None:
+                break
+            params = {"last": last_id, "end": batch_end}
+            for index, table in targets:
+                # 先删后插：构建期间触发器可能已经写入了同一行
+                await db.execute(text(f"DELETE FROM {table} WHERE rowid > :last AND rowid <= :end"), params)
+                await db.execute(text(f"""
+                    INSERT INTO {table}({index.columns})
+                    SELECT {index.values('')} FROM article WHERE id > :last AND id <= :end
+                """), params)
+            await db.commit()
+            if on_batch:
+                await on_batch()
+            last_id = batch_end
+
+    @staticmethod
+    async def build_fts_index(db: AsyncSession, on_batch):
+        """在影子表中分批构建新索引，完成后一次性替换，构建期间旧索引照常提供查询"""
+        targets = []
+        for index in FTS_INDEXES:
+            build_table = index.name + BUILD_SUFFIX
+            await SQLiteFTSSearch._drop_triggers(db, index.trigger_prefix + BUILD_SUFFIX)
+            await db.execute(text(f"DROP TABLE IF EXISTS {build_table}"))
+            await SQLiteFTSSearch._create_table(db, index, build_table)
+            # 先挂触发器再回填，构建期间的写入同样进入影子表
+            await SQLiteFTSSearch._create_triggers(db, index, build_table, index.trigger_prefix + BUILD_SUFFIX)
+            targets.append((index, build_table))
+        await db.commit()
+
+        await SQLiteFTSSearch._fill_in_batches(db, targets, on_batch)
+
+        # 替换：单个事务内完成，先切分构建期间触发器写入的原文
+        await db.run_sync(lambda session: segment_pending(session.connection()))
+        for index, build_table in targets:
+            await SQLiteFTSSearch._drop_triggers(db, index.trigger_prefix + BUILD_SUFFIX)
+            await SQLiteFTSSearch._drop_triggers(db, index.trigger_prefix)
+            await db.execute(text(f"DROP TABLE IF EXISTS {index.name}"))
+            await db.execute(text(f"ALTER TABLE {build_table} RENAME TO {index.name}"))
+            await SQLiteFTSSearch._create_triggers(db, index, index.name, index.trigger_prefix)
+        if not segments_in_app():
+            await db.execute(text(f"DROP TABLE IF EXISTS {FTS_PENDING_TABLE}"))
+        await db.commit()
+
+    @staticmethod
+    async def verify_fts_index(db: AsyncSession) -> bool:
+        # 应用之外写入的文章（外部工具、迁移）在这里补齐切分
+        segmented = await db.run_sync(lambda session: segment_pending(session.connection()))
+        if segmented:
+            await db.commit()
+            print(f"✅ 已切分 {segmented} 篇应用之外写入的文章")
+        article_count = (await db.execute(text("SELECT count(*) FROM article"))).scalar()
+        for index in FTS_INDEXES:
+            try:
+                fts_count = (await db.execute(text(f"SELECT count(*) FROM {index.name}"))).scalar()
+            except Exception as e:
+                await db.rollback()
+                print(f"⚠️ FTS 索引 {index.name} 不可用: {e}")
+                return False
+            if fts_count == article_count:
+                continue
+
+            # 行数不一致（例如触发器缺失期间的写入），只补齐差异行
+            print(f"⚠️ FTS 索引 {index.name} 行数 {fts_count} 与文章数 {article_count} 不一致，补齐差异")
+            await db.execute(text(f"DELETE FROM {index.name} WHERE rowid NOT IN (SELECT id FROM article)"))
+            await db.execute(text(f"""
+                INSERT INTO {index.name}({index.columns})
+                SELECT {index.values('')} FROM article WHERE id NOT IN (SELECT rowid FROM {index.name})
             """))
+            await db.commit()
+        return True
+
+    @staticmethod
+    def match_filter(query: str):
+        fts_query = SQLiteFTSSearch.build_search_query(query)
+        if not fts_query:
+            return false()
+        return Article.id.in_(
+            select(literal_column("rowid")).select_from(table(FTS_TABLE))
+            .where(text(f"{FTS_TABLE} MATCH :match_query").bindparams(match_query=fts_query))
+        )
+
+    @staticmethod
+    def substring_filter(query: str):
+        """子串匹配：走三元组影子表；少于 3 个字符时三元组无法命中，改用全文索引"""
+        query = query.strip()
+        if len(query) < max(settings.search_substring_min_length, 3):
+            return SQLiteFTSSearch.match_filter(query)
+        # 三元组分词下，双引号短语即为大小写不敏感的子串匹配
+        phrase = '"%s"' % query.replace('"', '""')
+        return Article.id.in_(
+            select(literal_column("rowid")).select_from(table(TRGM_TABLE))
+            .where(text(f"{TRGM_TABLE} MATCH :substring_query").bindparams(substring_query=phrase))
+        )
 
     @staticmethod
     def build_search_query(search_term: str) -> str:
-        """构建搜索查询：分词并前缀匹配"""
-        search_term = re.sub(r'[^\w\s]', ' ', search_term).strip()
-        if not search_term:
-            return ""
-        words = search_term.split()
-        query_parts = [f'"{word}"*' for word in words if len(word) >= 2]
+        """构建搜索查询：与建索引时的分词方式保持一致"""
+        tokenizer = settings.search_fts_tokenizer
+        query_parts = []
+        for kind, term in split_query_terms(search_term):
+            if tokenizer == "cjk" and kind == "cjk":
+                # 逐字切分后的中文用短语匹配，要求字符在原文中相邻
+                query_parts.append('"%s"' % " ".join(term))
+            elif tokenizer == "trigram":
+                # 三元组分词做子串匹配，不足 3 个字符的词无法命中索引
+                if len(term) >= 3:
+                    query_parts.append(f'"{term}"')
+            elif len(term) >= 2:
+                query_parts.append(f'"{term}"*')
         return " AND ".join(query_parts)
 
     @staticmethod
@@ -87,63 +371,66 @@ class SQLiteFTSSearch(BaseFTSSearch):
         skip: int = 0,
         limit: int = 10,
         status: Optional[ArticleStatus] = None,
-        author: Optional[str] = None
-    ) -> List[ArticleListResponse]:
+        author: Optional[str] = None,
+        tags: Optional[List[str]] = None
+    ) -> SearchPage:
         fts_query = SQLiteFTSSearch.build_search_query(query)
         if not fts_query:
-            return []
-
-        sql = """
-            SELECT a.id FROM articles_fts fts
-            JOIN article a ON fts.id = a.id
-            WHERE fts MATCH :query
-        """
-        params = {"query": fts_query}
+            return SearchPage([], 0)
 
-        if status:
-            sql += " AND a.status = :status"
-            params["status"] = status.value
-        else:
-            sql += " AND a.status = 'PUBLISHED'"
+        tags_json = (
+            select(func.json_group_array(func.json_object("id", Tag.id, "name", Tag.name)))
+            .select_from(ArticleTag)
+            .join(Tag, Tag.id == ArticleTag.tag_id)
+            .where(ArticleTag.article_id == Article.id)
+            .correlate(Article)
+            .scalar_subquery()
+        )
+        fts_table = table(FTS_TABLE, column("rowid"))
+        fts = literal_column(FTS_TABLE)
+        match = text(f"{FTS_TABLE} MATCH :query")
 
+        # 一次 MATCH 扫描得到相关度和过滤后的命中，总数在其上开窗统计；
+        # FTS5 的辅助函数不能与窗口函数出现在同一层，所以分两层
+        # bm25() 越小越相关；列权重与 PostgreSQL 的 A/B/C 对应：标题 > 摘要 > 正文
+        matched = (
+            select(Article.id.label("id"), literal_column(f"bm25({FTS_TABLE}, {BM25_WEIGHTS})").label("rank"))
+            .select_from(fts_table)
+            .join(Article, fts_table.c.rowid == Article.id)
+            .where(match)
+            .where(Article.status == (status or ArticleStatus.PUBLISHED))
+            .where(tag_filter(tags))
+        )
         if author:
-            sql += ' AND a.author_id IN (SELECT id FROM "user" WHERE username = :author)'
-            params["author"] = author
-
-        sql += " ORDER BY bm25(fts) DESC, a.created_at DESC LIMIT :limit OFFSET :skip"
-        params["limit"] = limit
-        params["skip"] = skip
-
-        result = await db.execute(text(sql), params)
-        article_ids = [row[0] for row in result.fetchall()]
-        if not article_ids:
-            return []
+            matched = matched.join(User, User.id == Article.author_id).where(User.username == author)
+        matched = matched.subquery()
+        hits = (
+            select(matched.c.id, matched.c.rank, func.count().over().label("total"))
+            .order_by(matched.c.rank, matched.c.id.desc())
+            .offset(skip)
+            .limit(limit)
+            .subquery()
+        )
 
-        result = await db.execute(
-            select(Article).options(
-                selectinload(Article.author),
-                selectinload(Article.tags).selectinload(ArticleTag.tag),
-                selectinload(Article.comments)
-            ).where(Article.id.in_(article_ids))
+        # 只对当前页按 rowid 回查 FTS 表生成高亮标题和正文摘要，不读取正文和评论
+        stmt = (
+            select(
+                *result_columns(),
+                tags_json.label("tags"),
+                func.highlight(fts, 1, HIGHLIGHT_OPEN, HIGHLIGHT_CLOSE).label("title_highlight"),
+                func.snippet(fts, 2, HIGHLIGHT_OPEN, HIGHLIGHT_CLOSE, SNIPPET_ELLIPSIS, SNIPPET_TOKENS).label("snippet"),
+                hits.c.total,
+            )
+            .select_from(hits)
+            .join(fts_table, fts_table.c.rowid == hits.c.id)
+            .join(Article, Article.id == hits.c.id)
+            .join(User, User.id == Article.author_id)
+            .where(match)
+            .order_by(hits.c.rank, hits.c.id.desc())
         )
-        articles = result.scalars().all()
-        article_map = {a.id: a for a in articles}
-        sorted_articles = [article_map[i] for i in article_ids if i in article_map]
-
-        return [
-            ArticleListResponse(
-                id=a.id,
-                title=a.title,
-                summary=a.summary,
-                status=a.status,
-                author=UserBasicInfo.model_validate(a.author),
-                tags=[TagInfo.model_validate(at.tag) for at in a.tags if at.tag],
-                created_at=a.created_at,
-                updated_at=a.updated_at,
-                view_count=0,
-                comment_count=len(a.comments or [])
-            ) for a in sorted_articles
-        ]
+
+        result = await db.execute(stmt, {"query": fts_query})
+        return SearchPage.from_rows(result.all(), skip)
 
     @staticmethod
     async def get_search_suggestions(db: AsyncSession, query: str, limit: int = 5) -> List[str]:
@@ -152,9 +439,10 @@ class SQLiteFTSSearch(BaseFTSSearch):
             return []
 
         sql = """
-            SELECT DISTINCT title FROM articles_fts fts
-            WHERE fts MATCH :query
-            ORDER BY bm25(fts) DESC
+            SELECT DISTINCT a.title FROM articles_fts
+            JOIN article a ON articles_fts.rowid = a.id
+            WHERE articles_fts MATCH :query AND a.status = 'PUBLISHED'
+            ORDER BY bm25(articles_fts)
             LIMIT :limit
         """
         result = await db.execute(text(sql), {"query": fts_query, "limit": limit})
@@ -0,0 +1,249 @@
+"""
+搜索建议前缀索引
+启动时把已发布文章的标题和标签名加载到进程内的有序数组，按前缀二分查找，
+输入联想不再访问数据库；文章/标签写入后通过 Redis 发布订阅增量同步到所有进程
+"""
+
+import re
+import json
+import math
+import heapq
+import asyncio
+import logging
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.redis import redis_manager
+from app.models.article import Article, ArticleStatus
+from app.models.tag import Tag, ArticleTag
+
+logger = logging.getLogger(__name__)
+
+_WORD_SPLIT_RE = re.compile(r"[\s\-_,\.|/:;，。！？、（）()\[\]【】《》\"'“”]+")
+
+# 单次查询最多检查的候选数，避免一两个字母的前缀扫描整个数组
+MAX_SCAN = 2000
+
+
+def _normalize(value: str) -> str:
+    return " ".join(value.lower().split())
+
+
+def _prefix_keys(text: str) -> List[str]:
+    """一个条目的可匹配前缀：整段文本（第一个），以及其中每个词开头的后缀"""
+    normalized = _normalize(text)
+    if not normalized:
+        return []
+    keys = [normalized]
+    for match in _WORD_SPLIT_RE.finditer(normalized):
+        rest = normalized[match.end():]
+        if rest and rest not in keys:
+            keys.append(rest)
+    return keys
+
+
+class SuggestionIndex:
+    """标题/标签名前缀索引（有序数组 + 二分查找）
+
+    条目按 (kind, id) 标识，kind 为 article 或 tag；权重取浏览量/文章数的对数，
+    热门条目排在前面。
+    """
+
+    CHANNEL = "search:suggest"
+
+    def __init__(self, cache_size: int = 1024):
+        self._entries: Dict[Tuple[str, int], Tuple[str, float, List[str]]] = {}
+        self._keys: List[Tuple[str, str, int]] = []
+        self._cache: "OrderedDict[Tuple[str, int], List[str]]" = OrderedDict()
+        self._cache_size = cache_size
+        self._listener: Optional[asyncio.Task] = None
+        self.ready = False
+
+    # ---- 本地增删 ----
+
+    def _remove(self, kind: str, item_id: int):
+        entry = self._entries.pop((kind, item_id), None)
+        if not entry:
+            return
+        for key in entry[2]:
+            idx = bisect_left(self._keys, (key, kind, item_id))
+            if idx < len(self._keys) and self._keys[idx] == (key, kind, item_id):
+                del self._keys[idx]
+
+    def _upsert(self, kind: str, item_id: int, text: str, weight: float):
+        self._remove(kind, item_id)
+        keys = _prefix_keys(text)
+        if not keys:
+            return
+        self._entries[(kind, item_id)] = (text, weight, keys)
+        for key in keys:
+            insort(self._keys, (key, kind, item_id))
+
+    def apply(self, op: dict):
+        """应用一条变更（本进程写入或从其他进程收到）"""
+        action = op.get("op")
+        if action == "upsert":
+            self._upsert(op["kind"], op["id"], op["text"], op["weight"])
+        elif action == "delete":
+            self._remove(op["kind"], op["id"])
+        self._cache.clear()
+
+    # ---- 查询 ----
+
+    def suggest(self, query: str, limit: int = 5) -> List[str]:
+        prefix = _normalize(query)
+        if not prefix:
+            return []
+        cache_key = (prefix, limit)
+        if cache_key in self._cache:
+            self._cache.move_to_end(cache_key)
+            return self._cache[cache_key]
+
+        candidates = {}
+        idx = bisect_left(self._keys, (prefix,))
+        scanned = 0
+        while idx < len(self._keys) and scanned < MAX_SCAN:
+            key, kind, item_id = self._keys[idx]
+            if not key.startswith(prefix):
+                break
+            text, weight, item_keys = self._entries[(kind, item_id)]
+            # 整段前缀命中优先于词中命中（item_keys[0] 为整段文本）
+            score = weight + (1.0 if key == item_keys[0] else 0.0)
+            if candidates.get(text, -1.0) < score:
+                candidates[text] = score
+            idx += 1
+            scanned += 1
+
+        result = [text for text, _ in heapq.nlargest(limit, candidates.items(), key=lambda item: item[1])]
+        self._cache[cache_key] = result
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+        return result
+
+    def stats(self) -> dict:
+        return {"ready": self.ready, "entries": len(self._entries), "keys": len(self._keys)}
+
+    # ---- 加载与同步 ----
+
+    @staticmethod
+    def _article_weight(view_count: Optional[int]) -> float:
+        return math.log1p(view_count or 0)
+
+    @staticmethod
+    def _tag_weight(article_count: Optional[int]) -> float:
+        return math.log1p(article_count or 0)
+
+    async def load(self, db: AsyncSession):
+        """全量加载：只查询标题、浏览量和标签计数"""
+        result = await db.execute(
+            select(Article.id, Article.title, Article.view_count)
+            .where(Article.status == ArticleStatus.PUBLISHED)
+        )
+        articles = result.all()
+        result = await db.execute(
+            select(Tag.id, Tag.name, func.count(ArticleTag.id))
+            .outerjoin(ArticleTag, ArticleTag.tag_id == Tag.id)
+            .group_by(Tag.id, Tag.name)
+        )
+        tags = result.all()
+
+        entries = {}
+        keys = []
+        for kind, rows, weigh in (("article", articles, self._article_weight), ("tag", tags, self._tag_weight)):
+            for item_id, text, count in rows:
+                item_keys = _prefix_keys(text or "")
+                if not item_keys:
+                    continue
+                entries[(kind, item_id)] = (text, weigh(count), item_keys)
+                keys.extend((key, kind, item_id) for key in item_keys)
+        keys.sort()
+
+        self._entries = entries
+        self._keys = keys
+        self._cache.clear()
+        self.ready = True
+
+    async def _publish(self, op: dict):
+        self.apply(op)
+        if redis_manager.redis:
+            try:
+                await redis_manager.redis.publish(self.CHANNEL, json.dumps(op, ensure_ascii=False))
+            except Exception as e:
+                logger.warning(f"广播搜索建议变更失败: {e}")
+
+    async def refresh_article(self, db: AsyncSession, article_id: int):
+        """文章保存后调用：按当前状态更新标题条目及其标签的权重"""
+        result = await db.execute(
+            select(Article.title, Article.status, Article.view_count).where(Article.id == article_id)
+        )
+        row = result.first()
+        if row and row.status == ArticleStatus.PUBLISHED:
+            await self._publish({
+                "op": "upsert", "kind": "article", "id": article_id,
+                "text": row.title, "weight": self._article_weight(row.view_count)
+            })
+        else:
+            await self._publish({"op": "delete", "kind": "article", "id": article_id})
+
+        result = await db.execute(
+            select(ArticleTag.tag_id).where(ArticleTag.article_id == article_id)
+        )
+        for tag_id in result.scalars().all():
+            await self.refresh_tag(db, tag_id)
+
+    async def remove_article(self, article_id: int):
+        await self._publish({"op": "delete", "kind": "article", "id": article_id})
+
+    async def refresh_tag(self, db: AsyncSession, tag_id: int):
+        result = await db.execute(
+            select(Tag.name, func.count(ArticleTag.id))
+            .outerjoin(ArticleTag, ArticleTag.tag_id == Tag.id)
+            .where(Tag.id == tag_id)
+            .group_by(Tag.id, Tag.name)
+        )
+        row = result.first()
+        if row:
+            await self._publish({
+                "op": "upsert", "kind": "tag", "id": tag_id,
+                "text": row[0], "weight": self._tag_weight(row[1])
+            })
+        else:
+            await self.remove_tag(tag_id)
+
+    async def remove_tag(self, tag_id: int):
+        await self._publish({"op": "delete", "kind": "tag", "id": tag_id})
+
+    async def _listen(self):
+        pubsub = redis_manager.redis.pubsub()
+        await pubsub.subscribe(self.CHANNEL)
+        try:
+            async for message in pubsub.listen():
+                if message.get("type") != "message":
+                    continue
+                try:
+                    self.apply(json.loads(message["data"]))
+                except Exception as e:
+                    logger.warning(f"应用搜索建议变更失败: {e}")
+        finally:
+            await pubsub.unsubscribe(self.CHANNEL)
+            await pubsub.close()
+
+    def start_listener(self):
+        if redis_manager.redis and self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop_listener(self):
+        if self._listener:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._listener = None
+
+
+suggestion_index = SuggestionIndex()
@@ -1,15 +1,18 @@
 from datetime import datetime, timedelta
 from typing import Optional, Union, Annotated
+import uuid
 import logging
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
 from app.core.config import settings
 from app.core.database import get_db, async_session
+from app.core.unit_of_work import current_unit_of_work
+from app.core.token_revocation import token_revocation
 from app.models.user import User, UserRole
 
 # Configure logging
@@ -40,7 +43,9 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.access_token_expire_minutes)
     
-    to_encode.update({"exp": expire, "type": "access"})
+    # jti 用于单独吊销；ver 由调用方传入用户的 token_version
+    to_encode.setdefault("ver", 0)
+    to_encode.update({"exp": expire, "type": "access", "jti": uuid.uuid4().hex})
     logger.info(f"Creating access token with data: {to_encode}")
     encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
     logger.info(f"Access token created: {encoded_jwt[:20]}...")
@@ -51,7 +56,8 @@ def create_refresh_token(data: dict) -> str:
     """Create refresh token"""
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(days=settings.refresh_token_expire_days)
-    to_encode.update({"exp": expire, "type": "refresh"})
+    to_encode.setdefault("ver", 0)
+    to_encode.update({"exp": expire, "type": "refresh", "jti": uuid.uuid4().hex})
     logger.info(f"Creating refresh token with data: {to_encode}")
     encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
     logger.info(f"Refresh token created: {encoded_jwt[:20]}...")
@@ -89,6 +95,7 @@ def verify_token(token: str) -> Optional[dict]:
 
 
 async def get_current_user(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(oauth2_scheme),
     db: AsyncSession = Depends(get_db)
 ) -> User:
@@ -115,12 +122,19 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
     
+    # 认证中间件已在本请求的会话中加载过该用户时直接复用
+    uow = current_unit_of_work(request)
+    if uow is not None and uow.user is not None and uow.user.username == username:
+        return uow.user
+    
     result = await db.execute(select(User).where(getattr(User, "username") == username))
     user = result.scalar_one_or_none()
     
-    if user is None:
+    if user is None or not await token_revocation.is_valid(credentials.credentials, payload, user):
         raise credentials_exception
     
+    if uow is not None:
+        uow.user = user
     return user
 
 
@@ -140,6 +154,8 @@ async def get_current_user_ws(token: str) -> Optional[User]:
         async with async_session() as db:
             result = await db.execute(select(User).where(User.username == username))
             user = result.scalar_one_or_none()
+            if user is None or not await token_revocation.is_valid(token, payload, user):
+                return None
             return user
     except JWTError:
         return None
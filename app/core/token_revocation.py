@@ -0,0 +1,129 @@
+"""
+令牌吊销
+令牌签发时带 jti（唯一 ID）和 ver（用户的 token_version）两个声明，校验时不访问 Redis：
+- 吊销用户的全部令牌：递增 user.token_version。认证时本来就要加载用户，直接比较版本号即可
+- 吊销单个令牌（退出登录）：jti 写入 Redis 有序集合，分数为令牌的过期时间（即 TTL 等于剩余有效期），
+  并通过 Pub/Sub 通知所有 worker；每个 worker 在本地保存未过期的吊销 jti，启动时从 Redis 加载
+
+本次改动之前签发的令牌没有 jti，仍按旧的 blacklist:{token} 键检查，过期后自然消失。
+"""
+
+import json
+import time
+import asyncio
+import logging
+from typing import Dict, Optional
+
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.redis import redis_manager
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+
+class TokenRevocation:
+    CHANNEL = "auth:revocation"
+    REVOKED_KEY = "auth:revoked_jti"  # 有序集合：成员为 jti，分数为令牌过期时间戳
+
+    def __init__(self):
+        self._revoked: Dict[str, float] = {}  # jti -> 过期时间戳
+        self._listener: Optional[asyncio.Task] = None
+
+    # ---- 校验（不访问网络） ----
+
+    def is_revoked(self, jti: str) -> bool:
+        exp = self._revoked.get(jti)
+        if exp is None:
+            return False
+        if exp <= time.time():
+            # 令牌已过期，本身就无法通过校验，记录可以丢弃
+            self._revoked.pop(jti, None)
+            return False
+        return True
+
+    async def is_valid(self, token: str, payload: dict, user: User) -> bool:
+        """payload 为 token 验证签名后的声明，user 为令牌对应的用户"""
+        if payload.get("ver", 0) != (user.token_version or 0):
+            return False
+        jti = payload.get("jti")
+        if jti:
+            return not self.is_revoked(jti)
+        # 旧令牌（无 jti）：按整串令牌检查黑名单
+        return not await redis_manager.exists(f"blacklist:{token}")
+
+    # ---- 吊销 ----
+
+    async def revoke_token(self, payload: dict):
+        """吊销单个令牌，记录保留到令牌过期"""
+        jti, exp = payload.get("jti"), payload.get("exp")
+        if not jti or not exp or exp <= time.time():
+            return
+        self._revoked[jti] = exp
+        if not redis_manager.redis:
+            return
+        try:
+            pipe = redis_manager.redis.pipeline()
+            pipe.zadd(self.REVOKED_KEY, {jti: exp})
+            pipe.zremrangebyscore(self.REVOKED_KEY, "-inf", time.time())
+            pipe.publish(self.CHANNEL, json.dumps({"jti": jti, "exp": exp}))
+            await pipe.execute()
+        except Exception as e:
+            logger.warning(f"写入令牌吊销记录失败: {e}")
+
+    @staticmethod
+    async def revoke_user(db: AsyncSession, user_id: int) -> int:
+        """吊销用户已签发的全部令牌（递增 token_version），返回新版本号"""
+        result = await db.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(token_version=User.token_version + 1)
+            .returning(User.token_version)
+        )
+        version = result.scalar_one()
+        await db.commit()
+        return version
+
+    # ---- 本地副本 ----
+
+    async def sync(self):
+        """清理已过期的记录，并从 Redis 重新加载未过期的吊销 jti"""
+        if not redis_manager.redis:
+            return
+        now = time.time()
+        await redis_manager.redis.zremrangebyscore(self.REVOKED_KEY, "-inf", now)
+        entries = await redis_manager.redis.zrangebyscore(self.REVOKED_KEY, now, "+inf", withscores=True)
+        self._revoked = {jti: exp for jti, exp in entries}
+
+    async def _listen(self):
+        pubsub = redis_manager.redis.pubsub()
+        await pubsub.subscribe(self.CHANNEL)
+        try:
+            async for message in pubsub.listen():
+                if message.get("type") != "message":
+                    continue
+                try:
+                    data = json.loads(message["data"])
+                    self._revoked[data["jti"]] = float(data["exp"])
+                except Exception as e:
+                    logger.warning(f"应用令牌吊销通知失败: {e}")
+        finally:
+            await pubsub.unsubscribe(self.CHANNEL)
+            await pubsub.close()
+
+    def start_listener(self):
+        if redis_manager.redis and self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop_listener(self):
+        if self._listener:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._listener = None
+
+
+token_revocation = TokenRevocation()
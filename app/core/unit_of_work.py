@@ -0,0 +1,108 @@
+"""
+请求级工作单元
+每个 HTTP 请求共用一个数据库会话：认证中间件、get_db / get_read_db 依赖、security.get_current_user
+和处理函数拿到的是同一个 AsyncSession。会话在第一次执行 SQL 时才从连接池取连接，
+响应体发送完毕、后台任务开始之前关闭并归还（见 ReleaseSessionMiddleware）：SQLite 生产模式只有一个写连接，
+后台任务（相关文章、预渲染等）使用各自的会话，不能等待请求会话释放写连接。
+
+作用域按请求方法区分：
+- 只读作用域（GET / HEAD / OPTIONS）：读语句走只读连接池或只读副本（客户端刚写入过时走主库），
+  偶尔的写语句（如浏览量）仍路由到写连接
+- 读写作用域（其他方法）：全部语句走写连接，整个请求只占用一个连接，读到的数据与随后的写入一致
+
+认证中间件加载的 User 保存在工作单元中，后续依赖直接复用，不再重复查询。
+"""
+
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.requests import HTTPConnection
+
+from app.core.database import async_session, read_engine, replicas, PRIMARY_COOKIE
+from app.models.user import User
+
+READ_ONLY_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+class UnitOfWork:
+    """一个请求的数据库会话和已加载的当前用户"""
+
+    def __init__(self, read_only: bool, reader=None):
+        self.read_only = read_only
+        self.reader = reader
+        self.user: Optional[User] = None
+        self._session: Optional[AsyncSession] = None
+
+    @classmethod
+    def for_request(cls, conn: HTTPConnection) -> "UnitOfWork":
+        if conn.scope.get("method") not in READ_ONLY_METHODS:
+            # reader=None：读写都走写连接
+            return cls(read_only=False)
+        reader = read_engine
+        if replicas.engines and PRIMARY_COOKIE not in conn.cookies:
+            reader = replicas.pick() or read_engine
+        return cls(read_only=True, reader=reader)
+
+    @property
+    def session(self) -> AsyncSession:
+        # 延迟创建；创建会话本身不占用连接
+        if self._session is None:
+            self._session = async_session(reader=self.reader)
+        return self._session
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+def current_unit_of_work(conn: HTTPConnection) -> Optional[UnitOfWork]:
+    """UnitOfWorkMiddleware 为当前请求创建的工作单元（WebSocket 和脚本调用时为 None）"""
+    return conn.scope.get("state", {}).get("uow")
+
+
+class UnitOfWorkMiddleware:
+    """为每个 HTTP 请求创建工作单元
+
+    使用纯 ASGI 中间件而不是 BaseHTTPMiddleware：后者在响应体发送前就返回，
+    会在后台任务仍可能使用会话时关闭它。
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        uow = UnitOfWork.for_request(HTTPConnection(scope))
+        scope.setdefault("state", {})["uow"] = uow
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            await uow.close()
+
+
+class ReleaseSessionMiddleware:
+    """路由返回的响应体发送完毕时关闭请求会话（未提交的事务回滚，连接归还连接池）
+
+    必须是最内层的中间件：后台任务在路由内、最后一段响应体发送之后执行，
+    而 BaseHTTPMiddleware 要等内层应用（包括后台任务）全部结束才发出最后一段响应体。
+    之后如果还有代码使用 uow.session，会重新取得一个会话，由 UnitOfWorkMiddleware 关闭。
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        uow = scope.get("state", {}).get("uow") if scope["type"] == "http" else None
+        if uow is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_and_release(message):
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                await uow.close()
+            await send(message)
+
+        await self.app(scope, receive, send_and_release)
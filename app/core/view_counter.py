@@ -0,0 +1,83 @@
+"""
+文章浏览量计数
+文章详情是只读请求（走只读连接或副本），浏览量不在请求中写库：
+每次访问只在本进程内存中累加，后台任务定期把累计值合并成每篇文章一条
+UPDATE ... SET view_count = view_count + n 写入主库，关闭时再写一次。
+多个 worker 各自累加、各自写入，原子自增保证不会互相覆盖。
+"""
+
+import asyncio
+import logging
+from collections import Counter
+from typing import Optional
+
+from sqlalchemy import update
+
+from app.core.config import settings
+from app.core.database import async_session
+from app.models.article import Article
+
+logger = logging.getLogger(__name__)
+
+
+class ViewCounter:
+    def __init__(self, flush_seconds: float = 30):
+        self.flush_seconds = flush_seconds
+        self._pending: Counter = Counter()
+        self._task: Optional[asyncio.Task] = None
+
+    def hit(self, article_id: int) -> int:
+        """记录一次访问，返回本进程尚未写入的访问数"""
+        self._pending[article_id] += 1
+        return self._pending[article_id]
+
+    def pending(self, article_id: int) -> int:
+        return self._pending.get(article_id, 0)
+
+    async def flush(self) -> int:
+        """把累计的访问数写入主库，返回写入的文章数"""
+        if not self._pending:
+            return 0
+        batch, self._pending = self._pending, Counter()
+        try:
+            async with async_session() as session:
+                for article_id, count in batch.items():
+                    await session.execute(
+                        update(Article)
+                        .where(Article.id == article_id)
+                        .values(view_count=Article.view_count + count)
+                    )
+                await session.commit()
+        except Exception:
+            # 写入失败时放回，下次再试
+            self._pending.update(batch)
+            raise
+        return len(batch)
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.warning(f"写入文章浏览量失败: {e}")
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.warning(f"关闭时写入文章浏览量失败: {e}")
+
+
+view_counter = ViewCounter(flush_seconds=settings.view_count_flush_seconds)
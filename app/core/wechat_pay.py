@@ -3,9 +3,9 @@ import hmac
 import json
 import time
 import uuid
+import threading
 from typing import Dict, Any, Optional
 import requests
-from wechatpayv3 import WeChatPay, WeChatPayType
 from app.core.config import settings
 import os
 
@@ -23,15 +23,32 @@ class WeChatPayV3:
         self.wechat_platform_cert_path = settings.wechat_platform_cert_path
         self.wechat_pay_type = settings.wechat_pay_type
         
-        # 初始化微信支付V3客户端
-        self._init_wechat_pay()
+        # 客户端在首次使用（或启动预热）时创建，导入模块时不加载SDK、不读取证书
+        self._wechat_pay = None
+        self._initialized = False
+        self._init_lock = threading.Lock()
+    
+    @property
+    def wechat_pay(self):
+        if not self._initialized:
+            with self._init_lock:
+                if not self._initialized:
+                    self._init_wechat_pay()
+                    self._initialized = True
+        return self._wechat_pay
+    
+    def warm_up(self):
+        """预先创建微信支付客户端"""
+        return self.wechat_pay
     
     def _init_wechat_pay(self):
         """初始化微信支付V3客户端"""
         try:
+            from wechatpayv3 import WeChatPay, WeChatPayType
+            
             if all([self.wechat_appid, self.wechat_mchid, self.wechat_api_v3_key, self.wechat_private_key_path, self.wechat_cert_serial_no]):
                 # 使用完整配置初始化
-                self.wechat_pay = WeChatPay(
+                self._wechat_pay = WeChatPay(
                     wechatpay_type=WeChatPayType.NATIVE,
                     mchid=self.wechat_mchid,
                     private_key=self.wechat_private_key_path,
@@ -44,7 +61,7 @@ class WeChatPayV3:
                 print("✅ 微信支付V3客户端初始化成功")
             else:
                 # 使用API密钥方式初始化（仅用于测试）
-                self.wechat_pay = WeChatPay(
+                self._wechat_pay = WeChatPay(
                     wechatpay_type=WeChatPayType.NATIVE,
                     mchid=self.wechat_mchid or "test_mchid",
                     private_key=None,
@@ -57,7 +74,7 @@ class WeChatPayV3:
                 print("⚠️  使用测试模式初始化微信支付V3")
         except Exception as e:
             print(f"初始化微信支付V3失败: {e}")
-            self.wechat_pay = None
+            self._wechat_pay = None
     
 
     
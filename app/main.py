@@ -11,6 +11,7 @@ if os.getenv('HTTPS_PROXY') is not None:
 if os.getenv('NO_PROXY') is not None:
     os.environ['NO_PROXY'] = str(os.getenv('NO_PROXY'))
 
+import time
 import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
@@ -24,11 +25,17 @@ from starlette.middleware.sessions import SessionMiddleware
 from fastapi.staticfiles import StaticFiles
 
 from app.core.config import settings
-from app.core.database import engine, create_db_and_tables, async_session
+from app.core.database import create_db_and_tables, verify_schema_revision, async_session, replicas
 from app.core.redis import redis_manager
+from app.core.config_sync import config_sync
+from app.core.token_revocation import token_revocation
+from app.core.view_counter import view_counter
+from app.core.search.suggest import suggestion_index
+from app.core.search.related import related_articles
 from app.core.middleware import setup_middleware
 from app.core.exceptions import BlogException
 from app.core.scheduler import start_scheduler, stop_scheduler
+from app.core.integrations import warm_up_integrations
 from app.core.oauth import oauth
 from app.api.v1.auth import router as auth_router
 from app.api.v1.article import router as article_router
@@ -39,36 +46,79 @@ from app.api.v1.scheduler import router as scheduler_router
 from app.api.v1.oauth import router as oauth_router
 from app.api.v1.config import router as config_router
 from app.api.v1.donation import router as donation_router
-from sqladmin import Admin, ModelView
-from sqladmin.authentication import AuthenticationBackend
+from app.admin import setup_admin
 from starlette.responses import RedirectResponse
-from sqlalchemy import select, delete
-from app.models.user import User, OAuthAccount
-from app.models.article import Article
-from app.models.tag import Tag, ArticleTag
-from app.models.comment import Comment
-from app.core.security import verify_password
-from app.models.user import UserRole
-from app.models.media import MediaFile
-from app.models.system_notification import SystemNotification
-from app.models.donation import DonationConfig, DonationRecord, DonationGoal
 
 ADMIN_PATH = "/admin"  # 后台路径恢复为/admin，保证SQLAdmin静态资源和JS事件正常
 
 
+class StartupTimer:
+    """记录启动各阶段耗时"""
+    
+    def __init__(self):
+        self.started = self.last = time.perf_counter()
+    
+    def phase(self, name: str):
+        now = time.perf_counter()
+        print(f"⏱️  {name}: {(now - self.last) * 1000:.0f}ms")
+        self.last = now
+    
+    def total(self):
+        print(f"⏱️  Startup total: {(time.perf_counter() - self.started) * 1000:.0f}ms")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager"""
     # Startup
     print("Starting up...")
+    timer = StartupTimer()
     
     # Connect to Redis
     await redis_manager.connect()
     print("Connected to Redis")
+    # 其他 worker 触发 /config/reload 时同步重新加载配置
+    config_sync.start_listener()
+    # 加载未过期的令牌吊销记录，并订阅其他 worker 的吊销通知
+    try:
+        token_revocation.start_listener()
+        await token_revocation.sync()
+    except Exception as e:
+        print(f"Warning: token revocation sync failed: {e}")
+    timer.phase("redis")
+    
+    # 生产模式只校验迁移版本（建表、迁移和搜索索引由 scripts/init_db.py 预先完成）
+    if settings.schema_startup_mode == "verify":
+        revision = await verify_schema_revision()
+        print(f"Database schema revision {revision} verified")
+    else:
+        await create_db_and_tables()
+        print("Database tables created")
+    timer.phase("database")
+    
+    # 加载搜索建议前缀索引，并订阅其他进程的增量变更
+    try:
+        async with async_session() as session:
+            await suggestion_index.load(session)
+        suggestion_index.start_listener()
+        print(f"Suggestion index loaded: {suggestion_index.stats()['entries']} entries")
+    except Exception as e:
+        print(f"Warning: suggestion index load failed: {e}")
+    timer.phase("suggestion index")
+    
+    # 只读副本后台探活
+    replicas.start()
+    if replicas.engines:
+        print(f"Read replicas: {len(replicas.engines)}")
+    
+    # 文章浏览量在内存中累计，定期写库
+    view_counter.start()
+    
+    # 相关文章尚未构建时在后台构建，不阻塞启动
+    related_build_task = asyncio.create_task(related_articles.ensure_built())
     
-    # Create database tables
-    await create_db_and_tables()
-    print("Database tables created")
+    # 支付和 LaTeX 集成默认首次使用时初始化；开启预热时在后台进行，不计入启动时间
+    warmup_task = asyncio.create_task(warm_up_integrations()) if settings.integration_warmup else None
     
     # Initialize OAuth
     # oauth.init_app(app)  # Temporarily disabled due to linter issues
@@ -77,260 +127,8 @@ async def lifespan(app: FastAPI):
     # Start scheduler
     await start_scheduler()
     print("Scheduler started")
-    
-    # Create management backend
-    admin = Admin(
-        app, 
-        engine, 
-        authentication_backend=AdminAuth(secret_key=settings.secret_key), 
-        base_url=ADMIN_PATH,
-        title="博客管理系统",
-        logo_url="https://preview.tabler.io/static/logo-white.svg"
-    )
-
-    class UserAdmin(ModelView, model=User):
-        column_list = ["id", "username", "email", "role", "is_active", "created_at"]
-        form_columns = ["username", "email", "full_name", "role", "is_active", "oauth_provider", "oauth_id", "oauth_username", "avatar_url"]
-        can_create = True
-        can_edit = True
-        can_delete = True
-        can_view_details = True
-        name = "用户管理"
-        name_plural = "用户"
-        form_include_pk = False
-        form_widget_args = {
-            "hashed_password": {"readonly": True}
-        }
-        
-        async def delete_model(self, request: Request, pks: list) -> bool:
-            print(f"delete_model called: {pks}")
-            """自定义删除方法，防止删除管理员用户"""
-            async with async_session() as session:
-                try:
-                    # 检查是否要删除管理员用户
-                    for pk in pks:
-                        result = await session.execute(select(User).where(User.id == pk))
-                        user = result.scalar_one_or_none()
-                        if user and user.role == "ADMIN":
-                            print(f"不能删除管理员用户: {user.username}")
-                            return False
-                    
-                    for pk in pks:
-                        # 删除用户相关的评论
-                        await session.execute(delete(Comment).where(Comment.author_id == pk))
-                        
-                        # 删除用户的所有文章（包括文章标签关联）
-                        article_result = await session.execute(select(Article).where(Article.author_id == pk))
-                        user_articles = article_result.scalars().all()
-                        
-                        for article in user_articles:
-                            # 删除文章相关的评论
-                            await session.execute(delete(Comment).where(Comment.article_id == article.id))
-                            # 删除文章标签关联
-                            await session.execute(delete(ArticleTag).where(ArticleTag.article_id == article.id))
-                        
-                        # 删除用户的所有文章
-                        await session.execute(delete(Article).where(Article.author_id == pk))
-                    
-                    # 删除用户
-                    for pk in pks:
-                        await session.execute(delete(User).where(User.id == pk))
-                    
-                    await session.commit()
-                    return True
-                except Exception as e:
-                    await session.rollback()
-                    print(f"删除用户失败: {e}")
-                    return False
-
-    class ArticleAdmin(ModelView, model=Article):
-        column_list = ["id", "title", "author_id", "status", "view_count", "created_at"]
-        form_columns = ["title", "content", "summary", "status", "author_id", "is_featured", "has_latex", "latex_content", "view_count"]
-        can_create = True
-        can_edit = True
-        can_delete = True
-        can_view_details = True
-        name = "文章管理"
-        name_plural = "文章"
-        form_include_pk = False
-        
-        async def delete_model(self, request: Request, pks: list) -> bool:
-            print(f"delete_model called: {pks}")
-            """自定义删除方法，允许管理员删除所有文章"""
-            async with async_session() as session:
-                try:
-                    for pk in pks:
-                        # 删除文章相关的评论（包括子评论）
-                        await session.execute(delete(Comment).where(Comment.article_id == pk))
-                        
-                        # 删除文章标签关联
-                        await session.execute(delete(ArticleTag).where(ArticleTag.article_id == pk))
-                    
-                    # 删除文章
-                    for pk in pks:
-                        await session.execute(delete(Article).where(Article.id == pk))
-                    
-                    await session.commit()
-                    return True
-                except Exception as e:
-                    await session.rollback()
-                    print(f"删除文章失败: {e}")
-                    return False
-
-    class TagAdmin(ModelView, model=Tag):
-        column_list = ["id", "name", "description", "created_at"]
-        form_columns = ["name", "description"]
-        can_create = True
-        can_edit = True
-        can_delete = True
-        can_view_details = True
-        name = "标签管理"
-        name_plural = "标签"
-        form_include_pk = False
-
-    class ArticleTagAdmin(ModelView, model=ArticleTag):
-        column_list = ["id", "article_id", "tag_id"]
-        can_create = True
-        can_edit = True
-        can_delete = True
-        can_view_details = True
-        name = "文章标签关联"
-        name_plural = "文章标签关联"
-        form_include_pk = False
-        form_excluded_columns = []
-
-    class CommentAdmin(ModelView, model=Comment):
-        column_list = ["id", "article_id", "author_id", "content", "created_at", "is_approved"]
-        form_columns = ["article_id", "author_id", "content", "parent_id", "is_approved"]
-        can_create = True
-        can_edit = True
-        can_delete = True
-        can_view_details = True
-        name = "评论管理"
-        name_plural = "评论"
-        form_include_pk = False
-        
-        async def delete_model(self, request: Request, pks: list) -> bool:
-            print(f"delete_model called: {pks}")
-            """自定义删除方法，删除评论时也删除子评论"""
-            async with async_session() as session:
-                try:
-                    for pk in pks:
-                        # 删除子评论
-                        await session.execute(delete(Comment).where(Comment.parent_id == pk))
-                        
-                        # 删除评论本身
-                        await session.execute(delete(Comment).where(Comment.id == pk))
-                    
-                    await session.commit()
-                    return True
-                except Exception as e:
-                    await session.rollback()
-                    print(f"删除评论失败: {e}")
-                    return False
-
-    class MediaFileAdmin(ModelView, model=MediaFile):
-        column_list = ["id", "filename", "type", "url", "size", "upload_time", "description", "uploader_id", "uploader"]
-        column_formatters = {
-            "uploader": lambda m, p: m.uploader.username if m.uploader else ""
-        }
-        can_create = True
-        can_edit = True
-        can_delete = True
-        can_view_details = True
-        name = "多媒体文件"
-        name_plural = "多媒体文件"
-
-    class OAuthAccountAdmin(ModelView, model=OAuthAccount):
-        column_list = ["id", "user_id", "provider", "provider_user_id", "provider_username", "created_at", "updated_at"]
-        form_columns = ["user_id", "provider", "provider_user_id", "provider_username", "provider_email", "provider_avatar_url"]
-        can_create = True
-        can_edit = True
-        can_delete = True
-        can_view_details = True
-        name = "OAuth账号绑定"
-        name_plural = "OAuth账号绑定"
-        form_include_pk = False
-
-    class SystemNotificationAdmin(ModelView, model=SystemNotification):
-        column_list = ["id", "title", "message", "notification_type", "created_at", "is_sent", "admin_id"]
-        form_columns = ["title", "message", "notification_type", "is_sent", "admin_id"]
-        can_create = True
-        can_edit = True
-        can_delete = True
-        can_view_details = True
-        name = "系统通知"
-        name_plural = "系统通知"
-        form_include_pk = False
-
-        async def is_accessible(self, request):
-            # 只有管理员能访问
-            user_id = request.session.get("user_id")
-            if not user_id:
-                return False
-            async with async_session() as session:
-                user = await session.get(User, user_id)
-                return user and user.role == UserRole.ADMIN
-
-        async def insert_model(self, request, data):
-            # 自动填充 admin_id 字段
-            user_id = request.session.get("user_id")
-            if user_id:
-                data["admin_id"] = user_id
-            return await super().insert_model(request, data)
-
-    class DonationConfigAdmin(ModelView, model=DonationConfig):
-        column_list = [
-            "id", "is_enabled", "title", "description", "alipay_enabled", "wechat_enabled", "paypal_enabled", "preset_amounts", "created_at", "updated_at"
-        ]
-        form_columns = [
-            "is_enabled", "title", "description", "alipay_enabled", "wechat_enabled", "paypal_enabled", "preset_amounts"
-        ]
-        can_create = True
-        can_edit = True
-        can_delete = True
-        can_view_details = True
-        name = "捐赠配置"
-        name_plural = "捐赠配置"
-        form_include_pk = False
-
-    class DonationRecordAdmin(ModelView, model=DonationRecord):
-        column_list = [
-            "id", "donor_name", "donor_email", "donor_message", "is_anonymous", "amount", "currency", "payment_method", "payment_status", "transaction_id", "user_id", "goal_id", "created_at", "updated_at", "paid_at"
-        ]
-        form_columns = [
-            "donor_name", "donor_email", "donor_message", "is_anonymous", "amount", "currency", "payment_method", "payment_status", "transaction_id", "user_id", "goal_id", "paid_at"
-        ]
-        can_create = True
-        can_edit = True
-        can_delete = True
-        can_view_details = True
-        name = "捐赠记录"
-        name_plural = "捐赠记录"
-        form_include_pk = False
-
-    class DonationGoalAdmin(ModelView, model=DonationGoal):
-        column_list = ["id", "title", "description", "target_amount", "current_amount", "currency", "start_date", "end_date", "is_active", "is_completed", "created_at", "updated_at"]
-        form_columns = ["title", "description", "target_amount", "current_amount", "currency", "start_date", "end_date", "is_active"]
-        can_create = True
-        can_edit = True
-        can_delete = True
-        can_view_details = True
-        name = "捐赠目标"
-        name_plural = "捐赠目标"
-        form_include_pk = False
-
-    admin.add_view(UserAdmin)
-    admin.add_view(OAuthAccountAdmin)
-    admin.add_view(ArticleAdmin)
-    admin.add_view(TagAdmin)
-    admin.add_view(ArticleTagAdmin)
-    admin.add_view(CommentAdmin)
-    admin.add_view(MediaFileAdmin)
-    admin.add_view(SystemNotificationAdmin)
-    admin.add_view(DonationConfigAdmin)
-    admin.add_view(DonationRecordAdmin)
-    admin.add_view(DonationGoalAdmin)
+    timer.phase("scheduler")
+    timer.total()
     
     yield
     
@@ -341,6 +139,16 @@ async def lifespan(app: FastAPI):
     await stop_scheduler()
     print("Scheduler stopped")
     
+    await suggestion_index.stop_listener()
+    await config_sync.stop_listener()
+    await token_revocation.stop_listener()
+    if not related_build_task.done():
+        related_build_task.cancel()
+    if warmup_task and not warmup_task.done():
+        warmup_task.cancel()
+    await view_counter.stop()
+    await replicas.stop()
+    
     # Disconnect from Redis
     await redis_manager.disconnect()
     print("Disconnected from Redis")
@@ -430,6 +238,9 @@ app.include_router(oauth_router, prefix="/api/v1")
 app.include_router(config_router, prefix="/api/v1")
 app.include_router(donation_router, prefix="/api/v1")
 
+# Management backend（导入时挂载一次，不放在 lifespan 中）
+setup_admin(app, ADMIN_PATH)
+
 
 @app.get("/")
 async def root():
@@ -451,37 +262,6 @@ async def health_check():
     }
 
 
-class AdminAuth(AuthenticationBackend):
-    async def authenticate(self, request: Request):
-        if request.session.get("user_id"):
-            async with async_session() as session:
-                user = await session.get(User, request.session["user_id"])
-                if user and user.role == UserRole.ADMIN:
-                    return True
-        return False
-
-    async def login(self, request: Request) -> bool:
-        form = await request.form()
-        username = str(form.get("username") or "")
-        password = str(form.get("password") or "")
-        
-        async with async_session() as session:
-            result = await session.execute(select(User).where(User.username == username))
-            user = result.scalar_one_or_none()
-            
-            if (
-                user and user.role == UserRole.ADMIN and user.is_active
-                and user.hashed_password
-                and verify_password(password, user.hashed_password)
-            ):
-                request.session["user_id"] = user.id
-                return True
-        return False
-
-    async def logout(self, request: Request) -> None:
-        request.session.pop("user_id", None)
-
-
 class NoCacheAdminMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request, call_next):
         response = await call_next(request)
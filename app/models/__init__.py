@@ -2,6 +2,7 @@ from .article import Article
 from .comment import Comment
 from .donation import DonationGoal,DonationConfig, DonationRecord
 from .media import MediaFile
+from .related import ArticleTermVector, RelatedArticle, RelatedTermStats
 from .system_notification import SystemNotification
 from .tag import Tag
 from .user import User
@@ -13,6 +14,9 @@ __all_models__ = [
     DonationConfig,
     DonationRecord,
     MediaFile,
+    ArticleTermVector,
+    RelatedArticle,
+    RelatedTermStats,
     SystemNotification,
     Tag,
     User,
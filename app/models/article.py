@@ -1,5 +1,6 @@
 from datetime import datetime
 from typing import Optional, List, TYPE_CHECKING
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field, Relationship
 from enum import Enum
 
@@ -27,6 +28,12 @@ class ArticleBase(SQLModel):
 
 
 class Article(ArticleBase, table=True):
+    __table_args__ = (
+        Index("ix_article_status_created_at", "status", "created_at"),
+        Index("ix_article_created_at", "created_at"),
+        Index("ix_article_author_id", "author_id"),
+    )
+    
     id: Optional[int] = Field(default=None, primary_key=True)
     author_id: int = Field(foreign_key="user.id")
     created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -1,5 +1,6 @@
 from datetime import datetime
 from typing import Optional, List, TYPE_CHECKING
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field, Relationship
 
 if TYPE_CHECKING:
@@ -12,6 +13,11 @@ class CommentBase(SQLModel):
 
 
 class Comment(CommentBase, table=True):
+    __table_args__ = (
+        Index("ix_comment_article_id_created_at", "article_id", "created_at"),
+        Index("ix_comment_parent_id", "parent_id"),
+    )
+    
     id: Optional[int] = Field(default=None, primary_key=True)
     article_id: int = Field(foreign_key="article.id")
     author_id: int = Field(foreign_key="user.id")
@@ -1,5 +1,6 @@
 from datetime import datetime
 from typing import Optional, List, TYPE_CHECKING
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field, Relationship
 from enum import Enum
 from decimal import Decimal
@@ -44,6 +45,12 @@ class DonationConfig(SQLModel, table=True):
 
 class DonationRecord(SQLModel, table=True):
     """捐赠记录表"""
+    __table_args__ = (
+        Index("ix_donationrecord_payment_status_created_at", "payment_status", "created_at"),
+        Index("ix_donationrecord_user_id_created_at", "user_id", "created_at"),
+        Index("ix_donationrecord_transaction_id", "transaction_id"),
+    )
+    
     id: Optional[int] = Field(default=None, primary_key=True)
     
     # 捐赠者信息
@@ -1,3 +1,4 @@
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field, Relationship
 from typing import Optional, TYPE_CHECKING
 from enum import Enum
@@ -11,6 +12,10 @@ class MediaType(str, Enum):
     pdf = "pdf"
 
 class MediaFile(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_mediafile_uploader_id_upload_time", "uploader_id", "upload_time"),
+    )
+    
     id: Optional[int] = Field(default=None, primary_key=True)
     filename: str
     type: MediaType
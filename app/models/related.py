@@ -0,0 +1,37 @@
+from datetime import datetime
+from sqlalchemy import Column, LargeBinary
+from sqlmodel import SQLModel, Field
+
+
+class ArticleTermVector(SQLModel, table=True):
+    """已发布文章的哈希词向量（稀疏存储：uint32 下标 + float32 值），供相关文章计算使用
+
+    vector 为原始词频，全量重建时按新的 IDF 重新加权；weighted 为按 IDF 快照加权并 L2 归一化后的向量，
+    两篇文章的 weighted 内积即余弦相似度。
+    """
+    __tablename__ = "article_term_vector"
+
+    article_id: int = Field(primary_key=True)
+    vector: bytes = Field(sa_column=Column(LargeBinary, nullable=False))
+    weighted: bytes = Field(sa_column=Column(LargeBinary, nullable=False))
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class RelatedTermStats(SQLModel, table=True):
+    """全量重建时的 IDF 快照（float32 数组，长度为向量维度），增量更新时按它给新文章加权"""
+    __tablename__ = "related_term_stats"
+
+    id: int = Field(default=1, primary_key=True)
+    document_count: int
+    idf: bytes = Field(sa_column=Column(LargeBinary, nullable=False))
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class RelatedArticle(SQLModel, table=True):
+    """预先计算的相关文章（每篇文章的 top-k 邻居，rank 从 0 开始）"""
+    __tablename__ = "related_article"
+
+    article_id: int = Field(primary_key=True)
+    rank: int = Field(primary_key=True)
+    related_id: int = Field(index=True)
+    score: float
@@ -1,5 +1,6 @@
 from datetime import datetime
 from typing import Optional, List, TYPE_CHECKING
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field, Relationship
 
 if TYPE_CHECKING:
@@ -35,6 +36,11 @@ class TagResponse(TagBase):
 
 class ArticleTag(SQLModel, table=True):
     """Many-to-many relationship between articles and tags"""
+    __table_args__ = (
+        Index("uq_articletag_article_id_tag_id", "article_id", "tag_id", unique=True),
+        Index("ix_articletag_tag_id_article_id", "tag_id", "article_id"),
+    )
+    
     id: Optional[int] = Field(default=None, primary_key=True)
     article_id: int = Field(foreign_key="article.id")
     tag_id: int = Field(foreign_key="tag.id")
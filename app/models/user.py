@@ -1,5 +1,6 @@
 from datetime import datetime
 from typing import Optional, List, TYPE_CHECKING
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field, Relationship
 from enum import Enum
 
@@ -41,6 +42,9 @@ class User(UserBase, table=True):
     oauth_username: Optional[str] = None  # Username from OAuth provider
     avatar_url: Optional[str] = None  # Profile picture URL
     
+    # 令牌版本：签发时写入令牌的 ver 声明，递增后该用户此前签发的令牌全部失效
+    token_version: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    
     # Relationships
     articles: List["Article"] = Relationship(back_populates="author")
     comments: List["Comment"] = Relationship(back_populates="author")
@@ -72,6 +76,11 @@ class UserResponse(UserBase):
 
 class OAuthAccount(SQLModel, table=True):
     """Separate table for OAuth account bindings"""
+    __table_args__ = (
+        Index("uq_oauthaccount_provider_provider_user_id", "provider", "provider_user_id", unique=True),
+        Index("ix_oauthaccount_user_id_provider", "user_id", "provider"),
+    )
+    
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="user.id")
     provider: OAuthProvider
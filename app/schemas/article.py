@@ -94,6 +94,40 @@ class ArticleListResponse(BaseModel):
         from_attributes = True
 
 
+class ArticleSearchResult(ArticleListResponse):
+    """搜索结果：在列表字段基础上附带数据库生成的高亮标题和正文摘要（HTML，已转义，命中处为 <mark>）"""
+    title_highlight: Optional[str] = None
+    snippet: Optional[str] = None
+
+
+class FacetBucket(BaseModel):
+    """分面统计项：value 用于过滤（标签名/作者用户名/年份），label 用于展示"""
+    value: str
+    label: str
+    count: int
+
+
+class SearchFacets(BaseModel):
+    """搜索结果分面：基于全部匹配结果统计，而不仅是当前页"""
+    tags: List[FacetBucket] = []
+    authors: List[FacetBucket] = []
+    years: List[FacetBucket] = []
+
+
+class ArticleSearchPage(BaseModel):
+    """带分面的搜索响应（facets=true 时返回）"""
+    items: List[ArticleSearchResult]
+    total: Optional[int] = None
+    facets: SearchFacets
+
+
+class TocItem(BaseModel):
+    """文章目录项"""
+    level: int
+    text: str
+    id: str
+
+
 class ArticleDetailResponse(BaseModel):
     """文章详情响应模型"""
     id: int
@@ -107,11 +141,27 @@ class ArticleDetailResponse(BaseModel):
     created_at: datetime
     updated_at: datetime
     view_count: int = 0
+    # 服务端预渲染结果（include_html=true 时返回）
+    content_html: Optional[str] = None
+    toc: Optional[List[TocItem]] = None
+    reading_time: Optional[int] = None
 
     class Config:
         from_attributes = True
 
 
+class LatexFormula(BaseModel):
+    """LaTeX公式预览项"""
+    latex_content: str = Field(..., min_length=1, description="LaTeX内容")
+    block_type: str = Field(default="block", description="公式类型：inline / block / environment")
+
+
+class LatexPreviewBatchRequest(BaseModel):
+    """批量LaTeX预览请求模型"""
+    formulas: List[LatexFormula] = Field(..., min_length=1, description="待预览的公式列表")
+    timeout: Optional[float] = Field(None, gt=0, description="本次请求的时间预算（秒），不超过服务端上限")
+
+
 class CommentCreate(BaseModel):
     """创建评论请求模型"""
     content: str = Field(..., min_length=1, max_length=1000, description="评论内容")
@@ -3,11 +3,11 @@
 import os
 import sys
 import time
+import asyncio
 import subprocess
 from pathlib import Path
 from dotenv import load_dotenv
 from urllib.parse import urlparse
-import psycopg2
 
 # 加载 .env 或 .env.{ENVIRONMENT}
 env = os.getenv("ENVIRONMENT", "development").lower()
@@ -27,6 +27,8 @@ if not database_url:
 if database_url.startswith("sqlite"):
     print("📝 当前使用 SQLite，无需初始化数据库")
 else:
+    import psycopg2
+
     # 解析 PostgreSQL URL
     parsed = urlparse(database_url.replace("+asyncpg", ""))
     db_name = parsed.path.lstrip("/")
@@ -84,19 +86,56 @@ else:
     create_database_if_not_exists()
 
 
+# 早期的表由 create_all 创建，迁移从该版本之后开始记录
+BASELINE_REVISION = "ba82d4a780c1"
+
+
+def run_alembic(*args):
+    env_copy = os.environ.copy()
+    env_copy["ENVIRONMENT"] = env
+    subprocess.run(["alembic", *args], env=env_copy, check=True)
+
+
 def upgrade_alembic():
     """运行 Alembic 升级命令"""
     print("🚀 正在运行 Alembic 数据库迁移...")
-    env_copy = os.environ.copy()
-    env_copy["ENVIRONMENT"] = env
     try:
-        subprocess.run(["alembic", "upgrade", "head"], env=env_copy, check=True)
+        run_alembic("upgrade", "head")
         print("✅ Alembic 迁移成功")
     except subprocess.CalledProcessError as e:
         print("❌ Alembic 执行失败：", e)
         sys.exit(1)
 
 
+async def prepare_schema():
+    """启动前一次性完成建表、迁移和搜索索引，worker 启动时只校验迁移版本（SCHEMA_STARTUP_MODE=verify）"""
+    sys.path.append(str(Path(__file__).resolve().parent.parent))
+    from app.core.database import engine, create_tables, ensure_search_index
+
+    try:
+        start = time.perf_counter()
+        versioned = await create_tables()
+        print(f"✅ 数据表已就绪 ({time.perf_counter() - start:.2f}s)")
+
+        if not versioned:
+            print(f"📌 数据库尚无迁移记录，标记为基线版本 {BASELINE_REVISION}")
+            try:
+                run_alembic("stamp", BASELINE_REVISION)
+            except subprocess.CalledProcessError as e:
+                print("❌ Alembic 标记基线失败：", e)
+                sys.exit(1)
+
+        start = time.perf_counter()
+        upgrade_alembic()
+        print(f"⏱️  迁移耗时 {time.perf_counter() - start:.2f}s")
+
+        start = time.perf_counter()
+        await ensure_search_index()
+        print(f"⏱️  搜索索引耗时 {time.perf_counter() - start:.2f}s")
+    finally:
+        await engine.dispose()
+
+
 if __name__ == "__main__":
-    upgrade_alembic()
+    asyncio.run(prepare_schema())
     print("🎉 数据库初始化完成")
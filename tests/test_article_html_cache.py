@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+文章HTML缓存测试
+- 公式全部渲染成功时按 article_html_cache_ttl 缓存
+- 有公式回退为TeX源码时只按 article_html_fallback_ttl 短暂缓存，预渲染时重新渲染
+- 未连接 Redis 或读取失败时由进程内 LRU 命中，不会每次请求都重新渲染
+Redis 和 LaTeX 渲染由内存中的替身代替，不依赖外部服务。
+"""
+
+import sys
+import asyncio
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.article_renderer import ArticleHtmlRenderer, ArticleHtmlService
+from app.core.latex import latex_renderer, latex_render_service
+from app.core.redis import redis_manager
+
+CONTENT = "# 标题\n\n质能方程 $E=mc^2$，以及\n\n$$\\int_0^1 x\\,dx$$\n"
+
+
+async def run_checks():
+    stored = {}
+    failing = set()
+
+    async def fake_get(key):
+        return stored.get(key, (None,))[0]
+
+    async def fake_set(key, value, expire=None):
+        stored[key] = (value, expire)
+
+    async def fake_render_batch(formulas, timeout):
+        return {
+            formula: {"image_url": None if formula[0] in failing else f"/uploads/latex/{abs(hash(formula))}.png"}
+            for formula in formulas
+        }
+
+    saved = (redis_manager.redis, redis_manager.get, redis_manager.set,
+             latex_renderer._has_latex_support, latex_render_service.render_batch)
+    redis_manager.redis = object()
+    redis_manager.get, redis_manager.set = fake_get, fake_set
+    latex_renderer._has_latex_support = True
+    latex_render_service.render_batch = fake_render_batch
+    try:
+        service = ArticleHtmlService(ArticleHtmlRenderer(), ttl=3600, fallback_ttl=60)
+
+        rendered = await service.get_or_render(CONTENT)
+        assert rendered["math_fallbacks"] == 0
+        assert [expire for _, expire in stored.values()] == [3600]
+        print("✅ 公式全部渲染成功时长期缓存")
+
+        stored.clear()
+        service._local.clear()
+        failing.add("E=mc^2")
+        rendered = await service.get_or_render(CONTENT)
+        assert rendered["math_fallbacks"] == 1
+        assert "\\(E=mc^2\\)" in rendered["content_html"]
+        assert [expire for _, expire in stored.values()] == [60]
+        print("✅ 有公式回退为TeX时只短暂缓存")
+
+        failing.clear()
+        await service.prerender(CONTENT)
+        assert [expire for _, expire in stored.values()] == [3600]
+        assert (await service.get_or_render(CONTENT))["math_fallbacks"] == 0
+        print("✅ 预渲染时替换含回退公式的缓存")
+
+        # 进程内缓存：未连接 Redis、Redis 读取失败时仍然命中
+        renders = []
+        service = ArticleHtmlService(ArticleHtmlRenderer(), ttl=3600, fallback_ttl=60, local_size=2)
+        render = service.renderer.render
+
+        async def counting_render(content):
+            renders.append(content)
+            return await render(content)
+
+        service.renderer.render = counting_render
+        redis_manager.redis = None
+        first = await service.get_or_render(CONTENT)
+        assert await service.get_or_render(CONTENT) == first
+        assert len(renders) == 1
+        print("✅ 未连接Redis时由进程内缓存命中")
+
+        async def broken_get(key):
+            raise ConnectionError("redis down")
+
+        redis_manager.redis = object()
+        redis_manager.get = broken_get
+        await service.get_or_render(CONTENT)
+        assert len(renders) == 1
+        for index in range(2):
+            await service.get_or_render(f"{CONTENT}\n第 {index} 段")
+        await service.get_or_render(CONTENT)
+        assert len(renders) == 4, "超过 local_size 后按 LRU 淘汰最久未用的条目"
+        print("✅ Redis读取失败时由进程内缓存命中，超出容量按LRU淘汰")
+    finally:
+        (redis_manager.redis, redis_manager.get, redis_manager.set,
+         latex_renderer._has_latex_support, latex_render_service.render_batch) = saved
+
+
+def test_article_html_cache_ttl():
+    asyncio.run(run_checks())
+
+
+if __name__ == "__main__":
+    print("📰 测试文章HTML缓存...")
+    test_article_html_cache_ttl()
+    print("\n🎉 文章HTML缓存测试通过")
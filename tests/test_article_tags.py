@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+文章标签测试
+请求中重复的标签名只关联一次：(article_id, tag_id) 有唯一索引，创建和更新文章时先按提交顺序去重，
+不会在文章已保存后因唯一约束返回 500。使用临时 SQLite 数据库，在独立子进程中运行
+（app 的数据库引擎和配置在导入时创建，不能与其他测试共用进程）。
+"""
+
+import os
+import sys
+import asyncio
+import tempfile
+import subprocess
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+sys.path.append(str(Path(__file__).parent.parent))
+
+
+async def run_checks():
+    import httpx
+    from fastapi import FastAPI
+    from fastapi.responses import JSONResponse
+    from sqlalchemy import func, select
+
+    from app.core.database import async_session, create_db_and_tables
+    from app.core.exceptions import BlogException
+    from app.core.middleware import setup_middleware
+    from app.core.security import create_access_token, get_password_hash
+    from app.models.tag import ArticleTag
+    from app.models.user import User, UserRole
+    from app.api.v1.article import router as article_router
+
+    app = FastAPI()
+    setup_middleware(app)
+
+    @app.exception_handler(BlogException)
+    async def blog_exception_handler(request, exc: BlogException):
+        return JSONResponse(status_code=exc.status_code, content={"message": exc.detail})
+
+    app.include_router(article_router, prefix="/api/v1")
+
+    await create_db_and_tables()
+    async with async_session() as db:
+        db.add(User(
+            id=1, username="tagger", email="tagger@example.com",
+            hashed_password=get_password_hash("secret"), role=UserRole.USER
+        ))
+        await db.commit()
+
+    async def tag_rows(article_id: int) -> int:
+        async with async_session() as db:
+            return (await db.execute(
+                select(func.count()).select_from(ArticleTag).where(ArticleTag.article_id == article_id)
+            )).scalar()
+
+    token = create_access_token({"sub": "tagger", "user_id": 1, "role": "user"})
+    headers = {"Authorization": f"Bearer {token}"}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post("/api/v1/articles/", headers=headers, json={
+            "title": "重复标签", "content": "正文", "tags": ["py", "web", "py"]
+        })
+        assert response.status_code == 200, response.text
+        article = response.json()
+        assert [tag["name"] for tag in article["tags"]] == ["py", "web"], article["tags"]
+        assert await tag_rows(article["id"]) == 2
+        print("✅ 创建文章时重复的标签只关联一次")
+
+        response = await client.put(f"/api/v1/articles/{article['id']}", headers=headers, json={
+            "title": "重复标签（更新）", "tags": ["sql", "sql", "py", "sql"]
+        })
+        assert response.status_code == 200, response.text
+        assert sorted(tag["name"] for tag in response.json()["tags"]) == ["py", "sql"]
+        assert await tag_rows(article["id"]) == 2
+        print("✅ 更新文章时重复的标签只关联一次")
+
+
+def test_duplicate_tag_names():
+    result = subprocess.run([sys.executable, __file__], capture_output=True, text=True)
+    assert result.returncode == 0, result.stdout + result.stderr
+
+
+if __name__ == "__main__":
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/tags.db"
+    os.environ["DEBUG"] = "false"
+    print("🏷️ 测试文章标签...")
+    asyncio.run(run_checks())
+    print("\n🎉 文章标签测试通过")
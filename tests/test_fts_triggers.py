@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+SQLite 全文索引触发器测试
+- 修改标题/正文后，articles_fts 和 articles_trgm 随之更新，articles_fts 中为切分后的文本
+- 只修改浏览量时不重写索引行，不重新分词；修改状态时原地更新，保留切分后的文本
+- 触发器不调用应用函数：未注册 cjk_segment() 的连接（sqlite3 命令行等）可以写 article 表，
+  写入的文章在应用下次提交文章修改或启动校验索引时补齐切分
+使用独立的临时 SQLite 文件，用计数版本的 cjk_segment() 统计分词次数。
+"""
+
+import sys
+import sqlite3
+import asyncio
+import tempfile
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import event, text, update
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlmodel import SQLModel
+
+from app.models import __all_models__  # noqa: F401  注册所有表
+from app.models.user import User, UserRole
+from app.models.article import Article, ArticleStatus
+from app.core.search.cjk import segment_cjk
+from app.core.search.sqlite_search_impl import FTS_PENDING_TABLE, SQLiteFTSSearch, install_fts_segmenter
+
+
+async def run_checks():
+    db_path = f"{tempfile.mkdtemp()}/fts.db"
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+    segment_calls = []
+
+    def counting_segment(value):
+        segment_calls.append(value)
+        return segment_cjk(value)
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _register(dbapi_connection, connection_record):
+        dbapi_connection.create_function("cjk_segment", 1, counting_segment, deterministic=True)
+
+    install_fts_segmenter()
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def fts_row(db, article_id: int):
+        return (await db.execute(
+            text("SELECT title, status FROM articles_fts WHERE rowid = :id"), {"id": article_id}
+        )).first()
+
+    async with session_factory() as db:
+        await SQLiteFTSSearch.create_fts_table(db)
+        db.add(User(id=1, username="fts-author", email="fts@example.com", hashed_password="x", role=UserRole.USER))
+        db.add(Article(id=1, title="全文索引", content="触发器测试正文", author_id=1, status=ArticleStatus.DRAFT))
+        await db.commit()
+        assert (await fts_row(db, 1)).title == segment_cjk("全文索引")
+        print("✅ 新建文章提交时写入切分后的索引行")
+
+        segment_calls.clear()
+        for _ in range(3):
+            await db.execute(update(Article).where(Article.id == 1).values(view_count=Article.view_count + 1))
+        await db.commit()
+        assert not segment_calls, f"更新浏览量时重新分词了 {len(segment_calls)} 次"
+        print("✅ 只更新浏览量时不重写全文索引")
+
+        await db.execute(update(Article).where(Article.id == 1).values(status=ArticleStatus.PUBLISHED))
+        await db.commit()
+        row = await fts_row(db, 1)
+        assert not segment_calls and row.title == segment_cjk("全文索引") and row.status == "PUBLISHED", row
+        print("✅ 修改状态时原地更新，保留切分后的文本")
+
+        await db.execute(update(Article).where(Article.id == 1).values(title="新的标题"))
+        await db.commit()
+        assert segment_calls, "修改标题后应重新切分"
+        fts_title = (await fts_row(db, 1)).title
+        trgm_title = (await db.execute(text("SELECT title FROM articles_trgm WHERE rowid = 1"))).scalar()
+        assert fts_title == segment_cjk("新的标题") and trgm_title == "新的标题", (fts_title, trgm_title)
+        print("✅ 修改标题后索引随之更新")
+
+    # 外部工具写入：连接上没有 cjk_segment()
+    external = sqlite3.connect(db_path)
+    external.execute(
+        "INSERT INTO article (id, title, content, status, is_featured, has_latex, author_id, "
+        "created_at, updated_at, view_count) VALUES (2, '外部写入', '命令行', 'PUBLISHED', 0, 0, 1, "
+        "'2026-01-01', '2026-01-01', 0)"
+    )
+    external.execute("UPDATE article SET content = '命令行修改' WHERE id = 1")
+    external.commit()
+    external.close()
+    print("✅ 未注册 cjk_segment() 的连接可以写 article 表")
+
+    async with session_factory() as db:
+        assert (await fts_row(db, 2)).title == "外部写入"
+        assert await SQLiteFTSSearch.verify_fts_index(db)
+        assert (await fts_row(db, 2)).title == segment_cjk("外部写入")
+        content = (await db.execute(text("SELECT content FROM articles_fts WHERE rowid = 1"))).scalar()
+        assert content == segment_cjk("命令行修改"), content
+        assert (await db.execute(text(f"SELECT count(*) FROM {FTS_PENDING_TABLE}"))).scalar() == 0
+        print("✅ 启动校验索引时补齐外部写入文章的切分")
+    await engine.dispose()
+
+
+def test_fts_triggers():
+    asyncio.run(run_checks())
+
+
+if __name__ == "__main__":
+    print("🔎 测试全文索引触发器...")
+    test_fts_triggers()
+    print("\n🎉 全文索引触发器测试通过")
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+导入耗时预算测试
+在独立的子进程中导入各模块，要求：
+- 导入期间 app/ 的代码不发起网络连接、不启动子进程、不重新解析 .env（这些都应延迟到首次使用或启动预热）
+- PayPal、微信支付、LaTeX 渲染器导入后仍处于未初始化状态
+- 导入耗时不超过预算（IMPORT_TIME_BUDGET，默认 5 秒）
+
+app.main 依赖全部第三方包（支付宝 SDK 等），需在完整安装 requirements.txt 的环境中运行。
+"""
+
+import os
+import sys
+import json
+import subprocess
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+BUDGET_SECONDS = float(os.getenv("IMPORT_TIME_BUDGET", "5"))
+
+MODULES = [
+    "app.core.paypal",
+    "app.core.wechat_pay",
+    "app.core.latex",
+    "app.core.email",
+    "app.core.integrations",
+    "app.main",
+]
+
+# 子进程中执行：拦截由 app/ 代码发起的网络连接、子进程和配置重新加载，记录后拒绝执行，再导入目标模块。
+# 第三方包在自己的导入过程中探测环境（如 ctypes.util.find_library 调用 ldconfig）不属于本项目的导入时 I/O，放行不计。
+PROBE = r"""
+import os, sys, json, time, socket, subprocess, traceback
+from app.core.config import Settings
+
+APP_DIR = os.path.join(os.getcwd(), "app") + os.sep
+io_calls = []
+
+def _caused_by_app():
+    frames = traceback.extract_stack()[:-2]
+    app_frames = [i for i, frame in enumerate(frames) if frame.filename.startswith(APP_DIR)]
+    if not app_frames:
+        return False
+    # 最内层的 app/ 帧之后经过了 import 机制：是被导入的第三方包自己的导入时行为
+    return not any(frame.filename.startswith("<frozen importlib") for frame in frames[app_frames[-1] + 1:])
+
+def _guarded(kind, original):
+    def guarded(*args, **kwargs):
+        if not _caused_by_app():
+            return original(*args, **kwargs)
+        io_calls.append(f"{kind}: {args[1:2] or args[:1]}")
+        raise OSError(f"{kind} is not allowed at import time")
+    return guarded
+
+socket.getaddrinfo = _guarded("socket.getaddrinfo", socket.getaddrinfo)
+socket.socket.connect = _guarded("socket.connect", socket.socket.connect)
+subprocess.Popen.__init__ = _guarded("subprocess", subprocess.Popen.__init__)
+
+# 全局配置创建时读取 .env 是正常的，导入期间再调用 Settings.reload() 重新解析则记为 I/O
+_reload = Settings.reload.__func__
+def reload(cls):
+    io_calls.append("Settings.reload")
+    return _reload(cls)
+Settings.reload = classmethod(reload)
+
+started = time.perf_counter()
+__import__(sys.argv[1])
+seconds = time.perf_counter() - started
+
+# 延迟初始化的集成：导入后必须仍未初始化
+modules = sys.modules
+eager = []
+if "app.core.paypal" in modules and modules["app.core.paypal"].paypal_pay._initialized:
+    eager.append("paypal")
+if "app.core.wechat_pay" in modules and modules["app.core.wechat_pay"].wechat_pay_v3._initialized:
+    eager.append("wechat_pay")
+if "app.core.latex" in modules and modules["app.core.latex"].latex_renderer._has_latex_support is not None:
+    eager.append("latex")
+print(json.dumps({"seconds": seconds, "io": io_calls, "eager": eager}))
+"""
+
+def measure_import(module: str) -> dict:
+    env = {**os.environ, "PYTHONPATH": str(PROJECT_ROOT)}
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE, module],
+        cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, timeout=120
+    )
+    if result.returncode != 0:
+        raise AssertionError(f"导入 {module} 失败:\n{result.stderr[-2000:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_import_time():
+    failures = []
+    for module in MODULES:
+        report = measure_import(module)
+        seconds, io_calls = report["seconds"], report["io"]
+        if report["eager"]:
+            failures.append(f"{module}: 导入时已初始化 {report['eager']}")
+            print(f"❌ {module}: 导入时已初始化 {report['eager']}")
+        elif io_calls:
+            failures.append(f"{module}: 导入时发生 I/O {io_calls}")
+            print(f"❌ {module}: 导入时发生 I/O {io_calls}")
+        elif seconds > BUDGET_SECONDS:
+            failures.append(f"{module}: 导入耗时 {seconds:.2f}s 超出预算 {BUDGET_SECONDS}s")
+            print(f"❌ {module}: {seconds:.2f}s")
+        else:
+            print(f"✅ {module}: {seconds:.2f}s")
+    assert not failures, "\n".join(failures)
+
+
+if __name__ == "__main__":
+    print(f"⏱️  检查导入耗时（预算 {BUDGET_SECONDS}s）...")
+    try:
+        test_import_time()
+    except AssertionError as e:
+        print(f"\n❌ {e}")
+        sys.exit(1)
+    print("\n🎉 所有模块均在预算内完成导入，且没有导入时 I/O")
@@ -169,6 +169,27 @@ class LatexTester:
         else:
             print(f"❌ 块级LaTeX预览失败: {status}")
     
+    async def test_latex_preview_batch(self):
+        """测试批量LaTeX预览"""
+        print("📚 测试批量LaTeX预览...")
+        
+        data = {
+            "formulas": [
+                {"latex_content": "x = \\frac{-b \\pm \\sqrt{b^2 - 4ac}}{2a}", "block_type": "block"},
+                {"latex_content": "\\alpha + \\beta", "block_type": "inline"},
+                {"latex_content": "x = \\frac{-b \\pm \\sqrt{b^2 - 4ac}}{2a}", "block_type": "block"},
+                {"latex_content": "\\frac{a}{b", "block_type": "inline"}
+            ],
+            "timeout": 10
+        }
+        response, status = await self.make_request("POST", "/articles/latex/preview/batch", data)
+        if status == 200:
+            print("✅ 批量LaTeX预览成功")
+            print(f"   公式数: {response.get('count')}，去重后: {response.get('unique_count')}")
+            print(f"   状态统计: {response.get('status_counts')}")
+        else:
+            print(f"❌ 批量LaTeX预览失败: {status} - {response}")
+    
     async def test_article_with_latex(self):
         """测试包含LaTeX的文章"""
         print("📝 测试包含LaTeX的文章...")
@@ -256,6 +277,9 @@ $$\\ce{H2O + CO2 -> H2CO3}$$
         await self.test_latex_preview()
         print()
         
+        await self.test_latex_preview_batch()
+        print()
+        
         await self.test_article_with_latex()
         print()
         
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+LaTeX渲染服务测试
+- 公式数量超过 max_workers + max_queue 的文章也能完整处理，不会被自己的队列上限拒绝
+- 已保存进文章内容的图片被缓存淘汰后，按公式源码重新渲染
+- 跨 worker 的渲染锁在取得渲染名额后才获取，只释放自己持有的锁（Redis 由内存中的替身代替）
+"""
+
+import sys
+import asyncio
+import tempfile
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.latex import LatexRenderer, LatexRenderService
+from app.core.redis import redis_manager
+
+
+class FakeRedis:
+    """只实现渲染锁用到的 SET NX 和比较删除脚本"""
+
+    def __init__(self):
+        self.values = {}
+
+    async def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.values:
+            return None
+        self.values[key] = value
+        return True
+
+    async def eval(self, script, numkeys, key, token):
+        if self.values.get(key) == token:
+            del self.values[key]
+            return 1
+        return 0
+
+
+async def run_checks():
+    renderer = LatexRenderer(output_dir=tempfile.mkdtemp())
+    renderer._has_latex_support = False  # 使用SVG占位符，不依赖 pdflatex
+    service = LatexRenderService(renderer, max_workers=2, max_queue=3)
+
+    count = service.max_workers + service.max_queue + 20
+    content = "\n".join(f"公式 {i}: $x^{{{i}}}$" for i in range(count)) + "\n重复: $x^{0}$"
+    processed, blocks = await service.process_content(content)
+    assert len(blocks) == count + 1, len(blocks)
+    assert processed.count("![LaTeX](") == count + 1
+    assert "$" not in processed
+    assert service.stats()["queue"]["pending"] == 0
+    print(f"✅ {count} 个不同公式（队列上限 {service.max_workers + service.max_queue}）全部渲染完成")
+
+
+def test_process_content_beyond_queue_limit():
+    asyncio.run(run_checks())
+
+
+async def run_restore_checks():
+    renderer = LatexRenderer(output_dir=tempfile.mkdtemp())
+    renderer._has_latex_support = False
+    service = LatexRenderService(renderer)
+
+    processed, _ = await service.process_content("质能方程 $E=mc^2$")
+    filename = processed.split(renderer.cache.URL_PREFIX)[1].rstrip(")")
+    renderer.cache.evict(target_ratio=0)
+    assert not (renderer.output_dir / filename).exists()
+    print(f"✅ 文章引用的图片已被淘汰: {filename}")
+
+    restored = await service.restore(filename)
+    assert restored is not None and restored.name == filename
+    assert "E=mc^2" in restored.read_text(encoding="utf-8")
+    assert await service.restore("latex_" + "0" * 64 + ".png") is None
+    assert await service.restore("../secret.png") is None
+    print("✅ 按保存的源码重新渲染，未知文件名返回 None")
+
+
+def test_restore_evicted_image():
+    asyncio.run(run_restore_checks())
+
+
+async def run_lock_checks():
+    renderer = LatexRenderer(output_dir=tempfile.mkdtemp())
+    renderer._has_latex_support = False
+    service = LatexRenderService(renderer, max_workers=1, max_queue=4)
+    fake = FakeRedis()
+    saved_redis, redis_manager.redis = redis_manager.redis, fake
+    render = renderer.render_latex_to_image
+    release = asyncio.Event()
+    held = []
+
+    async def gated_render(latex_content, block_type='block'):
+        held.append(sorted(fake.values))
+        await release.wait()
+        return await render(latex_content, block_type)
+
+    renderer.render_latex_to_image = gated_render
+    try:
+        first = asyncio.ensure_future(service.render("a+b"))
+        second = asyncio.ensure_future(service.render("c+d"))
+        await asyncio.sleep(0.05)
+        assert len(held) == 1 and len(fake.values) == 1, (held, fake.values)
+        print("✅ 排队等待渲染名额时不持有跨 worker 的锁")
+
+        release.set()
+        assert await first and await second
+        assert len(held) == 2 and not fake.values
+        print("✅ 渲染完成后释放锁")
+
+        lock_key = "latex_render_lock:test"
+        token = await service._acquire_worker_lock(lock_key)
+        assert token and await service._acquire_worker_lock(lock_key) is None
+        fake.values[lock_key] = "other-worker"  # 锁已过期并被其他 worker 取得
+        await service._release_worker_lock(lock_key, token)
+        assert fake.values[lock_key] == "other-worker"
+        print("✅ 只释放自己持有的锁")
+    finally:
+        redis_manager.redis = saved_redis
+        renderer.render_latex_to_image = render
+
+
+def test_worker_lock():
+    asyncio.run(run_lock_checks())
+
+
+if __name__ == "__main__":
+    print("🧮 测试LaTeX渲染服务...")
+    test_process_content_beyond_queue_limit()
+    test_restore_evicted_image()
+    test_worker_lock()
+    print("\n🎉 LaTeX渲染服务测试通过")
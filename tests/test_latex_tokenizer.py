@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+LaTeX 分词器测试
+- 普通公式（$…$、$$…$$、\\(…\\)、\\[…\\]、\\begin{env}）与旧的多正则解析结果一致
+- 旧解析器出错的情况（转义的 \\$、代码块中的 $、$$ 与 $ 混用、括号嵌套）按新的规则识别
+- 未闭合的定界符按普通文本处理
+- substitute_math 的替换结果与旧的逐块拼接一致，replace 返回 None 时保留原文
+"""
+
+import re
+import sys
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.latex_tokenizer import contains_math, substitute_math, tokenize_math
+
+
+# 改写前 LatexRenderer.extract_latex_blocks 的规则：(类型, 正则, 作为内容的分组)
+LEGACY_PATTERNS = [
+    ('inline', r'\$([^$]+)\$', 1),
+    ('inline', r'\\\(([^)]+)\\\)', 1),
+    ('block', r'\$\$([^$]+)\$\$', 1),
+    ('block', r'\\\[([^\]]+)\\\]', 1),
+    ('environment', r'\\begin\{([^}]+)\}(.*?)\\end\{\1\}', 0),
+    ('environment', r'\\begin\{([^}]+)\}(.*?)\\end\{([^}]+)\}', 0),
+]
+
+
+def legacy_spans(content: str) -> list:
+    """旧解析器的输出，去掉重复和与前一个片段重叠的匹配（旧的替换逻辑同样只会替换到这些片段）"""
+    blocks = []
+    for block_type, pattern, group in LEGACY_PATTERNS:
+        for match in re.finditer(pattern, content, re.DOTALL):
+            blocks.append((block_type, match.group(group), match.start(), match.end()))
+    blocks.sort(key=lambda block: (block[2], -block[3]))
+    spans = []
+    for block in blocks:
+        if spans and block[2] < spans[-1][3]:
+            continue
+        spans.append(block)
+    return spans
+
+
+def spans_of(content: str) -> list:
+    return [(span.type, span.content, span.start, span.end) for span in tokenize_math(content)]
+
+
+# 旧解析器能正确处理的内容：新旧结果必须完全一致
+SAME_AS_LEGACY = [
+    "a $x$ b \\(y\\) c",
+    "line\n\\[\\sum_i i\\]\n",
+    "$$\\frac{a}{b}$$",
+    "\\begin{align}a &= b \\\\\n c &= d\\end{align}",
+    "cost $5 and $x^2$ here",
+    "多行\n$a\n+b$\n公式",
+    "$$x",
+    "a $x",
+    "\\(x",
+    "\\[x",
+    "\\begin{align} x",
+]
+
+# 旧解析器出错的内容：新规则下的期望结果
+FIXED_CASES = [
+    # 转义的美元符号不是定界符
+    ("price \\$5 and \\$6", []),
+    ("\\$5 and $x$", [("inline", "x", 8, 11)]),
+    # $$…$$ 优先于 $…$，之后的行内公式不再被吞掉
+    ("$$x+y$$ and $z$", [("block", "x+y", 0, 7), ("inline", "z", 12, 15)]),
+    # 未闭合的 $$ 不会退化为 $ 匹配
+    ("a $$x$ b", []),
+    # \(…\) 中可以出现括号
+    ("\\(f(x)\\)", [("inline", "f(x)", 0, 8)]),
+    # 代码围栏和行内代码中的内容不是公式
+    ("```\n$x$\n```\n$y$", [("inline", "y", 12, 15)]),
+    ("~~~\n$q$\n~~~~\n$r$", [("inline", "r", 13, 16)]),
+    ("`$a$` $b$", [("inline", "b", 6, 9)]),
+    ("``a`$x$`` $y$", [("inline", "y", 10, 13)]),
+    ("```python\nprice = '$100' or '$200'\n", []),
+]
+
+
+def test_same_as_legacy_parser():
+    for content in SAME_AS_LEGACY:
+        assert spans_of(content) == legacy_spans(content), content
+    print(f"✅ {len(SAME_AS_LEGACY)} 个普通用例与旧解析器结果一致")
+
+
+def test_legacy_parser_bugs_fixed():
+    for content, expected in FIXED_CASES:
+        assert spans_of(content) == expected, (content, spans_of(content))
+        assert legacy_spans(content) != expected, content
+    print(f"✅ {len(FIXED_CASES)} 个旧解析器出错的用例按新规则识别")
+
+
+def test_span_positions():
+    content = "前文 $a$ 中间 $$b$$ 然后 \\(c\\) 和 \\[d\\] 以及 \\begin{matrix}e\\end{matrix} 结尾"
+    spans = tokenize_math(content)
+    assert [span.type for span in spans] == ["inline", "block", "inline", "block", "environment"]
+    for span in spans:
+        assert content[span.start:span.end] == span.original
+    assert [span.content for span in spans][:4] == ["a", "b", "c", "d"]
+    assert contains_math(content)
+    assert not contains_math("`$a$` 和 \\$5")
+    print("✅ 片段位置与原文一致")
+
+
+def test_substitute_math():
+    content = "a $x$ b $$y$$ c \\(z\\) d"
+    spans = tokenize_math(content)
+
+    # 旧实现：从后往前逐块拼接
+    legacy = content
+    for _, _, start, end in reversed(legacy_spans(content)):
+        legacy = legacy[:start] + "[M]" + legacy[end:]
+    assert substitute_math(content, spans, lambda span: "[M]") == legacy == "a [M] b [M] c [M] d"
+
+    keep_block = substitute_math(content, spans, lambda span: None if span.type == "block" else "[M]")
+    assert keep_block == "a [M] b $$y$$ c [M] d"
+    assert substitute_math(content, spans, lambda span: None) == content
+    assert substitute_math("no math", [], lambda span: "[M]") == "no math"
+    print("✅ 替换结果与旧实现一致，返回 None 时保留原文")
+
+
+if __name__ == "__main__":
+    print("🧮 测试LaTeX分词器...")
+    test_same_as_legacy_parser()
+    test_legacy_parser_bugs_fixed()
+    test_span_positions()
+    test_substitute_math()
+    print("\n🎉 LaTeX分词器测试通过")
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+查询计划回归测试
+在造好数据的数据库上对各接口的主查询执行 EXPLAIN（SQLite 为 EXPLAIN QUERY PLAN），
+出现未经允许的全表扫描即失败。
+
+默认使用临时 SQLite 文件；设置 QUERY_PLAN_DATABASE_URL 可改为检查 PostgreSQL
+（指向一个空的临时库，测试会建表并在结束时删除）。PostgreSQL 上关闭 enable_seqscan，
+小表上仍出现 Seq Scan 说明没有可用的索引。
+"""
+
+import os
+import re
+import sys
+import json
+import asyncio
+import tempfile
+from datetime import datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlmodel import SQLModel
+
+from app.models import __all_models__  # noqa: F401  注册所有表
+from app.models.user import User, OAuthAccount, OAuthProvider
+from app.models.article import Article, ArticleStatus
+from app.models.comment import Comment
+from app.models.tag import Tag, ArticleTag
+from app.models.donation import DonationRecord, DonationStatus
+from app.models.media import MediaFile, MediaType
+
+_SQLITE_SCAN_RE = re.compile(r"^SCAN (\w+)$")
+
+
+def plan_queries():
+    """(名称, 语句, 允许全表扫描的表)：与 app/api/v1 中对应接口的主查询一致"""
+    return [
+        ("文章列表", select(Article).order_by(Article.created_at.desc()).limit(10), set()),
+        ("文章列表-按状态", select(Article).where(Article.status == ArticleStatus.PUBLISHED)
+            .order_by(Article.created_at.desc()).limit(10), set()),
+        ("文章列表-按标签", select(Article).join(ArticleTag).join(Tag).where(Tag.name == "tag-3")
+            .order_by(Article.created_at.desc()).limit(10), set()),
+        ("文章列表-按作者", select(Article).join(User).where(User.username == "user-2")
+            .order_by(Article.created_at.desc()).limit(10), set()),
+        ("作者的文章", select(Article.id).where(Article.author_id == 2), set()),
+        ("文章评论", select(Comment).where(Comment.article_id == 5)
+            .order_by(Comment.created_at.desc()), set()),
+        ("评论预加载", select(Comment).where(Comment.article_id.in_([1, 2, 3])), set()),
+        ("评论回复", select(Comment).where(Comment.parent_id == 7), set()),
+        ("文章标签预加载", select(ArticleTag).where(ArticleTag.article_id.in_([1, 2, 3])), set()),
+        ("标签的文章", select(ArticleTag.article_id).where(ArticleTag.tag_id == 3), set()),
+        # 列出全部标签本身就需要读完 tag 表
+        ("标签列表", select(Tag, func.count(ArticleTag.article_id)).outerjoin(ArticleTag)
+            .group_by(Tag.id).order_by(Tag.name), {"tag"}),
+        ("捐赠记录-按状态", select(DonationRecord).where(DonationRecord.payment_status == DonationStatus.SUCCESS)
+            .order_by(DonationRecord.created_at.desc()).limit(20), set()),
+        ("我的捐赠", select(DonationRecord).where(DonationRecord.user_id == 3)
+            .order_by(DonationRecord.created_at.desc()), set()),
+        ("支付回调", select(DonationRecord).where(DonationRecord.transaction_id == "tx-10"), set()),
+        ("捐赠统计", select(func.sum(DonationRecord.amount))
+            .where(DonationRecord.payment_status == DonationStatus.SUCCESS), set()),
+        ("媒体列表-按上传者", select(MediaFile).where(MediaFile.uploader_id == 2), set()),
+        ("OAuth登录", select(OAuthAccount).where(
+            OAuthAccount.provider == OAuthProvider.GITHUB, OAuthAccount.provider_user_id == "gh-5"
+        ), set()),
+        ("OAuth绑定", select(OAuthAccount).where(
+            OAuthAccount.user_id == 5, OAuthAccount.provider == OAuthProvider.GITHUB
+        ), set()),
+    ]
+
+
+async def seed(session: AsyncSession, users: int = 20, articles: int = 400):
+    now = datetime.utcnow()
+    session.add_all([
+        User(id=i, username=f"user-{i}", email=f"user-{i}@example.com", hashed_password="x")
+        for i in range(1, users + 1)
+    ])
+    session.add_all([Tag(id=i, name=f"tag-{i}") for i in range(1, 31)])
+    await session.flush()
+    statuses = list(ArticleStatus)
+    for i in range(1, articles + 1):
+        session.add(Article(
+            id=i, title=f"文章 {i}", content="正文" * 20, status=statuses[i % len(statuses)],
+            author_id=i % users + 1, created_at=now - timedelta(hours=i)
+        ))
+    await session.flush()
+    for i in range(1, articles + 1):
+        session.add_all([ArticleTag(article_id=i, tag_id=(i + k) % 30 + 1) for k in range(3)])
+        # 每篇文章 2 条评论，各带 1 条回复
+        for k in range(2):
+            comment_id = (i - 1) * 4 + k * 2 + 1
+            session.add(Comment(id=comment_id, content=f"评论 {k}", article_id=i, author_id=k % users + 1))
+            session.add(Comment(
+                id=comment_id + 1, content=f"回复 {k}", article_id=i, author_id=(k + 1) % users + 1,
+                parent_id=comment_id, created_at=now - timedelta(minutes=k)
+            ))
+    for i in range(1, 201):
+        session.add(DonationRecord(
+            donor_name=f"donor-{i}", amount=Decimal("10.00"), payment_method="ALIPAY",
+            payment_status=list(DonationStatus)[i % 4], transaction_id=f"tx-{i}",
+            user_id=i % users + 1, created_at=now - timedelta(hours=i)
+        ))
+        session.add(MediaFile(
+            filename=f"{i}.png", type=MediaType.image, url=f"/uploads/{i}.png", size=1024,
+            uploader_id=i % users + 1
+        ))
+    session.add_all([
+        OAuthAccount(user_id=i, provider=OAuthProvider.GITHUB, provider_user_id=f"gh-{i}")
+        for i in range(1, users + 1)
+    ])
+    await session.commit()
+
+
+def compile_sql(statement, dialect) -> str:
+    return str(statement.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+
+
+async def full_scans(conn, statement, allowed) -> list:
+    """返回计划中未经允许的全表扫描"""
+    sql = compile_sql(statement, conn.dialect)
+    if conn.dialect.name == "sqlite":
+        rows = (await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")).all()
+        details = [row[-1] for row in rows]
+        scans = [m.group(1) for m in map(_SQLITE_SCAN_RE.match, details) if m]
+    else:
+        plan = (await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        scans = []
+        stack = [plan[0]["Plan"]]
+        while stack:
+            node = stack.pop()
+            if node.get("Node Type") == "Seq Scan":
+                scans.append(node.get("Relation Name"))
+            stack.extend(node.get("Plans", []))
+    return [table for table in scans if table not in allowed]
+
+
+async def run_query_plan_checks(url: str) -> list:
+    engine = create_async_engine(url)
+    failures = []
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+        async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+            await seed(session)
+
+        async with engine.connect() as conn:
+            await conn.exec_driver_sql("ANALYZE")
+            if conn.dialect.name != "sqlite":
+                await conn.exec_driver_sql("SET enable_seqscan = off")
+            for name, statement, allowed in plan_queries():
+                scans = await full_scans(conn, statement, allowed)
+                if scans:
+                    failures.append((name, scans, compile_sql(statement, conn.dialect)))
+                    print(f"❌ {name}: 全表扫描 {', '.join(scans)}")
+                else:
+                    print(f"✅ {name}")
+    finally:
+        if not url.startswith("sqlite"):
+            async with engine.begin() as conn:
+                await conn.run_sync(SQLModel.metadata.drop_all)
+        await engine.dispose()
+    return failures
+
+
+def test_query_plans():
+    url = os.getenv("QUERY_PLAN_DATABASE_URL")
+    with tempfile.TemporaryDirectory() as tmp:
+        failures = asyncio.run(run_query_plan_checks(url or f"sqlite+aiosqlite:///{tmp}/plans.db"))
+    for name, scans, sql in failures:
+        print(f"\n{name}:\n{sql}")
+    assert not failures, f"{len(failures)} 个查询出现全表扫描"
+
+
+if __name__ == "__main__":
+    print("🔍 检查查询计划...")
+    try:
+        test_query_plans()
+    except AssertionError as e:
+        print(f"\n❌ {e}")
+        sys.exit(1)
+    print("\n🎉 所有查询均使用索引")
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+刷新令牌会话测试（需要可用的 Redis，连接不上时跳过）
+- 每次登录只在用户的会话哈希中增加一个字段
+- 刷新时轮换，旧刷新令牌再次使用时整个会话被吊销
+- 超过会话数上限时淘汰最久未使用的会话
+- 旧格式的 refresh_token:{user_id}:{token} 只能使用一次，随后转为新会话
+会话数上限通过环境变量设置，在独立子进程中运行（全局配置在导入时创建，不能与其他测试共用进程）。
+"""
+
+import os
+import sys
+import asyncio
+import subprocess
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+sys.path.append(str(Path(__file__).parent.parent))
+
+# 子进程连接不上 Redis 时以该退出码结束，测试标记为跳过
+SKIP_EXIT_CODE = 75
+
+
+def session_user():
+    from app.models.user import User, UserRole
+    return User(id=990001, username="session-user", email="session@example.com", role=UserRole.USER, token_version=0)
+
+
+async def rotate(user, tokens: dict) -> dict:
+    from app.core.refresh_sessions import refresh_sessions
+    from app.core.security import verify_token
+
+    payload = verify_token(tokens["refresh_token"])
+    return await refresh_sessions.rotate(tokens["refresh_token"], payload, user, "pytest")
+
+
+async def expect_rejected(user, tokens: dict):
+    from app.core.exceptions import AuthenticationError
+
+    try:
+        await rotate(user, tokens)
+    except AuthenticationError:
+        return
+    raise AssertionError("刷新令牌应当被拒绝")
+
+
+async def run_checks() -> bool:
+    """Redis 不可用时返回 False"""
+    from app.core.redis import redis_manager
+    from app.core.refresh_sessions import refresh_sessions
+    from app.core.security import create_refresh_token, verify_token
+    from app.core.token_revocation import token_revocation
+
+    user = session_user()
+    if not redis_manager.redis:
+        await redis_manager.connect()
+    try:
+        await redis_manager.redis.ping()
+    except Exception as e:
+        print(f"⚠️ Redis 不可用，跳过: {e}")
+        return False
+    await refresh_sessions.revoke_all(user.id)
+    try:
+        first = await refresh_sessions.issue(user, "browser")
+        assert verify_token(first["refresh_token"])["fid"] == verify_token(first["access_token"])["fid"]
+        assert len(await refresh_sessions.list_sessions(user.id)) == 1
+        print("✅ 登录只新增一个会话")
+
+        second = await rotate(user, first)
+        third = await rotate(user, second)
+        assert len(await refresh_sessions.list_sessions(user.id)) == 1
+        print("✅ 刷新时轮换，不新增会话")
+
+        await expect_rejected(user, first)
+        await expect_rejected(user, third)
+        assert not await refresh_sessions.list_sessions(user.id)
+        print("✅ 旧刷新令牌重放后整个会话被吊销")
+
+        devices = []
+        for i in range(5):
+            devices.append(await refresh_sessions.issue(user, f"device-{i}"))
+            await asyncio.sleep(0.01)
+        sessions = await refresh_sessions.list_sessions(user.id)
+        assert [s["device"] for s in sessions] == ["device-4", "device-3", "device-2"]
+        await expect_rejected(user, devices[0])
+        assert token_revocation.is_revoked(verify_token(devices[0]["access_token"])["jti"])
+        print("✅ 超过会话数上限时淘汰最久未使用的会话")
+
+        assert await refresh_sessions.revoke(user.id, sessions[0]["id"])
+        await expect_rejected(user, devices[4])
+        assert len(await refresh_sessions.list_sessions(user.id)) == 2
+        print("✅ 吊销指定设备")
+
+        legacy = create_refresh_token({"sub": user.username, "user_id": user.id})
+        await redis_manager.set(f"refresh_token:{user.id}:{legacy}", "valid", expire=60)
+        legacy_tokens = {"refresh_token": legacy}
+        upgraded = await rotate(user, legacy_tokens)
+        assert verify_token(upgraded["refresh_token"])["fid"]
+        await expect_rejected(user, legacy_tokens)
+        print("✅ 旧格式刷新令牌使用一次后转为新会话")
+    finally:
+        await refresh_sessions.revoke_all(user.id)
+    return True
+
+
+def test_refresh_sessions():
+    result = subprocess.run([sys.executable, __file__], capture_output=True, text=True)
+    if result.returncode == SKIP_EXIT_CODE:
+        import pytest
+        pytest.skip(result.stdout.strip().splitlines()[-1])
+    assert result.returncode == 0, result.stdout + result.stderr
+
+
+if __name__ == "__main__":
+    os.environ["MAX_SESSIONS_PER_USER"] = "3"
+    print("🔑 测试刷新令牌会话...")
+    if not asyncio.run(run_checks()):
+        sys.exit(SKIP_EXIT_CODE)
+    print("\n🎉 刷新令牌会话测试通过")
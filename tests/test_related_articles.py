@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+相关文章接口测试
+文章页面的相关文章面向匿名读者：不带令牌请求 /articles/{id}/related 应正常返回，
+而不是被认证中间件拦截。使用临时 SQLite 数据库，在独立子进程中运行
+（app 的数据库引擎和配置在导入时创建，不能与其他测试共用进程）。
+"""
+
+import os
+import sys
+import asyncio
+import tempfile
+import subprocess
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+sys.path.append(str(Path(__file__).parent.parent))
+
+
+async def run_checks():
+    import httpx
+    from fastapi import FastAPI
+    from fastapi.responses import JSONResponse
+
+    from app.core.database import async_session, create_tables
+    from app.core.exceptions import BlogException
+    from app.core.middleware import setup_middleware
+    from app.core.security import get_password_hash
+    from app.models.article import Article, ArticleStatus
+    from app.models.user import User, UserRole
+    from app.api.v1.article import router as article_router
+
+    app = FastAPI()
+    setup_middleware(app)
+
+    @app.exception_handler(BlogException)
+    async def blog_exception_handler(request, exc: BlogException):
+        return JSONResponse(status_code=exc.status_code, content={"message": exc.detail})
+
+    app.include_router(article_router, prefix="/api/v1")
+
+    await create_tables()
+    async with async_session() as db:
+        db.add(User(
+            id=1, username="related-author", email="related@example.com",
+            hashed_password=get_password_hash("secret"), role=UserRole.USER
+        ))
+        db.add(Article(
+            id=1, title="相关文章", content="正文", author_id=1, status=ArticleStatus.PUBLISHED
+        ))
+        await db.commit()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get("/api/v1/articles/1/related")
+        assert response.status_code == 200, response.text
+        assert isinstance(response.json(), list)
+        print(f"✅ 匿名访问相关文章: {response.status_code}")
+
+        response = await client.get("/api/v1/articles/999/related")
+        assert response.status_code == 404, response.text
+        print(f"✅ 文章不存在时返回 {response.status_code}，而不是认证错误")
+
+
+def test_related_articles_anonymous():
+    result = subprocess.run([sys.executable, __file__], capture_output=True, text=True)
+    assert result.returncode == 0, result.stdout + result.stderr
+
+
+if __name__ == "__main__":
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/related.db"
+    os.environ["DEBUG"] = "false"
+    print("🔗 测试相关文章接口...")
+    asyncio.run(run_checks())
+    print("\n🎉 相关文章接口测试通过")
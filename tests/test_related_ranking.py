@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+相关文章排序测试
+- 全量重建后，主题相近的文章排在只有个别词重合的文章之前
+- 增量更新：新发布的相近文章进入已有文章的邻居列表；取消发布的文章从邻居列表中移除
+使用临时 SQLite 数据库，在独立子进程中运行（app 的数据库引擎和配置在导入时创建，不能与其他测试共用进程）。
+"""
+
+import os
+import sys
+import asyncio
+import tempfile
+import subprocess
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+sys.path.append(str(Path(__file__).parent.parent))
+
+ARTICLES = {
+    1: ("Python asyncio 入门", "asyncio 事件循环与协程",
+        "python asyncio event loop coroutine await task gather 协程 事件循环 并发"),
+    2: ("Python asyncio 进阶", "协程调度与任务取消",
+        "python asyncio coroutine await task cancel 协程 事件循环 任务 并发"),
+    3: ("红烧肉做法", "家常菜谱",
+        "python asyncio coroutine event loop pork braise soy sugar ginger 红烧 五花肉 冰糖 酱油 小火 慢炖"),
+    4: ("番茄炒蛋", "快手菜",
+        "tomato egg stir fry salt 番茄 鸡蛋 翻炒 出锅"),
+}
+LATE_ARTICLE = (5, "asyncio 协程实践", "事件循环中的并发任务",
+                "python asyncio coroutine await gather task 协程 事件循环 并发 实践")
+
+
+async def neighbours(article_id: int) -> list:
+    from sqlalchemy import select
+
+    from app.core.database import async_session
+    from app.models.related import RelatedArticle
+
+    async with async_session() as db:
+        result = await db.execute(
+            select(RelatedArticle.related_id)
+            .where(RelatedArticle.article_id == article_id)
+            .order_by(RelatedArticle.rank)
+        )
+        return list(result.scalars().all())
+
+
+async def run_checks():
+    from app.core.database import async_session, create_tables
+    from app.core.search.related import related_articles
+    from app.core.security import get_password_hash
+    from app.models.article import Article, ArticleStatus
+    from app.models.user import User, UserRole
+
+    await create_tables()
+    async with async_session() as db:
+        db.add(User(
+            id=1, username="ranker", email="ranker@example.com",
+            hashed_password=get_password_hash("secret"), role=UserRole.USER
+        ))
+        for article_id, (title, summary, content) in ARTICLES.items():
+            db.add(Article(
+                id=article_id, title=title, summary=summary, content=content,
+                author_id=1, status=ArticleStatus.PUBLISHED
+            ))
+        await db.commit()
+
+    async with async_session() as db:
+        assert await related_articles.rebuild(db) == "rebuilt"
+    related = await neighbours(1)
+    assert related and related[0] == 2, related
+    assert related.index(2) < related.index(3), related
+    print(f"✅ 全量重建：相近文章排在个别词重合的文章之前 {related}")
+
+    # 新发布的相近文章只对已存储的向量打分，插入已有文章的邻居列表
+    article_id, title, summary, content = LATE_ARTICLE
+    async with async_session() as db:
+        db.add(Article(
+            id=article_id, title=title, summary=summary, content=content,
+            author_id=1, status=ArticleStatus.PUBLISHED
+        ))
+        await db.commit()
+    async with async_session() as db:
+        await related_articles.refresh_article(db, article_id)
+    assert 5 in await neighbours(1), await neighbours(1)
+    assert set((await neighbours(5))[:2]) == {1, 2}, await neighbours(5)
+    print(f"✅ 增量更新：新文章进入已有文章的邻居列表 {await neighbours(1)}")
+
+    # 取消发布后从其他文章的邻居列表中移除
+    async with async_session() as db:
+        article = await db.get(Article, 2)
+        article.status = ArticleStatus.DRAFT
+        await db.commit()
+    async with async_session() as db:
+        await related_articles.refresh_article(db, 2)
+    for other in (1, 3, 4, 5):
+        assert 2 not in await neighbours(other), (other, await neighbours(other))
+    assert await neighbours(2) == []
+    assert (await neighbours(1))[0] == 5, await neighbours(1)
+    print(f"✅ 增量更新：取消发布的文章被移除 {await neighbours(1)}")
+
+
+def test_related_ranking():
+    result = subprocess.run([sys.executable, __file__], capture_output=True, text=True)
+    assert result.returncode == 0, result.stdout + result.stderr
+
+
+if __name__ == "__main__":
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/related.db"
+    os.environ["DEBUG"] = "false"
+    print("🔗 测试相关文章排序...")
+    asyncio.run(run_checks())
+    print("\n🎉 相关文章排序测试通过")
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+搜索结果缓存测试（不连接 Redis）
+- 未连接 Redis 时进程内缓存只保留 local_ttl 秒，其他 worker 的写入最多在这段时间后可见
+- 本进程递增代数后缓存立即失效
+- 查询期间代数被递增时，结果写入查询前的代数下，不会被当作新代数下的结果返回
+"""
+
+import sys
+import time
+import asyncio
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.redis import redis_manager
+from app.core.search.result_cache import SearchResultCache
+
+
+async def run_checks():
+    assert redis_manager.redis is None
+    cache = SearchResultCache(ttl=300, local_size=8, local_ttl=0.2)
+    key = cache.make_key("python", page=1)
+    page = {"items": [{"id": 1}], "total": 1}
+
+    generation = await cache.generation()
+    await cache.set(key, page, generation)
+    assert await cache.get(key, generation) == page
+    print("✅ 未连接 Redis 时命中进程内缓存")
+
+    time.sleep(0.25)
+    assert await cache.get(key, generation) is None
+    assert cache.stats()["local_entries"] == 0
+    print("✅ 超过 local_ttl 后不再返回，不会无限期保留其他 worker 已失效的结果")
+
+    await cache.set(key, page, generation)
+    await cache.bump_generation()
+    assert await cache.get(key, await cache.generation()) is None
+    print("✅ 递增代数后缓存失效")
+
+    # 查询开始后有文章写入：按查询前的代数写回，新代数下仍然未命中
+    generation = await cache.generation()
+    assert await cache.get(key, generation) is None
+    await cache.bump_generation()
+    await cache.set(key, {"items": [], "total": 0}, generation)
+    assert await cache.get(key, await cache.generation()) is None
+    print("✅ 查询期间代数递增时，旧结果不会写入新代数")
+
+
+def test_local_cache_expires_without_redis():
+    asyncio.run(run_checks())
+
+
+if __name__ == "__main__":
+    print("🔎 测试搜索结果缓存...")
+    test_local_cache_expires_without_redis()
+    print("\n🎉 搜索结果缓存测试通过")
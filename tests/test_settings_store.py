@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+配置快照测试
+- 配置接口的响应按版本缓存，未修改 .env 时不重新解析
+- .env 修改时间变化后自动重新加载，版本号加一，响应随之更新
+- 内容没有变化的重新加载不改变版本号
+使用临时目录中的 .env，在独立子进程中运行（全局配置在导入时创建，不能与其他测试共用进程）。
+"""
+
+import os
+import sys
+import time
+import asyncio
+import tempfile
+import subprocess
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+
+def write_env(email_enabled: bool):
+    with open(".env", "w", encoding="utf-8") as f:
+        f.write(f"EMAIL_ENABLED={str(email_enabled).lower()}\nCONFIG_CHECK_INTERVAL=0\n")
+    # 保证修改时间一定变化
+    future = time.time() + 10 * (write_env.calls + 1)
+    write_env.calls += 1
+    os.utime(".env", (future, future))
+
+
+write_env.calls = 0
+
+
+async def run_checks():
+    from app.core.config import Settings, settings_store
+    from app.core.email import email_service
+    from app.api.v1.config import get_config, get_auth_config, config_health
+    from app.api.v1.auth import get_auth_config as get_login_config
+
+    reloads = []
+    original_reload = Settings.reload.__func__
+
+    def counting_reload(cls):
+        reloads.append(1)
+        return original_reload(cls)
+
+    Settings.reload = classmethod(counting_reload)
+    try:
+        first = await get_config()
+        for _ in range(20):
+            assert await get_config() is first
+            await get_auth_config()
+            await get_login_config()
+            await config_health()
+        assert not reloads, "未修改 .env 时不应重新解析配置"
+        assert first["email_enabled"] is False
+        version = settings_store.version
+        print(f"✅ 未修改 .env 时响应被缓存（版本 {version}）")
+
+        write_env(True)
+        updated = await get_config()
+        assert updated is not first and updated["email_enabled"] is True
+        assert settings_store.version == version + 1
+        assert (await get_login_config())["email_enabled"] is True
+        assert (await config_health())["config_version"] == version + 1
+        email_service._reload_config()
+        assert email_service.enabled is True
+        print(f"✅ 修改 .env 后自动重新加载（版本 {settings_store.version}）")
+
+        settings_store.reload()
+        assert settings_store.version == version + 1
+        assert await get_config() is updated
+        print("✅ 内容未变化的重新加载保持版本号和缓存")
+    finally:
+        Settings.reload = classmethod(original_reload)
+
+
+def test_settings_store():
+    result = subprocess.run([sys.executable, str(Path(__file__).resolve())], capture_output=True, text=True)
+    assert result.returncode == 0, result.stdout + result.stderr
+
+
+if __name__ == "__main__":
+    env_dir = tempfile.mkdtemp()
+    os.chdir(env_dir)
+    os.environ["ENV_FILE"] = os.path.join(env_dir, ".env")
+    write_env(False)
+    print("🔧 测试配置快照...")
+    asyncio.run(run_checks())
+    print("\n🎉 配置快照测试通过")
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+SQLite 生产模式写请求测试
+生产模式只有一个写连接。创建文章后，后台任务（相关文章向量、邻居）使用独立会话写入，
+请求会话必须在后台任务开始前归还写连接，否则后台任务要等到 sqlite_write_timeout 才失败。
+使用临时 SQLite 数据库，在独立子进程中运行（app 的数据库引擎和配置在导入时创建，不能与其他测试共用进程）。
+"""
+
+import os
+import sys
+import time
+import asyncio
+import tempfile
+import subprocess
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+sys.path.append(str(Path(__file__).parent.parent))
+
+WRITE_TIMEOUT = 3
+
+
+async def run_checks():
+    import httpx
+    from fastapi import FastAPI
+    from fastapi.responses import JSONResponse
+    from sqlalchemy import func, select
+
+    from app.core.database import async_session, create_db_and_tables
+    from app.core.exceptions import BlogException
+    from app.core.middleware import setup_middleware
+    from app.core.security import create_access_token, get_password_hash
+    from app.models.related import ArticleTermVector
+    from app.models.user import User, UserRole
+    from app.api.v1.article import router as article_router
+
+    app = FastAPI()
+    setup_middleware(app)
+
+    @app.exception_handler(BlogException)
+    async def blog_exception_handler(request, exc: BlogException):
+        return JSONResponse(status_code=exc.status_code, content={"message": exc.detail})
+
+    app.include_router(article_router, prefix="/api/v1")
+
+    await create_db_and_tables()
+    async with async_session() as db:
+        db.add(User(
+            id=1, username="writer", email="writer@example.com",
+            hashed_password=get_password_hash("secret"), role=UserRole.ADMIN
+        ))
+        await db.commit()
+
+    token = create_access_token({"sub": "writer", "user_id": 1, "role": "admin"})
+    headers = {"Authorization": f"Bearer {token}"}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        # ASGITransport 在后台任务执行完毕后才返回，耗时包含后台任务
+        started = time.perf_counter()
+        response = await client.post("/api/v1/articles/", headers=headers, json={
+            "title": "生产模式写入", "content": "单写连接下创建文章", "status": "published", "tags": ["sqlite"]
+        })
+        elapsed = time.perf_counter() - started
+        assert response.status_code == 200, response.text
+        assert elapsed < WRITE_TIMEOUT, f"创建文章耗时 {elapsed:.2f}s，后台任务在等待写连接"
+        print(f"✅ 创建文章（含后台任务）耗时 {elapsed:.2f}s")
+
+    async with async_session() as db:
+        vectors = (await db.execute(select(func.count()).select_from(ArticleTermVector))).scalar()
+    assert vectors == 1, vectors
+    print("✅ 后台任务取得写连接，相关文章向量已写入")
+
+
+def test_create_article_in_production_mode():
+    result = subprocess.run([sys.executable, __file__], capture_output=True, text=True)
+    assert result.returncode == 0, result.stdout + result.stderr
+
+
+if __name__ == "__main__":
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/production.db"
+    os.environ["DEBUG"] = "false"
+    os.environ["SQLITE_PRODUCTION_MODE"] = "true"
+    os.environ["SQLITE_WRITE_TIMEOUT"] = str(WRITE_TIMEOUT)
+    print("🗄️ 测试 SQLite 生产模式写请求...")
+    asyncio.run(run_checks())
+    print("\n🎉 SQLite 生产模式写请求测试通过")
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+令牌吊销测试
+- 新签发的令牌带 jti 和 ver 声明
+- 吊销单个 jti 后本地立即生效，其他令牌不受影响
+- 递增 token_version 后该用户之前签发的令牌全部失效
+校验路径不访问 Redis，测试在未连接 Redis 的情况下运行。使用临时 SQLite 数据库，在独立子进程中运行
+（app 的数据库引擎和配置在导入时创建，不能与其他测试共用进程）。
+"""
+
+import os
+import sys
+import asyncio
+import tempfile
+import subprocess
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+sys.path.append(str(Path(__file__).parent.parent))
+
+
+def issue(user, refresh: bool = False) -> tuple:
+    from app.core.security import create_access_token, create_refresh_token, verify_token
+
+    data = {"sub": user.username, "user_id": user.id, "ver": user.token_version}
+    token = create_refresh_token(data) if refresh else create_access_token({**data, "role": user.role.value})
+    return token, verify_token(token)
+
+
+async def run_checks():
+    from app.core.database import async_session, create_tables
+    from app.core.security import get_password_hash
+    from app.core.token_revocation import token_revocation
+    from app.models.user import User, UserRole
+
+    await create_tables()
+    async with async_session() as db:
+        user = User(
+            id=1, username="revoke-user", email="revoke@example.com",
+            hashed_password=get_password_hash("secret"), role=UserRole.USER
+        )
+        db.add(user)
+        await db.commit()
+        await db.refresh(user)
+
+        first, first_payload = issue(user)
+        second, second_payload = issue(user)
+        assert first_payload["jti"] != second_payload["jti"]
+        assert first_payload["ver"] == 0
+        assert await token_revocation.is_valid(first, first_payload, user)
+        print("✅ 令牌带 jti 和 ver 声明")
+
+        await token_revocation.revoke_token(first_payload)
+        assert not await token_revocation.is_valid(first, first_payload, user)
+        assert await token_revocation.is_valid(second, second_payload, user)
+        print("✅ 吊销单个令牌只影响该令牌")
+
+        refresh, refresh_payload = issue(user, refresh=True)
+        version = await token_revocation.revoke_user(db, user.id)
+        await db.refresh(user)
+        assert version == user.token_version == 1
+        assert not await token_revocation.is_valid(second, second_payload, user)
+        assert not await token_revocation.is_valid(refresh, refresh_payload, user)
+        third, third_payload = issue(user)
+        assert await token_revocation.is_valid(third, third_payload, user)
+        print("✅ 递增 token_version 后旧令牌全部失效，新令牌可用")
+
+
+def test_token_revocation():
+    result = subprocess.run([sys.executable, __file__], capture_output=True, text=True)
+    assert result.returncode == 0, result.stdout + result.stderr
+
+
+if __name__ == "__main__":
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/revocation.db"
+    os.environ["DEBUG"] = "false"
+    print("🔐 测试令牌吊销...")
+    asyncio.run(run_checks())
+    print("\n🎉 令牌吊销测试通过")
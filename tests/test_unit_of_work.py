@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+请求级工作单元测试
+认证中间件、get_db 依赖和处理函数共用一个会话：每个请求最多从连接池取一次连接，
+当前用户只查询一次。使用临时 SQLite 数据库，在独立子进程中运行
+（app 的数据库引擎和配置在导入时创建，不能与其他测试共用进程）。
+"""
+
+import os
+import sys
+import asyncio
+import tempfile
+import subprocess
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+sys.path.append(str(Path(__file__).parent.parent))
+
+
+def build_app():
+    from fastapi import FastAPI
+    from fastapi.responses import JSONResponse
+    from app.core.exceptions import BlogException
+    from app.core.middleware import setup_middleware
+    from app.api.v1.auth import router as auth_router
+    from app.api.v1.article import router as article_router
+
+    app = FastAPI()
+    setup_middleware(app)
+
+    @app.exception_handler(BlogException)
+    async def blog_exception_handler(request, exc: BlogException):
+        return JSONResponse(status_code=exc.status_code, content={"message": exc.detail})
+
+    app.include_router(auth_router, prefix="/api/v1")
+    app.include_router(article_router, prefix="/api/v1")
+    return app
+
+
+async def run_checks():
+    import httpx
+    from sqlalchemy import event
+    from app.core.database import engine, async_session, create_tables
+    from app.core.security import create_access_token, get_password_hash
+    from app.models.user import User, UserRole
+
+    await create_tables()
+    async with async_session() as db:
+        db.add(User(
+            id=1, username="uow-user", email="uow@example.com",
+            hashed_password=get_password_hash("secret"), role=UserRole.USER
+        ))
+        await db.commit()
+
+    checkouts, user_queries = [], []
+
+    @event.listens_for(engine.sync_engine, "checkout")
+    def _on_checkout(*args):
+        checkouts.append(1)
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _on_execute(conn, cursor, statement, *args):
+        if statement.lstrip().upper().startswith("SELECT") and "FROM user" in statement:
+            user_queries.append(statement)
+
+    token = create_access_token({"sub": "uow-user", "user_id": 1, "role": "user"})
+    headers = {"Authorization": f"Bearer {token}"}
+    requests = [
+        ("GET", "/api/v1/auth/me", {}),
+        ("POST", "/api/v1/auth/change-password", {"json": {"current_password": "wrong", "new_password": "x"}}),
+        ("GET", "/api/v1/articles/", {}),
+    ]
+    transport = httpx.ASGITransport(app=build_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        for method, url, kwargs in requests:
+            checkouts.clear()
+            user_queries.clear()
+            response = await client.request(method, url, headers=headers, **kwargs)
+            assert response.status_code < 500, response.text
+            print(f"✅ {method} {url}: {response.status_code}, 连接 {len(checkouts)} 次, 用户查询 {len(user_queries)} 次")
+            assert len(checkouts) <= 1, f"{method} {url} 取了 {len(checkouts)} 次连接"
+            assert len(user_queries) <= 1, f"{method} {url} 查询了 {len(user_queries)} 次用户"
+
+
+def test_unit_of_work():
+    result = subprocess.run([sys.executable, __file__], capture_output=True, text=True)
+    assert result.returncode == 0, result.stdout + result.stderr
+
+
+if __name__ == "__main__":
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/uow.db"
+    os.environ["DEBUG"] = "false"
+    print("🔍 检查请求级工作单元...")
+    asyncio.run(run_checks())
+    print("\n🎉 每个请求最多使用一个数据库连接")
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+文章浏览量测试
+- 文章详情请求只读，只占用一次连接，不写库
+- 响应中的浏览量包含尚未写库的访问
+- flush 后数据库中的浏览量与访问次数一致
+使用临时 SQLite 数据库，在独立子进程中运行（app 的数据库引擎和配置在导入时创建，不能与其他测试共用进程）。
+"""
+
+import os
+import sys
+import asyncio
+import tempfile
+import subprocess
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+sys.path.append(str(Path(__file__).parent.parent))
+
+
+async def run_checks():
+    import httpx
+    from fastapi import FastAPI
+    from sqlalchemy import event, select
+
+    from app.core.database import engine, read_engine, async_session, create_tables
+    from app.core.middleware import setup_middleware
+    from app.core.security import get_password_hash
+    from app.core.view_counter import view_counter
+    from app.models.article import Article, ArticleStatus
+    from app.models.user import User, UserRole
+    from app.api.v1.article import router as article_router
+
+    app = FastAPI()
+    setup_middleware(app)
+    app.include_router(article_router, prefix="/api/v1")
+
+    await create_tables()
+    async with async_session() as db:
+        db.add(User(
+            id=1, username="view-author", email="view@example.com",
+            hashed_password=get_password_hash("secret"), role=UserRole.USER
+        ))
+        db.add(Article(id=1, title="浏览量", content="正文", author_id=1, status=ArticleStatus.PUBLISHED))
+        await db.commit()
+
+    checkouts, writes = [], []
+
+    def _on_checkout(*args):
+        checkouts.append(1)
+
+    def _on_execute(conn, cursor, statement, *args):
+        if statement.lstrip().upper().startswith(("UPDATE", "INSERT", "DELETE")):
+            writes.append(statement)
+
+    # 读写连接池都要统计（SQLite 下只读请求走单独的只读连接池）
+    for pool_engine in {engine, read_engine or engine}:
+        event.listen(pool_engine.sync_engine, "checkout", _on_checkout)
+        event.listen(pool_engine.sync_engine, "before_cursor_execute", _on_execute)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        for expected in (1, 2, 3):
+            checkouts.clear()
+            response = await client.get("/api/v1/articles/1")
+            assert response.status_code == 200, response.text
+            assert response.json()["view_count"] == expected, response.json()["view_count"]
+            assert len(checkouts) <= 1, f"取了 {len(checkouts)} 次连接"
+        assert not writes, writes
+        print("✅ 文章详情只读、只占用一次连接，响应包含未写库的浏览量")
+
+    assert await view_counter.flush() == 1
+    async with async_session() as db:
+        stored = (await db.execute(select(Article.view_count).where(Article.id == 1))).scalar_one()
+    assert stored == 3 and view_counter.pending(1) == 0, stored
+    print(f"✅ flush 后数据库浏览量为 {stored}")
+
+
+def test_view_counter():
+    result = subprocess.run([sys.executable, __file__], capture_output=True, text=True)
+    assert result.returncode == 0, result.stdout + result.stderr
+
+
+if __name__ == "__main__":
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/views.db"
+    os.environ["DEBUG"] = "false"
+    print("👀 测试文章浏览量...")
+    asyncio.run(run_checks())
+    print("\n🎉 文章浏览量测试通过")